@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
+
+        # Load the spaCy pipeline once per worker instead of on the first upload
+        if getattr(settings, 'NLP_WARMUP', False):
+            from .utils.nlp_models import warm_up
+            warm_up()
@@ -0,0 +1,226 @@
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from .authentication import SignedTokenAuthentication
+from .models import ResumeAnalysis
+from .pipeline import aload_resume_text, arun_analysis, score_documents, set_completed, set_failed
+from .resume_cache import hash_file
+from .serializers import ResumeAnalysisSerializer
+from .utils.admission import AdmissionRejected, get_admission_gate
+from .utils.executors import run_in_executor
+from .utils.metrics import IN_FLIGHT, time_stage
+from .utils.ai_feedback import ReplacedFeedback, stream_feedback
+
+logger = logging.getLogger(__name__)
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _authenticated_user(request):
+    """The user of a bearer access token or of the session, or None.
+
+    Authenticates like the DRF views: an invalid bearer token raises
+    AuthenticationFailed, and only session users need a CSRF token.
+    """
+    authenticated = SignedTokenAuthentication().authenticate(request)
+    if authenticated is not None:
+        return authenticated[0]
+
+    # Resolving request.user hits the session and user tables
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    SessionAuthentication().enforce_csrf(request)
+    return user
+
+def _validate_upload(request):
+    """Return (resume_file, job_description, error_response) for an upload request."""
+    resume_file = request.FILES.get('resume')
+
+    rejected = getattr(request, 'resume_upload_rejected', None)
+    if rejected:
+        return None, None, JsonResponse({'error': rejected.message}, status=rejected.status_code)
+
+    if not resume_file:
+        return None, None, JsonResponse({'error': 'Resume file is required'}, status=400)
+
+    if not resume_file.name.lower().endswith('.pdf'):
+        return None, None, JsonResponse({'error': 'Only PDF files are supported'}, status=400)
+
+    job_description = request.POST.get('job_description')
+    if not job_description:
+        return None, None, JsonResponse({'error': 'Job description is required'}, status=400)
+
+    return resume_file, job_description, None
+
+async def _create_analysis(user, resume_file, job_description, content_hash):
+    if not content_hash:
+        content_hash = await sync_to_async(hash_file)(resume_file)
+    with time_stage('upload_save'):
+        return await ResumeAnalysis.objects.acreate(
+            user=user,
+            resume_file=resume_file,
+            resume_name=resume_file.name,
+            job_description=job_description,
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="Analyzing...",
+            status=ResumeAnalysis.STATUS_PROCESSING,
+            content_hash=content_hash,
+        )
+
+def _busy_response(rejected):
+    response = JsonResponse({
+        'error': 'The analyzer is busy, please try again shortly.',
+        'retry_after': rejected.retry_after,
+    }, status=429)
+    response['Retry-After'] = str(rejected.retry_after)
+    return response
+
+async def _prepare_upload(request):
+    """Return (analysis, slot, error_response) for an authenticated upload request.
+
+    The caller owns the admission slot and must release it once the analysis ends.
+    """
+    if request.method != 'POST':
+        return None, None, JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        user = await sync_to_async(_authenticated_user)(request)
+    except AuthenticationFailed as e:
+        return None, None, JsonResponse({'error': str(e.detail)}, status=401, headers={'WWW-Authenticate': 'Bearer'})
+    except PermissionDenied as e:
+        return None, None, JsonResponse({'error': str(e.detail)}, status=403)
+    if user is None:
+        return None, None, JsonResponse({'error': 'Not authenticated'}, status=401)
+
+    resume_file, job_description, error_response = await sync_to_async(_validate_upload)(request)
+    if error_response:
+        return None, None, error_response
+
+    try:
+        slot = await get_admission_gate().aacquire(user.id)
+    except AdmissionRejected as rejected:
+        return None, None, _busy_response(rejected)
+
+    try:
+        analysis = await _create_analysis(
+            user, resume_file, job_description, getattr(request, 'resume_upload_hash', None)
+        )
+    except BaseException:
+        slot.release()
+        raise
+    return analysis, slot, None
+
+class _AdmittedEvents:
+    """An event stream that gives back its admission slot when Django closes the response.
+
+    The generator releases the slot itself when it finishes, but a response
+    whose stream was never started (the client left first) is only closed.
+    """
+
+    def __init__(self, events, slot):
+        self.events = events
+        self.slot = slot
+
+    def __aiter__(self):
+        return self.events
+
+    def close(self):
+        self.slot.release()
+
+async def _analysis_events(analysis, slot):
+    """Run the pipeline for an analysis, yielding SSE events as results become available."""
+    yield sse_event('analysis', {'id': analysis.id, 'status': analysis.status})
+
+    with IN_FLIGHT.track_in_progress(mode='stream'):
+        try:
+            with time_stage('parsing'):
+                resume_text = await aload_resume_text(analysis)
+
+            resume_doc, job_doc, ats_score, job_match_score = await run_in_executor(
+                score_documents, resume_text, analysis.job_description
+            )
+            yield sse_event('scores', {'ats_score': ats_score, 'job_match_score': job_match_score})
+
+            parts = []
+            async for chunk in stream_feedback(resume_doc, job_doc, ats_score, job_match_score):
+                if isinstance(chunk, ReplacedFeedback):
+                    # The provider failed mid-stream; the client drops the tokens it has shown
+                    parts = [chunk]
+                    yield sse_event('replace', {'text': chunk})
+                    continue
+                parts.append(chunk)
+                yield sse_event('token', {'text': chunk})
+
+            set_completed(analysis, ats_score, job_match_score, ''.join(parts))
+            with time_stage('db_update'):
+                await analysis.asave()
+            yield sse_event('done', {'id': analysis.id, 'status': analysis.status})
+
+        except Exception as processing_error:
+            logger.error(f"Streaming analysis {analysis.id} failed: {processing_error}")
+            set_failed(analysis, processing_error)
+            with time_stage('db_update'):
+                await analysis.asave()
+            yield sse_event('error', {
+                'id': analysis.id,
+                'error': f'Analysis processing failed: {str(processing_error)}',
+            })
+
+        finally:
+            slot.release()
+
+async def stream_upload(request):
+    """Upload a resume and stream the analysis back as server-sent events.
+
+    Events: `analysis` (row created), `scores` (ATS and job match), a
+    `token` per feedback chunk, then `done` or `error`. If the provider
+    fails mid-stream, a `replace` event carries fallback feedback that
+    replaces the tokens sent so far. The complete feedback is saved on
+    the ResumeAnalysis like a regular upload.
+    """
+    analysis, slot, error_response = await _prepare_upload(request)
+    if error_response:
+        return error_response
+
+    events = _AdmittedEvents(_analysis_events(analysis, slot), slot)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop reverse proxies from buffering the stream
+    return response
+
+async def async_upload(request):
+    """Upload a resume and return the completed analysis, like `upload/` with ANALYSIS_ASYNC off.
+
+    The whole request runs on the event loop: CPU-bound stages go to the
+    bounded analysis executor and I/O is awaited, so one ASGI worker can
+    have many uploads in flight at once.
+    """
+    analysis, slot, error_response = await _prepare_upload(request)
+    if error_response:
+        return error_response
+
+    try:
+        await arun_analysis(analysis)
+    except Exception as processing_error:
+        logger.error(f"Async analysis {analysis.id} failed: {processing_error}")
+        return JsonResponse({
+            'error': f'Analysis processing failed: {str(processing_error)}',
+            'details': 'Please check if the PDF is readable and try again.'
+        }, status=500)
+    finally:
+        slot.release()
+
+    data = await sync_to_async(lambda: ResumeAnalysisSerializer(analysis).data)()
+    return JsonResponse(data, status=201)
+
+# Like the DRF views, these check CSRF themselves and only for session users,
+# so clients authenticating with a bearer token don't need a CSRF cookie.
+# (Django 4.2's csrf_exempt decorator would hide that these are coroutines.)
+stream_upload.csrf_exempt = True
+async_upload.csrf_exempt = True
@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from .tokens import InvalidToken, authenticate_access_token, bearer_token
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticate `Authorization: Bearer <access token>` with tokens from api/tokens.py.
+
+    Requests without a bearer header are left to the next authentication
+    class, so browser sessions keep working alongside tokens.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        token = bearer_token(request)
+        if token is None or not settings.API_TOKENS_ENABLED:
+            return None
+        try:
+            return authenticate_access_token(token)
+        except InvalidToken as e:
+            raise AuthenticationFailed(str(e))
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,13 @@
+from django.contrib.auth.backends import ModelBackend
+from .user_cache import get_cached_user
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup is served from the user cache.
+
+    Logging in still checks the password against the database. The cached
+    row is dropped whenever the user is saved or deleted (api/signals.py),
+    so password changes still end other sessions through the session hash.
+    """
+
+    def get_user(self, user_id):
+        return get_cached_user(user_id, super().get_user)
@@ -0,0 +1,137 @@
+import logging
+import os
+import time
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import ResumeAnalysis, ResumeBlob
+from .storage import BLOB_DIR, blob_hash, blob_name
+
+logger = logging.getLogger(__name__)
+
+def retain_blob(analysis):
+    """Count a new reference from an analysis to its resume blob."""
+    content_hash = blob_hash(analysis.resume_file.name)
+    if content_hash is None:
+        return
+    if not _add_references(content_hash, 1):
+        _create_blob(content_hash, analysis.resume_file.size, 1)
+
+def retain_blobs(references):
+    """Count new references from analyses saved without signals (bulk_create).
+
+    `references` maps each content hash to (number of new references, file size).
+    """
+    for content_hash, (count, size) in references.items():
+        if not _add_references(content_hash, count):
+            _create_blob(content_hash, size, count)
+
+def _add_references(content_hash, count):
+    return ResumeBlob.objects.filter(content_hash=content_hash).update(
+        ref_count=F('ref_count') + count,
+        updated_at=timezone.now(),
+    )
+
+def _create_blob(content_hash, size, count):
+    try:
+        with transaction.atomic():
+            ResumeBlob.objects.create(content_hash=content_hash, size=size, ref_count=count)
+    except IntegrityError:
+        # Another upload of the same PDF created the row first
+        _add_references(content_hash, count)
+
+def release_blob(analysis):
+    """Drop an analysis's reference to its resume blob. The file stays until garbage collection."""
+    content_hash = blob_hash(analysis.resume_file.name)
+    if content_hash is None:
+        return
+    ResumeBlob.objects.filter(content_hash=content_hash, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1,
+        updated_at=timezone.now(),
+    )
+
+def recount_references(storage):
+    """Recompute every blob's ref_count from the ResumeAnalysis rows. Returns the number of blobs corrected."""
+    counts = {}
+    for name, references in (
+        ResumeAnalysis.objects.filter(resume_file__startswith=f'{BLOB_DIR}/')
+        .values_list('resume_file').annotate(references=Count('id')).order_by()
+    ):
+        content_hash = blob_hash(name)
+        if content_hash:
+            counts[content_hash] = counts.get(content_hash, 0) + references
+
+    corrected = 0
+    for blob in ResumeBlob.objects.only('content_hash', 'ref_count').iterator():
+        expected = counts.pop(blob.content_hash, 0)
+        if blob.ref_count != expected:
+            ResumeBlob.objects.filter(content_hash=blob.content_hash).update(ref_count=expected, updated_at=timezone.now())
+            corrected += 1
+    # Blobs referenced by analyses but missing a row
+    for content_hash, references in counts.items():
+        name = blob_name(content_hash)
+        ResumeBlob.objects.update_or_create(
+            content_hash=content_hash,
+            defaults={'size': storage.size(name) if storage.exists(name) else 0, 'ref_count': references},
+        )
+        corrected += 1
+    return corrected
+
+def _blob_files(storage):
+    """Yield (path, content_hash) for files in the blob directory; content_hash is None for strays."""
+    for directory, _, filenames in os.walk(storage.path(BLOB_DIR)):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            yield path, blob_hash(os.path.relpath(path, storage.location))
+
+def collect_garbage(storage, min_age, dry_run=False):
+    """Delete unreferenced blobs, and stray files, untouched for at least min_age seconds.
+
+    A blob is deleted when its row has ref_count 0 or it has no row at all
+    (an upload whose analysis was never saved). Leftover temporary files from
+    interrupted writes are removed too. The age check on both the row and the
+    file keeps blobs that were just released or are being re-uploaded.
+    Returns (files_deleted, bytes_freed).
+    """
+    cutoff = time.time() - min_age
+    row_cutoff = timezone.now() - timedelta(seconds=min_age)
+    referenced = set(ResumeBlob.objects.filter(ref_count__gt=0).values_list('content_hash', flat=True))
+    recent = set(ResumeBlob.objects.filter(updated_at__gte=row_cutoff).values_list('content_hash', flat=True))
+
+    deleted = freed = 0
+    for path, content_hash in _blob_files(storage):
+        if content_hash in referenced or content_hash in recent:
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime >= cutoff:
+            continue
+
+        if not dry_run:
+            if content_hash:
+                # Skip the file if the blob gained a reference since the scan started
+                removed, _ = ResumeBlob.objects.filter(content_hash=content_hash, ref_count=0).delete()
+                if not removed and ResumeBlob.objects.filter(content_hash=content_hash).exists():
+                    continue
+            try:
+                # The storage touches a blob when an upload reuses it
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+        deleted += 1
+        freed += stat.st_size
+        logger.info(f"{'Would delete' if dry_run else 'Deleted'} resume blob {path}")
+
+    if not dry_run:
+        # Unreferenced rows whose file is already gone
+        for content_hash in list(
+            ResumeBlob.objects.filter(ref_count=0, updated_at__lt=row_cutoff).values_list('content_hash', flat=True)
+        ):
+            if not storage.exists(blob_name(content_hash)):
+                ResumeBlob.objects.filter(content_hash=content_hash, ref_count=0).delete()
+    return deleted, freed
@@ -0,0 +1,370 @@
+"""Offline analysis of many resumes against one job description (`manage.py analyze_resumes`)."""
+import csv
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.core.files import File
+from django.db import transaction
+from .blob_store import retain_blobs
+from .models import ResumeAnalysis
+from .pipeline import check_resume_text
+from .resume_cache import hash_file
+from .storage import blob_name
+from .user_cache import invalidate_history
+from .utils.ai_feedback import generate_fallback_feedback, generate_feedback
+from .utils.executors import init_process_worker
+from .utils.nlp_analyzer import calculate_ats_score, calculate_job_match_score
+from .utils.resume_parser import extract_resume
+from .utils.text_document import as_document
+
+logger = logging.getLogger(__name__)
+
+class ResumeSource:
+    """The PDFs in a directory (searched recursively) or in a zip or tar archive.
+
+    Entries are named by their path relative to the directory or inside the
+    archive. Archive members are extracted one at a time, when they are
+    about to be analysed, into a scratch directory.
+    """
+
+    def __init__(self, path, work_dir):
+        self.path = path
+        self.work_dir = work_dir
+        self.archive = None
+        self.members = {}
+
+        if os.path.isdir(path):
+            self.names = sorted(
+                os.path.relpath(os.path.join(directory, filename), path)
+                for directory, _, filenames in os.walk(path)
+                for filename in filenames if filename.lower().endswith('.pdf')
+            )
+        elif zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+            self.members = {
+                info.filename: info for info in self.archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith('.pdf')
+            }
+            self.names = list(self.members)
+        elif tarfile.is_tarfile(path):
+            self.archive = tarfile.open(path)
+            self.members = {
+                member.name: member for member in self.archive.getmembers()
+                if member.isfile() and member.name.lower().endswith('.pdf')
+            }
+            self.names = list(self.members)
+        else:
+            raise ValueError(f"{path} is not a directory or a zip or tar archive")
+
+    def materialize(self, name, index):
+        """Return (file_path, is_temporary) for an entry."""
+        if self.archive is None:
+            return os.path.join(self.path, name), False
+
+        # Member names are never used as paths, so archives can't write outside work_dir
+        target = os.path.join(self.work_dir, f'{index}.pdf')
+        if isinstance(self.archive, zipfile.ZipFile):
+            source = self.archive.open(self.members[name])
+        else:
+            source = self.archive.extractfile(self.members[name])
+        with source, open(target, 'wb') as out:
+            shutil.copyfileobj(source, out)
+        return target, True
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+@functools.lru_cache(maxsize=1)
+def _job_document(job_description):
+    # Every resume in a run is scored against the same job description, so
+    # each worker analyses it once
+    return as_document(job_description)
+
+def analyze_file(file_path, name, job_description, store_file, feedback):
+    """Parse and score one PDF in a worker process.
+
+    `feedback` is None (no feedback), 'fallback' (rule-based feedback
+    computed here) or 'llm' (the resume text is returned so the parent can
+    request LLM feedback). Errors are reported in the result, not raised.
+    """
+    result = {'name': name, 'status': ResumeAnalysis.STATUS_FAILED}
+    try:
+        with open(file_path, 'rb') as f:
+            result['content_hash'] = hash_file(File(f))
+            result['size'] = os.fstat(f.fileno()).st_size
+            if store_file:
+                storage = ResumeAnalysis._meta.get_field('resume_file').storage
+                result['resume_file'] = storage.save(blob_name(result['content_hash']), File(f))
+
+        text, page_count = extract_resume(file_path)
+        check_resume_text(text)
+        resume_doc = as_document(text)
+        job_doc = _job_document(job_description)
+        ats_score = calculate_ats_score(resume_doc, job_doc)
+        job_match_score = calculate_job_match_score(resume_doc, job_doc)
+
+        result.update(
+            status=ResumeAnalysis.STATUS_COMPLETED,
+            pages=page_count,
+            ats_score=ats_score,
+            job_match_score=job_match_score,
+        )
+        if feedback == 'fallback':
+            result['feedback'] = generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+        elif feedback == 'llm':
+            result['text'] = text
+    except Exception as e:
+        logger.warning(f"Could not analyse {name}: {e}")
+        result['error'] = str(e)
+    return result
+
+def _add_llm_feedback(result, job_description):
+    # generate_feedback falls back to rule-based feedback if the provider fails
+    result['feedback'] = generate_feedback(
+        result.pop('text'), job_description, result['ats_score'], result['job_match_score']
+    )
+    return result
+
+class DatabaseWriter:
+    """Store results as ResumeAnalysis rows of one user.
+
+    Files already analysed for this user and job description (matched on
+    resume_name) are skipped, so an interrupted run can simply be repeated.
+    Failures are stored as failed analyses when the file itself was stored.
+    """
+    # Every row needs feedback, so without the LLM the workers write rule-based feedback
+    worker_feedback = 'fallback'
+    store_files = True
+
+    def __init__(self, user, job_description, batch_size):
+        self.user = user
+        self.job_description = job_description
+        self.batch_size = batch_size
+
+    def done_names(self):
+        return set(
+            ResumeAnalysis.objects.filter(user=self.user, job_description=self.job_description)
+            .values_list('resume_name', flat=True)
+        )
+
+    def write(self, results):
+        analyses = []
+        references = {}
+        for result in results:
+            if 'resume_file' not in result:
+                continue
+            completed = result['status'] == ResumeAnalysis.STATUS_COMPLETED
+            analyses.append(ResumeAnalysis(
+                user=self.user,
+                resume_file=result['resume_file'],
+                resume_name=result['name'][:255],
+                job_description=self.job_description,
+                ats_score=result.get('ats_score', 0.0),
+                job_match_score=result.get('job_match_score', 0.0),
+                feedback=result['feedback'] if completed else f"Analysis failed: {result['error']}",
+                status=result['status'],
+                content_hash=result['content_hash'],
+            ))
+            count, _ = references.get(result['content_hash'], (0, result['size']))
+            references[result['content_hash']] = (count + 1, result['size'])
+
+        # bulk_create skips the post_save signals that keep blob counts and history caches current
+        with transaction.atomic():
+            ResumeAnalysis.objects.bulk_create(analyses, batch_size=self.batch_size)
+            retain_blobs(references)
+            transaction.on_commit(lambda: invalidate_history(self.user.id))
+
+    def close(self):
+        pass
+
+class FileWriter:
+    """Append results to a CSV or JSONL file.
+
+    The file doubles as the checkpoint: when it already exists, the files it
+    lists are skipped and new results are appended. Each batch is flushed
+    and fsynced, and a line cut short by an interruption is dropped.
+    """
+    worker_feedback = None
+    store_files = False
+    fields = ['name', 'status', 'ats_score', 'job_match_score', 'pages', 'content_hash', 'error']
+
+    def __init__(self, path, output_format, include_feedback=False, restart=False):
+        self.path = path
+        self.format = output_format
+        if include_feedback:
+            self.fields = self.fields + ['feedback']
+
+        if restart and os.path.exists(path):
+            os.unlink(path)
+        existing = os.path.exists(path) and os.path.getsize(path) > 0
+        if existing:
+            self._drop_partial_line()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        if self.format == 'csv':
+            self.csv = csv.DictWriter(self.file, fieldnames=self.fields, extrasaction='ignore')
+            if not existing:
+                self.csv.writeheader()
+
+    def _drop_partial_line(self):
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def done_names(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline='', encoding='utf-8') as f:
+            if self.format == 'csv':
+                return {row['name'] for row in csv.DictReader(f)}
+            return {json.loads(line)['name'] for line in f if line.strip()}
+
+    def write(self, results):
+        for result in results:
+            if self.format == 'csv':
+                self.csv.writerow(result)
+            else:
+                row = {field: result.get(field) for field in self.fields}
+                self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+def run_bulk_analysis(source, job_description, writer, workers, batch_size=100, feedback_concurrency=0,
+                      progress=None):
+    """Analyse every PDF in `source` not yet recorded by `writer`.
+
+    Parsing and scoring run on a pool of `workers` processes. With
+    feedback_concurrency set, LLM feedback is requested by that many threads;
+    parsing pauses while too many results wait for feedback. Results are
+    written in batches of `batch_size`, and `progress(stats)` is called after
+    each batch. If a worker process crashes, the documents it took down are
+    rerun one at a time on a new pool, so only a document that crashes a
+    worker on its own is recorded as failed. Returns the final stats dict.
+    """
+    feedback = 'llm' if feedback_concurrency else writer.worker_feedback
+    done = writer.done_names()
+    names = [name for name in source.names if name not in done]
+    stats = {'total': len(names), 'skipped': len(source.names) - len(names), 'processed': 0, 'failed': 0}
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal ready
+        # Taken off the list before writing, so a batch that fails to write is not written again
+        results, ready = ready, []
+        if not results:
+            return
+        writer.write(results)
+        stats['processed'] += len(results)
+        stats['failed'] += sum(result['status'] != ResumeAnalysis.STATUS_COMPLETED for result in results)
+        stats['elapsed'] = time.perf_counter() - start
+        if progress:
+            progress(stats)
+
+    def start_pool():
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process_worker,
+        )
+
+    def collect(result):
+        if feedback == 'llm' and result['status'] == ResumeAnalysis.STATUS_COMPLETED:
+            awaiting_feedback.add(feedback_pool.submit(_add_llm_feedback, result, job_description))
+        else:
+            ready.append(result)
+
+    def parsed(future):
+        name, index, temporary_path = parsing.pop(future)
+        if temporary_path:
+            os.unlink(temporary_path)
+        try:
+            collect(future.result())
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for using too much memory) and took every
+            # document in flight with it; which one caused it is unknown
+            suspects.append((index, name))
+
+    def analyze_alone(index, name):
+        nonlocal pool
+        file_path, temporary = source.materialize(name, index)
+        try:
+            future = pool.submit(analyze_file, file_path, name, job_description, writer.store_files, feedback)
+            return future.result()
+        except BrokenProcessPool:
+            logger.warning(f"Could not analyse {name}: worker process crashed")
+            pool.shutdown(wait=True)
+            pool = start_pool()
+            return {'name': name, 'status': ResumeAnalysis.STATUS_FAILED, 'error': 'Worker process crashed'}
+        finally:
+            if temporary:
+                os.unlink(file_path)
+
+    pool = start_pool()
+    feedback_pool = ThreadPoolExecutor(max_workers=feedback_concurrency) if feedback_concurrency else None
+    parsing = {}
+    awaiting_feedback = set()
+    ready = []
+    suspects = []
+    pending_names = iter(enumerate(names))
+    try:
+        while True:
+            # Keep each worker one document ahead, and stop feeding the pool while feedback lags behind
+            while len(parsing) < workers * 2 and len(awaiting_feedback) < max(feedback_concurrency, 1) * 4:
+                entry = next(pending_names, None)
+                if entry is None:
+                    break
+                index, name = entry
+                file_path, temporary = source.materialize(name, index)
+                future = pool.submit(analyze_file, file_path, name, job_description, writer.store_files, feedback)
+                parsing[future] = (name, index, file_path if temporary else None)
+            if not parsing and not awaiting_feedback:
+                break
+
+            finished, _ = wait(set(parsing) | awaiting_feedback, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in awaiting_feedback:
+                    awaiting_feedback.remove(future)
+                    ready.append(future.result())
+                else:
+                    parsed(future)
+
+            if suspects:
+                # Every other future of the broken pool fails too. Rerun all of them
+                # alone on a new pool, so the crash only fails the document causing it
+                wait(set(parsing))
+                for future in list(parsing):
+                    parsed(future)
+                pool.shutdown(wait=True)
+                pool = start_pool()
+                for index, name in sorted(suspects):
+                    collect(analyze_alone(index, name))
+                suspects.clear()
+
+            if len(ready) >= batch_size:
+                flush()
+    finally:
+        # Keep what finished before an interruption, so a rerun doesn't repeat it
+        flush()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if feedback_pool:
+            feedback_pool.shutdown(wait=True, cancel_futures=True)
+        writer.close()
+
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
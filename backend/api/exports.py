@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Columns a history export can include, in output order
+EXPORT_FIELDS = [
+    'id', 'created_at', 'status', 'resume_name', 'ats_score', 'job_match_score',
+    'content_hash', 'job_description', 'feedback',
+]
+DEFAULT_EXPORT_FIELDS = ['id', 'created_at', 'status', 'resume_name', 'ats_score', 'job_match_score']
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+def parse_fields(value):
+    """Export columns from a comma-separated `fields` parameter, in canonical order."""
+    if not value:
+        return DEFAULT_EXPORT_FIELDS
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested.difference(EXPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in EXPORT_FIELDS if field in requested]
+
+def _parse_bound(value, name):
+    # Dates first: parse_datetime() also accepts a bare date, as midnight
+    parsed = parse_date(value)
+    if parsed is not None:
+        return timezone.make_aware(datetime.combine(parsed, time.min)), True
+    parsed = parse_datetime(value)
+    if parsed is not None:
+        return (timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed), False
+    raise ValueError(f"`{name}` must be an ISO date or datetime")
+
+def parse_date_filters(params):
+    """ORM filters for the `from` and `to` parameters.
+
+    Both bounds are inclusive; a `to` date without a time covers that whole day.
+    """
+    filters = {}
+    if params.get('from'):
+        filters['created_at__gte'], _ = _parse_bound(params['from'], 'from')
+    if params.get('to'):
+        bound, whole_day = _parse_bound(params['to'], 'to')
+        if whole_day:
+            filters['created_at__lt'] = bound + timedelta(days=1)
+        else:
+            filters['created_at__lte'] = bound
+    return filters
+
+def _format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_chunks(rows, fields, output, rows_per_chunk):
+    """Encode rows (tuples in `fields` order) as NDJSON or CSV, yielding one string per rows_per_chunk rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if output == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        if writer:
+            writer.writerow([_format_value(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder))
+            buffer.write('\n')
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def aiterate(iterator):
+    """Drive a blocking iterator from async code, one item per call in the sync thread.
+
+    Under ASGI, Django reads a StreamingHttpResponse with a sync iterator into
+    a list before sending it; an async iterator is streamed as produced. The
+    calls are thread-sensitive, so a database cursor stays on one connection.
+    """
+    iterator = iter(iterator)
+    next_item = sync_to_async(next)
+    while True:
+        item = await next_item(iterator, None)
+        if item is None:
+            return
+        yield item
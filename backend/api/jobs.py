@@ -0,0 +1,197 @@
+import logging
+import math
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import AnalysisJob, ResumeAnalysis
+from .pipeline import mark_failed, run_analysis
+from .utils.admission import MAX_RETRY_AFTER, MIN_RETRY_AFTER, AdmissionRejected
+from .utils.metrics import ADMISSION_REJECTIONS
+from .utils.resume_parser import ResumeParseError
+
+logger = logging.getLogger(__name__)
+
+# Window over which worker throughput is measured for Retry-After estimates, in seconds
+THROUGHPUT_WINDOW = 300
+
+def enqueue_analysis(analysis):
+    """Put a saved analysis on the database queue."""
+    return AnalysisJob.objects.create(analysis=analysis)
+
+def queue_throughput():
+    """Jobs finished per second by all analysis workers over the last THROUGHPUT_WINDOW."""
+    now = timezone.now()
+    since = now - timedelta(seconds=THROUGHPUT_WINDOW)
+    finished = AnalysisJob.objects.filter(
+        status__in=[AnalysisJob.STATUS_DONE, AnalysisJob.STATUS_FAILED],
+        updated_at__gte=since,
+        # Bounds the scan of the (status, created_at) index; jobs older than this finished long ago
+        created_at__gte=since - timedelta(seconds=settings.ANALYSIS_JOB_LEASE_SECONDS * settings.ANALYSIS_JOB_MAX_ATTEMPTS),
+    ).count()
+    return finished / THROUGHPUT_WINDOW
+
+def _reject_queued(reason, jobs_ahead):
+    rate = queue_throughput()
+    # No job finished recently (workers down or just started), so there is nothing to estimate from
+    estimate = jobs_ahead / rate if rate else MAX_RETRY_AFTER
+    retry_after = min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(estimate)))
+    ADMISSION_REJECTIONS.inc(reason=reason)
+    logger.warning(f"Rejected queued analysis ({reason}); {jobs_ahead} jobs must finish first")
+    raise AdmissionRejected(reason, retry_after)
+
+def check_queue_admission(user_id):
+    """Raise AdmissionRejected if the queue holds too many unfinished jobs, overall or for this user.
+
+    The limits are shared by every web process, since they are counted in the
+    database. Counting and enqueueing are not atomic, so concurrent uploads
+    can overshoot a limit by a few jobs.
+    """
+    unfinished = AnalysisJob.objects.filter(status__in=[AnalysisJob.STATUS_QUEUED, AnalysisJob.STATUS_RUNNING])
+
+    if settings.ANALYSIS_QUEUE_MAX_PENDING > 0:
+        pending = unfinished.count()
+        if pending >= settings.ANALYSIS_QUEUE_MAX_PENDING:
+            _reject_queued('queue_backlog', pending - settings.ANALYSIS_QUEUE_MAX_PENDING + 1)
+
+    if settings.ANALYSIS_QUEUE_MAX_PER_USER > 0:
+        mine = unfinished.filter(analysis__user_id=user_id).order_by('created_at')
+        oldest = list(mine.values_list('created_at', flat=True)[:settings.ANALYSIS_QUEUE_MAX_PER_USER])
+        if len(oldest) >= settings.ANALYSIS_QUEUE_MAX_PER_USER:
+            # A place frees up once the user's oldest job, and everything queued before it, is done
+            _reject_queued('queue_user_limit', unfinished.filter(created_at__lte=oldest[0]).count())
+
+def fail_abandoned_jobs(stale_before):
+    """Fail jobs whose lease expired on their last allowed attempt.
+
+    A job that keeps crashing its worker (e.g. a PDF that exhausts memory)
+    would otherwise be reclaimed forever. Returns the number of jobs failed.
+    """
+    abandoned = AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_RUNNING,
+        locked_at__lt=stale_before,
+        attempts__gte=settings.ANALYSIS_JOB_MAX_ATTEMPTS,
+    ).values_list('id', 'analysis_id', 'attempts')
+
+    failed = 0
+    for job_id, analysis_id, attempts in list(abandoned):
+        error = f"Worker stopped responding during attempt {attempts} of {settings.ANALYSIS_JOB_MAX_ATTEMPTS}"
+        with transaction.atomic():
+            # Conditional on the lease still being stale, in case another worker got here first
+            updated = AnalysisJob.objects.filter(
+                id=job_id, status=AnalysisJob.STATUS_RUNNING, locked_at__lt=stale_before,
+            ).update(status=AnalysisJob.STATUS_FAILED, locked_at=None, error=error, updated_at=timezone.now())
+            if not updated:
+                continue
+            analysis = ResumeAnalysis.objects.filter(id=analysis_id).first()
+            if analysis is not None:
+                mark_failed(analysis, error)
+        logger.error(f"Analysis job {job_id} failed: {error}")
+        failed += 1
+    return failed
+
+def claim_next_job(worker_name):
+    """Atomically claim the oldest runnable job, or return None.
+
+    Jobs left running longer than ANALYSIS_JOB_LEASE_SECONDS (e.g. by a
+    crashed worker) are treated as runnable again while they have attempts
+    left, and failed once they do not.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_LEASE_SECONDS)
+    fail_abandoned_jobs(stale_before)
+    runnable = (
+        AnalysisJob.objects
+        .filter(
+            Q(status=AnalysisJob.STATUS_QUEUED)
+            | Q(status=AnalysisJob.STATUS_RUNNING, locked_at__lt=stale_before,
+                attempts__lt=settings.ANALYSIS_JOB_MAX_ATTEMPTS)
+        )
+        .order_by('created_at')
+    )
+
+    with transaction.atomic():
+        job = runnable.select_for_update(skip_locked=True).first()
+        if job is None:
+            return None
+
+        # Conditional update so the claim is also safe on backends without
+        # SELECT ... FOR UPDATE SKIP LOCKED (e.g. SQLite)
+        claimed = AnalysisJob.objects.filter(id=job.id, status=job.status, locked_at=job.locked_at).update(
+            status=AnalysisJob.STATUS_RUNNING,
+            worker=worker_name,
+            locked_at=timezone.now(),
+            attempts=job.attempts + 1,
+        )
+        if not claimed:
+            return None
+
+    job.refresh_from_db()
+    return job
+
+def process_job(job):
+    """Run the analysis pipeline for a claimed job and record the outcome."""
+    analysis = ResumeAnalysis.objects.get(id=job.analysis_id)
+    try:
+        run_analysis(analysis, fail_on_error=False)
+    except Exception as e:
+        logger.error(f"Analysis job {job.id} failed: {e}")
+        job.error = traceback.format_exc()
+        # Retry transient failures until the attempt budget is spent; an
+        # unreadable resume fails the same way every time, so it fails at once
+        if job.attempts < settings.ANALYSIS_JOB_MAX_ATTEMPTS and not isinstance(e, ResumeParseError):
+            job.status = AnalysisJob.STATUS_QUEUED
+            analysis.status = ResumeAnalysis.STATUS_PENDING
+            analysis.stage = ''
+            analysis.feedback = "Analyzing..."
+            analysis.save(update_fields=['status', 'stage', 'feedback'])
+        else:
+            job.status = AnalysisJob.STATUS_FAILED
+            mark_failed(analysis, e)
+    else:
+        job.status = AnalysisJob.STATUS_DONE
+        job.error = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'error', 'locked_at', 'updated_at'])
+
+class WorkerPool:
+    """A fixed number of threads that drain the analysis queue."""
+
+    def __init__(self, size, poll_interval=1.0):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def _worker_loop(self, name):
+        logger.info(f"Analysis worker {name} started")
+        while not self.stop_event.is_set():
+            close_old_connections()
+            try:
+                job = claim_next_job(name)
+                if job is None:
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                logger.info(f"Worker {name} processing job {job.id} (attempt {job.attempts})")
+                process_job(job)
+            except Exception as e:
+                logger.error(f"Analysis worker {name} error: {e}")
+                self.stop_event.wait(self.poll_interval)
+        close_old_connections()
+        logger.info(f"Analysis worker {name} stopped")
+
+    def start(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.size):
+            thread = threading.Thread(target=self._worker_loop, args=(f"{prefix}:{index}",), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
@@ -0,0 +1,87 @@
+import os
+import tempfile
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.bulk_analysis import DatabaseWriter, FileWriter, ResumeSource, run_bulk_analysis
+
+class Command(BaseCommand):
+    help = (
+        "Analyse every PDF in a directory or zip/tar archive against one job description, "
+        "storing the results for a user or writing them to a CSV or JSONL file. "
+        "Rerunning after an interruption skips the resumes that were already recorded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Directory (searched recursively) or zip/tar archive of PDF resumes.")
+        job = parser.add_mutually_exclusive_group(required=True)
+        job.add_argument('--job-description', help="Job description text.")
+        job.add_argument('--job-file', help="File containing the job description.")
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', help="Store the results as analyses of this user.")
+        target.add_argument('--output', help="Write the results to this .csv or .jsonl file instead.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (defaults to the CPU count).")
+        parser.add_argument('--batch-size', type=int, default=100, help="Results written per batch (default 100).")
+        parser.add_argument('--feedback', action='store_true', help="Request LLM feedback for each resume.")
+        parser.add_argument('--feedback-concurrency', type=int, default=4,
+                            help="Concurrent LLM requests with --feedback (default 4).")
+        parser.add_argument('--restart', action='store_true', help="Overwrite --output instead of resuming it.")
+
+    def handle(self, *args, **options):
+        if options['job_file']:
+            with open(options['job_file'], encoding='utf-8') as f:
+                job_description = f.read().strip()
+        else:
+            job_description = options['job_description'].strip()
+        if not job_description:
+            raise CommandError("The job description is empty")
+
+        feedback_concurrency = max(1, options['feedback_concurrency']) if options['feedback'] else 0
+
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+            writer = DatabaseWriter(user, job_description, options['batch_size'])
+        else:
+            output_format = os.path.splitext(options['output'])[1].lower().lstrip('.')
+            if output_format not in ('csv', 'jsonl'):
+                raise CommandError("--output must end in .csv or .jsonl")
+            writer = FileWriter(options['output'], output_format, options['feedback'], restart=options['restart'])
+
+        with tempfile.TemporaryDirectory(prefix='analyze-resumes-') as work_dir:
+            try:
+                source = ResumeSource(options['source'], work_dir)
+            except (OSError, ValueError) as e:
+                writer.close()
+                raise CommandError(str(e))
+
+            self.stdout.write(f"Found {len(source.names)} resumes in {options['source']}")
+            try:
+                stats = run_bulk_analysis(
+                    source, job_description, writer,
+                    workers=max(1, options['workers']),
+                    batch_size=max(1, options['batch_size']),
+                    feedback_concurrency=feedback_concurrency,
+                    progress=self.report_progress,
+                )
+            except KeyboardInterrupt:
+                raise CommandError("Interrupted; run the same command again to continue")
+            finally:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Analysed {stats['processed']} resumes in {stats['elapsed']:.1f}s "
+            f"({stats['failed']} failed, {stats['skipped']} already done)"
+        ))
+        if options['user'] and settings.SEARCH_INDEX_ENABLED:
+            self.stdout.write("Run `python manage.py rebuild_search_index` to add them to the search index.")
+
+    def report_progress(self, stats):
+        rate = stats['processed'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        remaining = stats['total'] - stats['processed']
+        eta = f", about {remaining / rate:.0f}s left" if rate and remaining else ""
+        self.stdout.write(
+            f"{stats['processed']}/{stats['total']} analysed ({stats['failed']} failed), {rate:.1f} resumes/s{eta}"
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.blob_store import collect_garbage, recount_references
+from api.models import ResumeAnalysis
+
+class Command(BaseCommand):
+    help = "Delete stored resume blobs that no analysis refers to any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=float, default=24,
+                            help="Only delete blobs unused for at least this many hours (default 24).")
+        parser.add_argument('--recount', action='store_true',
+                            help="Recompute reference counts from the analyses before collecting.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without deleting it.")
+
+    def handle(self, *args, **options):
+        storage = ResumeAnalysis._meta.get_field('resume_file').storage
+
+        if options['recount']:
+            corrected = recount_references(storage)
+            self.stdout.write(f"Corrected reference counts of {corrected} blobs")
+
+        deleted, freed = collect_garbage(storage, options['min_age'] * 3600, dry_run=options['dry_run'])
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} blobs ({freed / (1024 * 1024):.1f} MB)"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from api.models import IndexedResume, IndexedTerm, ResumeAnalysis
+from api.resume_cache import get_resume_text
+from api.search_index import index_resume
+
+class Command(BaseCommand):
+    help = "Add completed analyses that are missing from the resume search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Clear the index and rebuild it from scratch.")
+
+    def handle(self, *args, **options):
+        if options['full']:
+            # Deleting terms cascades to their postings
+            IndexedTerm.objects.all().delete()
+            IndexedResume.objects.all().delete()
+
+        analyses = (
+            ResumeAnalysis.objects
+            .filter(status=ResumeAnalysis.STATUS_COMPLETED, index_entry__isnull=True)
+            .only('id', 'resume_file', 'content_hash')
+            .order_by('id')
+        )
+
+        indexed = skipped = 0
+        for analysis in analyses.iterator():
+            try:
+                if index_resume(analysis, get_resume_text(analysis)):
+                    indexed += 1
+            except Exception as e:
+                skipped += 1
+                self.stderr.write(f"Skipping analysis {analysis.id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} resumes ({skipped} skipped)"))
@@ -0,0 +1,47 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.models import ResumeAnalysis
+from api.resume_cache import get_resume_text
+from api.utils.tfidf_model import CorpusTfidfModel
+
+class Command(BaseCommand):
+    help = "Fit the corpus TF-IDF model on stored resumes and job descriptions, incrementally by default."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Discard the existing model and refit from scratch.")
+        parser.add_argument('--path', default=None, help="Model file to write (defaults to TFIDF_MODEL_PATH).")
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.TFIDF_MODEL_PATH
+
+        if options['full'] or not os.path.exists(path):
+            model = CorpusTfidfModel()
+        else:
+            model = CorpusTfidfModel.load(path)
+
+        analyses = (
+            ResumeAnalysis.objects
+            .filter(id__gt=model.last_analysis_id)
+            .only('id', 'resume_file', 'job_description', 'content_hash')
+            .order_by('id')
+        )
+
+        added = skipped = 0
+        for analysis in analyses.iterator():
+            model.add_job_description(analysis.job_description)
+
+            try:
+                model.add_document(get_resume_text(analysis))
+                added += 1
+            except Exception as e:
+                skipped += 1
+                self.stderr.write(f"Skipping resume of analysis {analysis.id}: {e}")
+
+            model.last_analysis_id = analysis.id
+
+        model.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"TF-IDF model saved to {path}: {model.n_docs} documents, {len(model.doc_freq)} terms "
+            f"({added} resumes added, {skipped} skipped)"
+        ))
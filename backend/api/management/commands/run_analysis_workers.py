@@ -0,0 +1,32 @@
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.jobs import WorkerPool
+from api.utils.metrics import start_metrics_export
+
+class Command(BaseCommand):
+    help = "Run a pool of local workers that process queued resume analyses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Number of worker threads (defaults to ANALYSIS_WORKERS).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        size = options['workers'] or settings.ANALYSIS_WORKERS
+        pool = WorkerPool(size, poll_interval=options['poll_interval'])
+        # Stage timings are recorded here; the web process serves them at /api/metrics/
+        start_metrics_export(settings.METRICS_DIR, settings.METRICS_EXPORT_INTERVAL)
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping analysis workers...")
+            pool.stop_event.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {size} analysis workers"))
+
+        while not pool.stop_event.wait(1.0):
+            pass
+        pool.stop()
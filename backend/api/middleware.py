@@ -0,0 +1,68 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.utils.deprecation import MiddlewareMixin
+from .utils.metrics import REQUEST_SECONDS, start_metrics_export
+
+# Session key holding when the session's expiry was last extended (epoch seconds)
+SESSION_REFRESHED_KEY = '_refreshed_at'
+
+class RequestMetricsMiddleware:
+    """Record how long each request to the api app's URLs takes, by route, method and status.
+
+    For streaming responses this is the time until the response starts.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Built once per web process: share its metrics with the other processes on the host
+        start_metrics_export(settings.METRICS_DIR, settings.METRICS_EXPORT_INTERVAL)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, start)
+        return response
+
+    def _record(self, request, response, start):
+        match = getattr(request, 'resolver_match', None)
+        # Only views defined in this app (api/urls.py); admin and media requests are skipped
+        if match is None or not getattr(match.func, '__module__', '').startswith('api.'):
+            return
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            route=match.route,
+            method=request.method,
+            status=response.status_code,
+        )
+
+class SlidingSessionMiddleware(MiddlewareMixin):
+    """Give logged-in sessions a sliding expiry without saving them on every request.
+
+    A session is re-saved, which resets its expiry to SESSION_COOKIE_AGE, when
+    the view changed it anyway or when its last refresh is more than
+    SESSION_REFRESH_INTERVAL old.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty() or session.get(SESSION_KEY) is None:
+            return response
+
+        now = int(time.time())
+        if session.modified or now - session.get(SESSION_REFRESHED_KEY, 0) >= settings.SESSION_REFRESH_INTERVAL:
+            session[SESSION_REFRESHED_KEY] = now
+        return response
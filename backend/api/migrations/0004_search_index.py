@@ -0,0 +1,42 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_parsedresume_resumeanalysis_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, unique=True)),
+                ('doc_freq', models.PositiveIntegerField(default=0)),
+                ('max_weight', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IndexedResume',
+            fields=[
+                ('analysis', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='index_entry', serialize=False, to='api.resumeanalysis')),
+                ('term_count', models.PositiveIntegerField()),
+                ('indexed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField()),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.resumeanalysis')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='api.indexedterm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', '-weight'], name='api_posting_term_id_d463dd_idx')],
+                'unique_together': {('term', 'analysis')},
+            },
+        ),
+    ]
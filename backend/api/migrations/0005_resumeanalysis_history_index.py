@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resumeanalysis',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='api_resumea_user_id_ff23bc_idx'),
+        ),
+    ]
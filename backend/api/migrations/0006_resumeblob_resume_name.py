@@ -0,0 +1,45 @@
+import os
+
+import api.models
+import api.storage
+from django.db import migrations, models
+
+
+def fill_resume_names(apps, schema_editor):
+    # Existing analyses were stored as resumes/<user_id>/<upload name>
+    ResumeAnalysis = apps.get_model('api', 'ResumeAnalysis')
+    for analysis in ResumeAnalysis.objects.filter(resume_name='').only('id', 'resume_file').iterator():
+        ResumeAnalysis.objects.filter(id=analysis.id).update(
+            resume_name=os.path.basename(analysis.resume_file.name)[:255]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_resumeanalysis_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeBlob',
+            fields=[
+                ('content_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='resume_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='resumeanalysis',
+            name='resume_file',
+            field=models.FileField(storage=api.storage.ContentAddressedStorage(), upload_to=api.models.resume_blob_path),
+        ),
+        migrations.RunPython(fill_resume_names, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,144 @@
-
 # Create your models here.
 from django.db import models
 from django.contrib.auth.models import User
 import os
+from .storage import ContentAddressedStorage, blob_name
 
 def user_resume_path(instance, filename):
     """Generate file path for user-specific resume storage."""
     return f'resumes/{instance.user.id}/{filename}'
 
+def resume_blob_path(instance, filename):
+    """Store resumes by content hash, so identical PDFs share one file."""
+    if not instance.content_hash:
+        return user_resume_path(instance, filename)
+    return blob_name(instance.content_hash)
+
 class ResumeAnalysis(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    resume_file = models.FileField(upload_to=user_resume_path)  # Stores file locally
+    resume_file = models.FileField(upload_to=resume_blob_path, storage=ContentAddressedStorage())
+    resume_name = models.CharField(max_length=255, blank=True)  # File name as uploaded
     job_description = models.TextField()
     ats_score = models.FloatField()
     job_match_score = models.FloatField()
     feedback = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    stage = models.CharField(max_length=20, blank=True)  # Pipeline stage currently running
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 of the uploaded PDF
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of a user's history, newest first
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s analysis from {self.created_at}"
+
+class ParsedResume(models.Model):
+    """Extracted resume text cached by the SHA-256 of the PDF it came from."""
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField()
+    page_count = models.PositiveIntegerField()
+    file_size = models.PositiveIntegerField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Parsed resume {self.content_hash[:12]} ({self.page_count} pages)"
+
+class ResumeBlob(models.Model):
+    """A stored resume file, shared by every analysis of the same PDF.
+
+    ref_count is the number of ResumeAnalysis rows pointing at the blob;
+    `python manage.py gc_resume_blobs` deletes blobs nothing refers to.
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Resume blob {self.content_hash[:12]} ({self.ref_count} references)"
+
+class TokenRevocation(models.Model):
+    """API tokens of a user issued at or before revoked_at are no longer accepted (api/tokens.py)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='token_revocation')
+    revoked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Tokens of {self.user_id} revoked at {self.revoked_at}"
+
+class AnalysisJob(models.Model):
+    """Database-backed queue entry for an analysis waiting to be processed."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    analysis = models.OneToOneField(ResumeAnalysis, on_delete=models.CASCADE, related_name='job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}'s analysis from {self.created_at}"
\ No newline at end of file
+        return f"Job for analysis {self.analysis_id} ({self.status})"
+
+class IndexedTerm(models.Model):
+    """A term in the resume search index."""
+    term = models.CharField(max_length=100, unique=True)
+    doc_freq = models.PositiveIntegerField(default=0)
+    max_weight = models.FloatField(default=0.0)  # Upper bound of any posting weight, used for pruning
+
+    def __str__(self):
+        return self.term
+
+class IndexedResume(models.Model):
+    """Marks an analysis whose resume text has been added to the search index."""
+    analysis = models.OneToOneField(ResumeAnalysis, on_delete=models.CASCADE, primary_key=True, related_name='index_entry')
+    term_count = models.PositiveIntegerField()
+    indexed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Index entry for analysis {self.analysis_id}"
+
+class Posting(models.Model):
+    """Occurrence of a term in an indexed resume, with its normalized weight."""
+    term = models.ForeignKey(IndexedTerm, on_delete=models.CASCADE, related_name='postings')
+    analysis = models.ForeignKey(ResumeAnalysis, on_delete=models.CASCADE, related_name='+')
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = [('term', 'analysis')]
+        indexes = [
+            models.Index(fields=['term', '-weight']),
+        ]
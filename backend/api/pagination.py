@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+class AnalysisHistoryPagination(CursorPagination):
+    """Keyset pagination over a user's analyses, newest first.
+
+    Pages are fetched with `created_at < cursor` seeks on the
+    (user, -created_at, -id) index rather than OFFSET scans.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,13 @@
+import hmac
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+class HasMetricsToken(BasePermission):
+    """Allow requests carrying `Authorization: Bearer <METRICS_TOKEN>` (for Prometheus scrapers)."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        if not token:
+            return False
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
@@ -0,0 +1,251 @@
+import logging
+from asgiref.sync import sync_to_async
+from .models import ResumeAnalysis
+from django.conf import settings
+from .resume_cache import aget_resume_text, get_resume_text
+from .search_index import index_resume
+from .utils.executors import run_in_executor
+from .utils.metrics import IN_FLIGHT, time_stage
+from .utils.resume_parser import ResumeParseError
+from .utils.nlp_analyzer import calculate_ats_score, calculate_job_match_score
+from .utils.ai_feedback import agenerate_feedback, generate_feedback
+from .utils.text_document import AnalysisDocument
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in execution order, as reported by the status endpoint
+STAGES = [
+    ('parsing', 'Parsing resume'),
+    ('ats', 'Calculating ATS score'),
+    ('job_match', 'Calculating job match score'),
+    ('feedback', 'Generating feedback'),
+]
+STAGE_NAMES = [name for name, _ in STAGES]
+
+def stage_progress(analysis):
+    """Describe how far an analysis has got through the pipeline."""
+    if analysis.status == ResumeAnalysis.STATUS_COMPLETED:
+        current = len(STAGES)
+    elif analysis.stage in STAGE_NAMES:
+        current = STAGE_NAMES.index(analysis.stage)
+    else:
+        current = 0
+
+    stages = []
+    for index, (name, label) in enumerate(STAGES):
+        if index < current:
+            state = 'done'
+        elif index == current and analysis.status == ResumeAnalysis.STATUS_PROCESSING:
+            state = 'running'
+        elif index == current and analysis.status == ResumeAnalysis.STATUS_FAILED:
+            state = 'failed'
+        else:
+            state = 'pending'
+        stages.append({'name': name, 'label': label, 'state': state})
+
+    return {
+        'progress': round(current / len(STAGES) * 100),
+        'stages': stages,
+    }
+
+def _enter_stage(analysis, stage):
+    analysis.stage = stage
+    analysis.save(update_fields=['stage'])
+
+async def _aenter_stage(analysis, stage):
+    analysis.stage = stage
+    await analysis.asave(update_fields=['stage'])
+
+def basic_feedback(ats_score, job_match_score):
+    """Plain feedback used when feedback generation itself fails."""
+    return f"""
+Based on your resume analysis:
+
+• ATS Score: {ats_score:.1f}% - {"Good" if ats_score > 70 else "Needs improvement"}
+• Job Match Score: {job_match_score:.1f}% - {"Good match" if job_match_score > 70 else "Could be improved"}
+
+General Suggestions:
+• Include more relevant keywords from the job description
+• Ensure your resume follows a clean, ATS-friendly format
+• Highlight specific achievements and quantifiable results
+• Tailor your experience section to match job requirements
+• Consider adding relevant skills mentioned in the job posting
+
+Note: AI-powered detailed feedback is temporarily unavailable.
+    """.strip()
+
+def check_resume_text(resume_text):
+    logger.info(f"Resume text extracted: {len(resume_text)} characters")
+    if not resume_text or len(resume_text.strip()) < 50:
+        raise ResumeParseError("Resume text extraction failed or text too short")
+
+def _index_resume(analysis, resume_text):
+    try:
+        index_resume(analysis, resume_text)
+    except Exception as index_error:
+        logger.warning(f"Could not add analysis {analysis.id} to the search index: {index_error}")
+
+def load_resume_text(analysis):
+    """Stage 1: get the resume text (parsing only on a cache miss) and index it."""
+    logger.info(f"Parsing resume: {analysis.resume_file.path}")
+    resume_text = get_resume_text(analysis)
+    check_resume_text(resume_text)
+
+    if settings.SEARCH_INDEX_ENABLED:
+        _index_resume(analysis, resume_text)
+
+    return resume_text
+
+async def aload_resume_text(analysis):
+    """Async version of load_resume_text()."""
+    logger.info(f"Parsing resume: {analysis.resume_file.path}")
+    resume_text = await aget_resume_text(analysis)
+    check_resume_text(resume_text)
+
+    if settings.SEARCH_INDEX_ENABLED:
+        # Indexing runs in one transaction, which the async ORM can't open
+        await sync_to_async(_index_resume)(analysis, resume_text)
+
+    return resume_text
+
+def set_completed(analysis, ats_score, job_match_score, feedback):
+    analysis.ats_score = ats_score
+    analysis.job_match_score = job_match_score
+    analysis.feedback = feedback
+    analysis.status = ResumeAnalysis.STATUS_COMPLETED
+    analysis.stage = ''
+
+def set_failed(analysis, error):
+    analysis.ats_score = 0.0
+    analysis.job_match_score = 0.0
+    analysis.feedback = f"Analysis failed: {str(error)}"
+    analysis.status = ResumeAnalysis.STATUS_FAILED
+
+def mark_completed(analysis, ats_score, job_match_score, feedback):
+    set_completed(analysis, ats_score, job_match_score, feedback)
+    with time_stage('db_update'):
+        analysis.save()
+    logger.info(f"Analysis {analysis.id} completed successfully")
+
+def mark_failed(analysis, error):
+    set_failed(analysis, error)
+    with time_stage('db_update'):
+        analysis.save()
+
+def run_analysis(analysis, fail_on_error=True):
+    """Parse, score and generate feedback for a saved analysis.
+
+    Progress is written to `analysis.stage` as each stage starts. On success
+    the analysis is stored as completed. On failure the exception is re-raised;
+    with `fail_on_error` the analysis is first stored as failed with the error
+    in `feedback`, otherwise the caller decides (the job runner may retry).
+    """
+    with IN_FLIGHT.track_in_progress(mode='sync'):
+        return _run_analysis(analysis, fail_on_error)
+
+def _run_analysis(analysis, fail_on_error):
+    analysis.status = ResumeAnalysis.STATUS_PROCESSING
+    analysis.save(update_fields=['status'])
+
+    try:
+        # Step 1: Parse resume
+        _enter_stage(analysis, 'parsing')
+        with time_stage('parsing'):
+            resume_text = load_resume_text(analysis)
+
+            # Tokenize once; every scoring and feedback stage shares these documents
+            resume_doc = AnalysisDocument(resume_text)
+            job_doc = AnalysisDocument(analysis.job_description)
+
+        # Step 2: Calculate ATS score
+        _enter_stage(analysis, 'ats')
+        logger.info("Calculating ATS score")
+        with time_stage('ats'):
+            ats_score = calculate_ats_score(resume_doc, job_doc)
+        logger.info(f"ATS score calculated: {ats_score}")
+
+        # Step 3: Calculate job match score
+        _enter_stage(analysis, 'job_match')
+        logger.info("Calculating job match score")
+        with time_stage('job_match'):
+            job_match_score = calculate_job_match_score(resume_doc, job_doc)
+        logger.info(f"Job match score calculated: {job_match_score}")
+
+        # Step 4: Generate feedback (with fallback)
+        _enter_stage(analysis, 'feedback')
+        logger.info("Generating AI feedback")
+        with time_stage('feedback'):
+            try:
+                feedback = generate_feedback(resume_doc, job_doc, ats_score, job_match_score)
+            except Exception as feedback_error:
+                logger.warning(f"AI feedback generation failed: {feedback_error}")
+                feedback = basic_feedback(ats_score, job_match_score)
+
+    except Exception as processing_error:
+        if fail_on_error:
+            mark_failed(analysis, processing_error)
+        raise
+
+    mark_completed(analysis, ats_score, job_match_score, feedback)
+    return analysis
+
+def score_documents(resume_text, job_description):
+    """Tokenize and score a resume, returning (resume_doc, job_doc, ats_score, job_match_score).
+
+    Async views run this as one executor task. With ANALYSIS_EXECUTOR=process
+    each task works on pickled copies, so tokenizing and scoring in separate
+    tasks would lose what one stage cached on the documents for the next.
+    """
+    resume_doc = AnalysisDocument(resume_text)
+    job_doc = AnalysisDocument(job_description)
+    with time_stage('ats'):
+        ats_score = calculate_ats_score(resume_doc, job_doc)
+    with time_stage('job_match'):
+        job_match_score = calculate_job_match_score(resume_doc, job_doc)
+    return resume_doc, job_doc, ats_score, job_match_score
+
+async def arun_analysis(analysis):
+    """Async version of run_analysis() for ASGI views.
+
+    Parsing and scoring run on the bounded analysis executor, feedback uses
+    the async HTTP client and database writes use the async ORM, so the
+    event loop stays free to serve other uploads while one is analyzed.
+    """
+    with IN_FLIGHT.track_in_progress(mode='async'):
+        return await _arun_analysis(analysis)
+
+async def _arun_analysis(analysis):
+    analysis.status = ResumeAnalysis.STATUS_PROCESSING
+    await analysis.asave(update_fields=['status'])
+
+    try:
+        await _aenter_stage(analysis, 'parsing')
+        with time_stage('parsing'):
+            resume_text = await aload_resume_text(analysis)
+
+        # Both scores come from one executor task, so the status endpoint skips from 'ats' to 'feedback'
+        await _aenter_stage(analysis, 'ats')
+        resume_doc, job_doc, ats_score, job_match_score = await run_in_executor(
+            score_documents, resume_text, analysis.job_description
+        )
+        logger.info(f"Scores calculated: ATS {ats_score}, job match {job_match_score}")
+
+        await _aenter_stage(analysis, 'feedback')
+        with time_stage('feedback'):
+            try:
+                feedback = await agenerate_feedback(resume_doc, job_doc, ats_score, job_match_score)
+            except Exception as feedback_error:
+                logger.warning(f"AI feedback generation failed: {feedback_error}")
+                feedback = basic_feedback(ats_score, job_match_score)
+
+    except Exception as processing_error:
+        set_failed(analysis, processing_error)
+        with time_stage('db_update'):
+            await analysis.asave()
+        raise
+
+    set_completed(analysis, ats_score, job_match_score, feedback)
+    with time_stage('db_update'):
+        await analysis.asave()
+    logger.info(f"Analysis {analysis.id} completed successfully")
+    return analysis
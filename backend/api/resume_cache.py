@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import tempfile
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from .models import ParsedResume
+from .utils.executors import run_in_executor
+from .utils.resume_parser import extract_resume
+
+logger = logging.getLogger(__name__)
+
+def hash_file(file):
+    """SHA-256 hex digest of an uploaded or stored file, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def get_cached_text(content_hash):
+    """Return cached resume text for a PDF hash, or None on a miss."""
+    entry = ParsedResume.objects.filter(content_hash=content_hash).only('text').first()
+    if entry is None:
+        return None
+
+    ParsedResume.objects.filter(content_hash=content_hash).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    return entry.text
+
+def store_parsed(content_hash, text, page_count, file_size):
+    """Cache parsed text and evict least recently used entries past the size bound."""
+    try:
+        ParsedResume.objects.create(
+            content_hash=content_hash,
+            text=text,
+            page_count=page_count,
+            file_size=file_size,
+        )
+    except IntegrityError:
+        # Another worker parsed the same PDF concurrently
+        return
+    evict()
+
+def evict(max_entries=None):
+    """Delete the least recently used entries beyond RESUME_TEXT_CACHE_MAX_ENTRIES."""
+    max_entries = settings.RESUME_TEXT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    excess = ParsedResume.objects.count() - max_entries
+    if excess <= 0:
+        return 0
+
+    stale = list(
+        ParsedResume.objects.order_by('last_used_at').values_list('content_hash', flat=True)[:excess]
+    )
+    deleted, _ = ParsedResume.objects.filter(content_hash__in=stale).delete()
+    logger.info(f"Evicted {deleted} cached resume texts")
+    return deleted
+
+def get_resume_text(analysis):
+    """Return the resume text for an analysis, parsing the PDF only on a cache miss."""
+    if not analysis.content_hash:
+        with analysis.resume_file.open('rb') as f:
+            analysis.content_hash = hash_file(f)
+        analysis.save(update_fields=['content_hash'])
+
+    text = get_cached_text(analysis.content_hash)
+    if text is not None:
+        logger.info(f"Resume text cache hit for {analysis.content_hash[:12]}")
+        return text
+
+    text, page_count = extract_resume(analysis.resume_file.path)
+    store_parsed(analysis.content_hash, text, page_count, analysis.resume_file.size)
+    return text
+
+def get_uploaded_resume_text(uploaded_file, content_hash=None):
+    """Return the text of an uploaded PDF that is not stored on a ResumeAnalysis.
+
+    On a cache miss the upload is spooled to a temporary file for the parser.
+    """
+    content_hash = content_hash or hash_file(uploaded_file)
+    text = get_cached_text(content_hash)
+    if text is not None:
+        return text
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in uploaded_file.chunks():
+                tmp.write(chunk)
+        uploaded_file.seek(0)
+        text, page_count = extract_resume(tmp_path)
+    finally:
+        os.unlink(tmp_path)
+
+    store_parsed(content_hash, text, page_count, uploaded_file.size)
+    return text
+
+async def aget_cached_text(content_hash):
+    """Async version of get_cached_text()."""
+    entry = await ParsedResume.objects.filter(content_hash=content_hash).only('text').afirst()
+    if entry is None:
+        return None
+
+    await ParsedResume.objects.filter(content_hash=content_hash).aupdate(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    return entry.text
+
+async def astore_parsed(content_hash, text, page_count, file_size):
+    """Async version of store_parsed()."""
+    try:
+        await ParsedResume.objects.acreate(
+            content_hash=content_hash,
+            text=text,
+            page_count=page_count,
+            file_size=file_size,
+        )
+    except IntegrityError:
+        return
+    await aevict()
+
+async def aevict(max_entries=None):
+    """Async version of evict()."""
+    max_entries = settings.RESUME_TEXT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    excess = await ParsedResume.objects.acount() - max_entries
+    if excess <= 0:
+        return 0
+
+    stale = [
+        content_hash async for content_hash in
+        ParsedResume.objects.order_by('last_used_at').values_list('content_hash', flat=True)[:excess]
+    ]
+    deleted, _ = await ParsedResume.objects.filter(content_hash__in=stale).adelete()
+    logger.info(f"Evicted {deleted} cached resume texts")
+    return deleted
+
+def _hash_stored_file(analysis):
+    with analysis.resume_file.open('rb') as f:
+        return hash_file(f)
+
+async def aget_resume_text(analysis):
+    """Async version of get_resume_text(); the PDF is parsed on the analysis executor."""
+    if not analysis.content_hash:
+        analysis.content_hash = await sync_to_async(_hash_stored_file)(analysis)
+        await analysis.asave(update_fields=['content_hash'])
+
+    text = await aget_cached_text(analysis.content_hash)
+    if text is not None:
+        logger.info(f"Resume text cache hit for {analysis.content_hash[:12]}")
+        return text
+
+    text, page_count = await run_in_executor(extract_resume, analysis.resume_file.path)
+    await astore_parsed(analysis.content_hash, text, page_count, analysis.resume_file.size)
+    return text
@@ -0,0 +1,159 @@
+import heapq
+import logging
+import math
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest
+from .models import IndexedResume, IndexedTerm, Posting
+from .utils.tfidf_model import document_terms
+
+logger = logging.getLogger(__name__)
+
+MAX_TERM_LENGTH = 100
+# Candidate ids are looked up in chunks of this size, keeping each IN (...) list bounded
+CANDIDATE_CHUNK_SIZE = 500
+
+def _document_weights(text):
+    """Cosine-normalized log term frequencies of a resume (SMART 'lnc')."""
+    counts = Counter(term for term in document_terms(text) if len(term) <= MAX_TERM_LENGTH)
+    weights = {term: 1 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    if not norm:
+        return {}
+    return {term: weight / norm for term, weight in weights.items()}
+
+def index_resume(analysis, text):
+    """Add an analysis's resume text to the search index.
+
+    Document weights don't depend on the rest of the corpus (IDF is applied
+    to the query side), so indexing a new resume never rewrites existing
+    postings. Re-indexing an already indexed analysis is a no-op.
+    """
+    weights = _document_weights(text)
+    if not weights:
+        return False
+
+    with transaction.atomic():
+        if IndexedResume.objects.filter(analysis_id=analysis.id).exists():
+            return False
+
+        IndexedTerm.objects.bulk_create([IndexedTerm(term=term) for term in weights], ignore_conflicts=True)
+        term_ids = dict(IndexedTerm.objects.filter(term__in=weights).values_list('term', 'id'))
+
+        Posting.objects.bulk_create([
+            Posting(term_id=term_ids[term], analysis_id=analysis.id, weight=weight)
+            for term, weight in weights.items()
+        ])
+
+        # Bump document frequencies and raise per-term weight upper bounds in one statement
+        IndexedTerm.objects.filter(id__in=term_ids.values()).update(
+            doc_freq=F('doc_freq') + 1,
+            max_weight=Greatest(
+                F('max_weight'),
+                Case(
+                    *[When(id=term_ids[term], then=Value(weight)) for term, weight in weights.items()],
+                    output_field=FloatField(),
+                ),
+            ),
+        )
+
+        IndexedResume.objects.create(analysis_id=analysis.id, term_count=len(weights))
+
+    return True
+
+def remove_resume(analysis_id):
+    """Drop an analysis from the index and decrement its terms' document frequencies."""
+    with transaction.atomic():
+        deleted, _ = IndexedResume.objects.filter(analysis_id=analysis_id).delete()
+        if not deleted:
+            return False
+        term_ids = list(Posting.objects.filter(analysis_id=analysis_id).values_list('term_id', flat=True))
+        IndexedTerm.objects.filter(id__in=term_ids, doc_freq__gt=0).update(doc_freq=F('doc_freq') - 1)
+        Posting.objects.filter(analysis_id=analysis_id).delete()
+    return True
+
+def _chunks(ids):
+    for start in range(0, len(ids), CANDIDATE_CHUNK_SIZE):
+        yield ids[start:start + CANDIDATE_CHUNK_SIZE]
+
+def _kth_best(scores, k):
+    if len(scores) < k:
+        return 0.0
+    return heapq.nlargest(k, scores.values())[-1]
+
+def search_resumes(job_description, k=10):
+    """Return the top-k indexed analyses for a job description as (analysis_id, score) pairs.
+
+    Scores are cosine similarities between 'ltc' query weights and 'lnc'
+    document weights. Query terms are processed term-at-a-time in order of
+    their maximum possible contribution (max-score pruning): once the k-th
+    best score can no longer be overtaken by a document that hasn't been seen,
+    only postings of the remaining viable candidates are fetched, and for
+    other terms only postings heavy enough to matter are read through the
+    (term, -weight) index.
+    """
+    n_docs = IndexedResume.objects.count()
+    query_counts = Counter(document_terms(job_description))
+    if not n_docs or not query_counts:
+        return []
+
+    terms = list(
+        IndexedTerm.objects
+        .filter(term__in=query_counts, doc_freq__gt=0)
+        .values('id', 'term', 'doc_freq', 'max_weight')
+    )
+
+    query_weights = {}
+    for term in terms:
+        idf = math.log(n_docs / term['doc_freq']) if term['doc_freq'] < n_docs else 0.0
+        if idf > 0:
+            query_weights[term['id']] = (1 + math.log(query_counts[term['term']])) * idf
+
+    norm = math.sqrt(sum(weight * weight for weight in query_weights.values()))
+    if not norm:
+        return []
+
+    plan = []
+    for term in terms:
+        if term['id'] in query_weights:
+            weight = query_weights[term['id']] / norm
+            plan.append((term['id'], weight, term['max_weight']))
+    plan.sort(key=lambda item: item[1] * item[2], reverse=True)
+
+    # remaining[i] is the most the terms after position i can still add to any score
+    remaining = [0.0] * len(plan)
+    for i in range(len(plan) - 2, -1, -1):
+        remaining[i] = remaining[i + 1] + plan[i + 1][1] * plan[i + 1][2]
+
+    scores = {}
+    for i, (term_id, query_weight, max_weight) in enumerate(plan):
+        postings = Posting.objects.filter(term_id=term_id)
+        lookups = [postings]
+
+        if len(scores) >= k:
+            threshold = _kth_best(scores, k)
+            bound = query_weight * max_weight + remaining[i]
+
+            # Only documents that can still reach the k-th score need this term
+            candidates = [analysis_id for analysis_id, score in scores.items() if score + bound > threshold]
+
+            # A document not seen so far needs a posting at least this heavy
+            # here, plus the best case of every later term, to get into the top k
+            min_new_weight = (threshold - remaining[i]) / query_weight
+
+            if min_new_weight >= max_weight:
+                if not candidates:
+                    break
+                lookups = [postings.filter(analysis_id__in=chunk) for chunk in _chunks(candidates)]
+            elif min_new_weight > 0:
+                # Heavy postings of any document, then the light ones of candidates, so none is counted twice
+                lookups = [postings.filter(weight__gt=min_new_weight)] + [
+                    postings.filter(weight__lte=min_new_weight, analysis_id__in=chunk) for chunk in _chunks(candidates)
+                ]
+
+        for lookup in lookups:
+            for analysis_id, weight in lookup.values_list('analysis_id', 'weight').iterator():
+                scores[analysis_id] = scores.get(analysis_id, 0.0) + query_weight * weight
+
+    return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
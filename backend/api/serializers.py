@@ -1,3 +1,4 @@
+import os
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import ResumeAnalysis
@@ -13,4 +14,16 @@ class ResumeAnalysisSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ResumeAnalysis
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ResumeAnalysisSummarySerializer(serializers.ModelSerializer):
+    """History entry without the large job description and feedback text."""
+    resume_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ResumeAnalysis
+        fields = ['id', 'status', 'ats_score', 'job_match_score', 'resume_name', 'created_at']
+
+    def get_resume_name(self, obj):
+        # Analyses stored before resume_name existed keep the upload name in their path
+        return obj.resume_name or os.path.basename(obj.resume_file.name)
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from .blob_store import release_blob, retain_blob
+from .models import ResumeAnalysis
+from .search_index import remove_resume
+from .tokens import forget_user
+from .user_cache import HISTORY_FIELDS, invalidate_history, invalidate_user
+
+# Invalidation waits for the commit, so a concurrent request can't re-cache the old rows
+
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+def analysis_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if created:
+        # Reference counts change in the same transaction as the analysis row
+        retain_blob(instance)
+    # Progress updates such as save(update_fields=['stage']) don't change a history entry
+    if update_fields is not None and not HISTORY_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: invalidate_history(instance.user_id))
+
+def analysis_deleting(sender, instance, **kwargs):
+    # Before the delete cascades to the postings, which are needed to lower document frequencies
+    remove_resume(instance.pk)
+
+def analysis_deleted(sender, instance, **kwargs):
+    release_blob(instance)
+    transaction.on_commit(lambda: invalidate_history(instance.user_id))
+
+def connect_signals():
+    post_save.connect(user_changed, sender=User, dispatch_uid='api.user_saved')
+    post_delete.connect(user_changed, sender=User, dispatch_uid='api.user_deleted')
+    post_save.connect(analysis_saved, sender=ResumeAnalysis, dispatch_uid='api.analysis_saved')
+    pre_delete.connect(analysis_deleting, sender=ResumeAnalysis, dispatch_uid='api.analysis_deleting')
+    post_delete.connect(analysis_deleted, sender=ResumeAnalysis, dispatch_uid='api.analysis_deleted')
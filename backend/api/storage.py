@@ -0,0 +1,65 @@
+import hashlib
+import os
+import re
+import tempfile
+from django.core.files.storage import FileSystemStorage
+
+# Blobs live at resumes/blobs/ab/cd/abcd....pdf: two levels of two hex digits keep
+# every directory small no matter how many resumes are stored
+BLOB_DIR = 'resumes/blobs'
+BLOB_NAME_PATTERN = re.compile(r'^resumes/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.pdf$')
+
+def blob_name(content_hash):
+    """Storage name of the blob for a SHA-256 hex digest."""
+    return f'{BLOB_DIR}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.pdf'
+
+def blob_hash(name):
+    """The content hash a storage name refers to, or None for files outside the blob store."""
+    match = BLOB_NAME_PATTERN.match(name.replace(os.sep, '/'))
+    return match.group(1) if match else None
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that writes each distinct resume once.
+
+    Names produced by blob_name() are final: saving content under a name
+    that already exists keeps the stored file instead of writing a renamed
+    copy. New blobs are written to a temporary file, checked against the
+    hash in their name, and moved into place atomically, so concurrent
+    uploads of the same PDF can't leave a partial file behind. Other names
+    (resumes stored before the blob store) behave as in FileSystemStorage.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if blob_hash(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        content_hash = blob_hash(name)
+        if content_hash is None:
+            return super()._save(name, content)
+
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Mark the blob as used again, so gc_resume_blobs treats it as recent
+            os.utime(full_path)
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pdf')
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            if digest.hexdigest() != content_hash:
+                raise ValueError(f"Content does not match blob name {name}")
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return name
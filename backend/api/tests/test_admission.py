@@ -0,0 +1,151 @@
+import threading
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from api import views
+from api.jobs import enqueue_analysis
+from api.models import AnalysisJob, ResumeAnalysis
+from api.utils.admission import AdmissionGate, AdmissionRejected
+from benchmarks.corpus import generate_corpus
+
+class AdmissionGateTests(SimpleTestCase):
+
+    def test_released_slot_is_handed_to_the_oldest_waiter(self):
+        gate = AdmissionGate(max_active=1, max_per_user=2, max_queue=2, queue_timeout=5)
+        first = gate.acquire('a')
+        admitted = []
+
+        def wait(user_id):
+            slot = gate.acquire(user_id)
+            admitted.append(user_id)
+            slot.release()
+
+        threads = [threading.Thread(target=wait, args=(user_id,)) for user_id in ('b', 'c')]
+        for thread in threads:
+            thread.start()
+            while len(gate.waiters) < threads.index(thread) + 1:
+                pass
+        # A newcomer must queue behind the waiters, and the queue is full
+        with self.assertRaises(AdmissionRejected) as rejected:
+            gate.acquire('d')
+        self.assertEqual(rejected.exception.reason, 'queue_full')
+
+        first.release()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(admitted, ['b', 'c'])
+        self.assertEqual(gate.active, 0)
+        self.assertEqual(gate.per_user, {})
+
+    def test_waiter_times_out(self):
+        gate = AdmissionGate(max_active=1, max_per_user=2, max_queue=2, queue_timeout=0.05)
+        slot = gate.acquire('a')
+        with self.assertRaises(AdmissionRejected) as rejected:
+            gate.acquire('b')
+        self.assertEqual(rejected.exception.reason, 'timeout')
+        self.assertGreaterEqual(rejected.exception.retry_after, 1)
+        self.assertFalse(gate.waiters)
+        self.assertNotIn('b', gate.per_user)
+
+        slot.release()
+        gate.acquire('b').release()
+
+    def test_per_user_limit(self):
+        gate = AdmissionGate(max_active=4, max_per_user=2, max_queue=4, queue_timeout=5)
+        slots = [gate.acquire('a'), gate.acquire('a')]
+        with self.assertRaises(AdmissionRejected) as rejected:
+            gate.acquire('a')
+        self.assertEqual(rejected.exception.reason, 'user_limit')
+        gate.acquire('b').release()
+
+        slots[0].release()
+        slots[0].release()  # Releasing twice gives back one slot only
+        self.assertEqual(gate.active, 1)
+        gate.acquire('a').release()
+
+@override_settings(ANALYSIS_ASYNC=True, ANALYSIS_QUEUE_MAX_PENDING=3, ANALYSIS_QUEUE_MAX_PER_USER=2)
+class QueuedUploadAdmissionTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3,))
+        cls.pdf = resumes[0]['pdf']
+        cls.job_description = jobs[0]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='uploader', password='pw-12345678')
+        self.client.force_authenticate(self.user)
+
+    def upload(self):
+        return self.client.post('/api/upload/', {
+            'resume': SimpleUploadedFile('resume.pdf', self.pdf, content_type='application/pdf'),
+            'job_description': self.job_description,
+        }, format='multipart')
+
+    def queue_for(self, user):
+        analysis = ResumeAnalysis.objects.create(
+            user=user,
+            resume_file=SimpleUploadedFile('resume.pdf', self.pdf),
+            resume_name='resume.pdf',
+            job_description=self.job_description,
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="Analyzing...",
+        )
+        return enqueue_analysis(analysis)
+
+    def test_per_user_limit_rejects_before_saving(self):
+        self.assertEqual(self.upload().status_code, 202)
+        self.assertEqual(self.upload().status_code, 202)
+
+        response = self.upload()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(ResumeAnalysis.objects.filter(user=self.user).count(), 2)
+
+        # A finished job frees the user's place
+        AnalysisJob.objects.filter(analysis__user=self.user).update(status=AnalysisJob.STATUS_DONE)
+        self.assertEqual(self.upload().status_code, 202)
+
+    def test_global_backlog_limit(self):
+        for index in range(3):
+            self.queue_for(User.objects.create(username=f'other-{index}'))
+        response = self.upload()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['retry_after'], int(response['Retry-After']))
+        self.assertFalse(ResumeAnalysis.objects.filter(user=self.user).exists())
+
+class BatchScoreAdmissionTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, cls.jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3, 8))
+        cls.pdf = resumes[0]['pdf']
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='scorer', password='pw-12345678')
+        self.client.force_authenticate(self.user)
+        self.gate = AdmissionGate(max_active=1, max_per_user=2, max_queue=0, queue_timeout=0.05)
+        patcher = mock.patch.object(views, 'get_admission_gate', return_value=self.gate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def score(self):
+        return self.client.post('/api/batch-score/', {
+            'resume': SimpleUploadedFile('resume.pdf', self.pdf, content_type='application/pdf'),
+            'job_descriptions': self.jobs,
+        }, format='multipart')
+
+    def test_batch_scoring_waits_for_an_analysis_slot(self):
+        slot = self.gate.acquire('someone-else')
+        response = self.score()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+        slot.release()
+        response = self.score()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], len(self.jobs))
+        self.assertEqual(self.gate.active, 0)
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from api.utils.nlp_analyzer import calculate_ats_score, calculate_job_match_score, score_resume_against_jobs
+from api.utils.tfidf_model import CorpusTfidfModel
+from benchmarks.corpus import generate_corpus
+
+class BatchScoringTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        resumes, cls.jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3, 8, 20))
+        cls.resume = resumes[0]['text']
+
+    def assertMatchesSingleScoring(self, results):
+        self.assertEqual(sorted(result['index'] for result in results), list(range(len(self.jobs))))
+        for result in results:
+            job = self.jobs[result['index']]
+            self.assertAlmostEqual(result['ats_score'], calculate_ats_score(self.resume, job))
+            self.assertAlmostEqual(result['job_match_score'], calculate_job_match_score(self.resume, job))
+            self.assertAlmostEqual(result['score'], (result['ats_score'] + result['job_match_score']) / 2)
+        scores = [result['score'] for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    @override_settings(TFIDF_MODEL_PATH='/nonexistent/tfidf.json')
+    def test_batch_scores_equal_one_by_one_scores(self):
+        self.assertMatchesSingleScoring(score_resume_against_jobs(self.resume, self.jobs))
+        self.assertEqual(score_resume_against_jobs(self.resume, []), [])
+
+    def test_batch_scores_use_the_corpus_model(self):
+        model = CorpusTfidfModel()
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=10, job_lengths=(3, 8))
+        for text in [resume['text'] for resume in resumes] + jobs:
+            model.add_job_description(text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tfidf.json')
+            model.save(path)
+            with override_settings(TFIDF_MODEL_PATH=path, TFIDF_MIN_DOCUMENTS=1):
+                self.assertMatchesSingleScoring(score_resume_against_jobs(self.resume, self.jobs))
+
+class BatchScoreViewTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, cls.jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3, 8))
+        cls.pdf = resumes[0]['pdf']
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username='batch', password='pw-12345678'))
+
+    def score(self, job_descriptions):
+        return self.client.post('/api/batch-score/', {
+            'resume': SimpleUploadedFile('resume.pdf', self.pdf, content_type='application/pdf'),
+            'job_descriptions': job_descriptions,
+        }, format='multipart')
+
+    def test_results_are_ranked_with_their_job_descriptions(self):
+        response = self.score(json.dumps(self.jobs + ['   ']))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # Blank descriptions are dropped
+        self.assertEqual(data['count'], len(self.jobs))
+        self.assertEqual([result['rank'] for result in data['results']], [1, 2])
+        for result in data['results']:
+            self.assertEqual(result['job_description'], self.jobs[result['index']][:200])
+
+    @override_settings(BATCH_MAX_JOB_DESCRIPTIONS=1)
+    def test_too_many_job_descriptions_are_rejected(self):
+        response = self.score(self.jobs)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 1', response.json()['error'])
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.blob_store import collect_garbage, recount_references
+from api.models import ResumeAnalysis, ResumeBlob
+from api.storage import blob_name
+
+DAY = 24 * 3600
+
+class ResumeBlobStoreTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = ResumeAnalysis._meta.get_field('resume_file').storage
+        self.user = User.objects.create(username='owner')
+
+    def analyse(self, content):
+        return ResumeAnalysis.objects.create(
+            user=self.user,
+            resume_file=SimpleUploadedFile('resume.pdf', content),
+            resume_name='resume.pdf',
+            job_description="Python engineer",
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="",
+            content_hash=hashlib.sha256(content).hexdigest(),
+        )
+
+    def age(self, analysis, seconds):
+        """Pretend the blob of an analysis was last touched `seconds` ago."""
+        ResumeBlob.objects.filter(content_hash=analysis.content_hash).update(
+            updated_at=timezone.now() - timedelta(seconds=seconds)
+        )
+        past = time.time() - seconds
+        os.utime(self.storage.path(analysis.resume_file.name), (past, past))
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        first = self.analyse(b'%PDF-1.4 same resume')
+        second = self.analyse(b'%PDF-1.4 same resume')
+        other = self.analyse(b'%PDF-1.4 another resume')
+
+        self.assertEqual(first.resume_file.name, second.resume_file.name)
+        self.assertNotEqual(first.resume_file.name, other.resume_file.name)
+        blob = ResumeBlob.objects.get(content_hash=first.content_hash)
+        self.assertEqual(blob.ref_count, 2)
+
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        second.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        # Released blobs stay on disk until garbage collection
+        self.assertTrue(self.storage.exists(second.resume_file.name))
+
+    def test_gc_keeps_blobs_younger_than_min_age(self):
+        analysis = self.analyse(b'%PDF-1.4 released just now')
+        name = analysis.resume_file.name
+        analysis.delete()
+
+        self.assertEqual(collect_garbage(self.storage, DAY), (0, 0))
+        self.assertTrue(self.storage.exists(name))
+
+    def test_gc_deletes_old_unreferenced_blobs_only(self):
+        kept = self.analyse(b'%PDF-1.4 still referenced')
+        released = self.analyse(b'%PDF-1.4 released long ago')
+        self.age(kept, 2 * DAY)
+        self.age(released, 2 * DAY)
+        released.delete()
+        ResumeBlob.objects.filter(ref_count=0).update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(collect_garbage(self.storage, DAY, dry_run=True)[0], 1)
+        self.assertTrue(self.storage.exists(released.resume_file.name))
+
+        deleted, freed = collect_garbage(self.storage, DAY)
+        self.assertEqual(deleted, 1)
+        self.assertEqual(freed, len(b'%PDF-1.4 released long ago'))
+        self.assertFalse(self.storage.exists(released.resume_file.name))
+        self.assertTrue(self.storage.exists(kept.resume_file.name))
+        self.assertEqual(list(ResumeBlob.objects.values_list('ref_count', flat=True)), [1])
+
+    def test_gc_keeps_a_blob_reused_since_it_was_released(self):
+        analysis = self.analyse(b'%PDF-1.4 uploaded again')
+        self.age(analysis, 2 * DAY)
+        analysis.delete()
+        ResumeBlob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        # Re-uploading touches the file and counts a new reference
+        again = self.analyse(b'%PDF-1.4 uploaded again')
+        self.assertEqual(collect_garbage(self.storage, DAY), (0, 0))
+        self.assertTrue(self.storage.exists(again.resume_file.name))
+
+    def test_gc_deletes_old_files_without_a_row(self):
+        content = b'%PDF-1.4 orphaned upload'
+        analysis = self.analyse(content)
+        self.age(analysis, 2 * DAY)
+        # The analysis was never committed, e.g. the request failed after the file was stored
+        ResumeAnalysis.objects.filter(id=analysis.id).update(resume_file='resumes/elsewhere.pdf')
+        ResumeBlob.objects.all().delete()
+
+        self.assertEqual(collect_garbage(self.storage, DAY), (1, len(content)))
+
+    def test_recount_corrects_reference_counts(self):
+        analysis = self.analyse(b'%PDF-1.4 miscounted')
+        self.analyse(b'%PDF-1.4 miscounted')
+        ResumeBlob.objects.update(ref_count=7)
+        self.assertEqual(recount_references(self.storage), 1)
+        self.assertEqual(ResumeBlob.objects.get().ref_count, 2)
+
+        ResumeBlob.objects.all().delete()
+        self.assertEqual(recount_references(self.storage), 1)
+        blob = ResumeBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, self.storage.size(blob_name(blob.content_hash)))
+        self.assertEqual(blob_name(blob.content_hash), analysis.resume_file.name)
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from django.test import SimpleTestCase
+from api import bulk_analysis
+from api.bulk_analysis import FileWriter, ResumeSource, run_bulk_analysis
+from benchmarks.corpus import generate_corpus
+
+class CrashingPool:
+    """Runs documents inline, and breaks like a process pool whose worker died on `crash.pdf`.
+
+    Documents submitted to the pool after that fail with it, as if they had been in flight.
+    """
+    started = 0
+
+    def __init__(self, **kwargs):
+        CrashingPool.started += 1
+        self.broken = False
+
+    def submit(self, fn, file_path, name, *args):
+        future = Future()
+        self.broken = self.broken or name == 'crash.pdf'
+        if self.broken:
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        else:
+            future.set_result(fn(file_path, name, *args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+class FailingWriter:
+    """Records every batch handed to it and fails on the first one."""
+    worker_feedback = None
+    store_files = False
+
+    def __init__(self):
+        self.batches = []
+
+    def done_names(self):
+        return set()
+
+    def write(self, results):
+        self.batches.append([result['name'] for result in results])
+        if len(self.batches) == 1:
+            raise OSError("Disk full")
+
+    def close(self):
+        pass
+
+@mock.patch.object(bulk_analysis, 'ProcessPoolExecutor', CrashingPool)
+class BulkAnalysisTests(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=3, job_lengths=(3,))
+        self.job_description = jobs[0]
+        for name, resume in zip(['crash.pdf', 'd.pdf', 'e.pdf'], resumes):
+            with open(os.path.join(self.dir.name, name), 'wb') as f:
+                f.write(resume['pdf'])
+        self.source = ResumeSource(self.dir.name, self.dir.name)
+        CrashingPool.started = 0
+
+    def test_crashed_worker_fails_only_the_crashing_document(self):
+        output = os.path.join(self.dir.name, 'out', 'results.jsonl')
+        stats = run_bulk_analysis(self.source, self.job_description, FileWriter(output, 'jsonl'), workers=1)
+
+        self.assertEqual(stats['processed'], 3)
+        self.assertEqual(stats['failed'], 1)
+        # The first pool, one after the crash and one after crash.pdf crashed again on its own
+        self.assertEqual(CrashingPool.started, 3)
+        with open(output, encoding='utf-8') as f:
+            statuses = {row['name']: row['status'] for row in map(json.loads, f)}
+        # d.pdf was in flight when the worker died, and succeeds when rerun alone
+        self.assertEqual(statuses, {'crash.pdf': 'failed', 'd.pdf': 'completed', 'e.pdf': 'completed'})
+
+    def test_failed_batch_is_not_written_again(self):
+        writer = FailingWriter()
+        with self.assertRaises(OSError):
+            run_bulk_analysis(self.source, self.job_description, writer, workers=1, batch_size=1)
+        self.assertEqual(len(writer.batches), 1)
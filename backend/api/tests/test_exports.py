@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from api.exports import DEFAULT_EXPORT_FIELDS
+from api.models import ResumeAnalysis
+
+class AnalysisExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='pw-12345678')
+        self.client.force_authenticate(self.user)
+        self.analyses = [
+            self.analyse(self.user, 'march.pdf', datetime(2024, 3, 31, 23, 30, tzinfo=timezone.utc)),
+            self.analyse(self.user, 'april.pdf', datetime(2024, 4, 15, 12, 0, tzinfo=timezone.utc)),
+            self.analyse(self.user, 'june.pdf', datetime(2024, 6, 30, 18, 0, tzinfo=timezone.utc)),
+        ]
+        self.analyse(User.objects.create(username='someone-else'), 'private.pdf', datetime(2024, 4, 1, tzinfo=timezone.utc))
+
+    def analyse(self, user, name, created_at):
+        analysis = ResumeAnalysis.objects.create(
+            user=user,
+            resume_file=f'resumes/blobs/{name}',
+            resume_name=name,
+            job_description="Python engineer, with Django",
+            ats_score=75.5,
+            job_match_score=60.0,
+            feedback="Add metrics\nand keywords",
+            status=ResumeAnalysis.STATUS_COMPLETED,
+        )
+        ResumeAnalysis.objects.filter(id=analysis.id).update(created_at=created_at)
+        return analysis
+
+    def export(self, **params):
+        response = self.client.get('/api/history/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_has_the_default_columns_newest_first(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['resume_name'] for row in rows], ['june.pdf', 'april.pdf', 'march.pdf'])
+        self.assertEqual(list(rows[0]), DEFAULT_EXPORT_FIELDS)
+        self.assertEqual(rows[0]['ats_score'], 75.5)
+
+    @override_settings(HISTORY_EXPORT_CHUNK_SIZE=1)
+    def test_csv_export_with_selected_fields_in_canonical_order(self):
+        response, body = self.export(output='csv', fields='feedback, id,resume_name')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="analysis-history.csv"')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['id', 'resume_name', 'feedback'])
+        self.assertEqual(rows[1], [str(self.analyses[2].id), 'june.pdf', "Add metrics\nand keywords"])
+        self.assertEqual(len(rows), 4)
+
+    def test_date_range_is_inclusive_and_a_to_date_covers_the_whole_day(self):
+        _, body = self.export(fields='resume_name', **{'from': '2024-04-01', 'to': '2024-06-30'})
+        self.assertEqual([json.loads(line)['resume_name'] for line in body.splitlines()], ['june.pdf', 'april.pdf'])
+
+        _, body = self.export(fields='resume_name', **{'from': '2024-03-31T23:30:00Z', 'to': '2024-04-15T12:00:00Z'})
+        self.assertEqual([json.loads(line)['resume_name'] for line in body.splitlines()], ['april.pdf', 'march.pdf'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'output': 'xml'}, {'fields': 'id,password'}, {'from': 'last week'}):
+            response = self.client.get('/api/history/export/', params)
+            self.assertEqual(response.status_code, 400)
+        self.assertIn('password', self.client.get('/api/history/export/', {'fields': 'id,password'}).json()['error'])
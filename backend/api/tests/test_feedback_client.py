@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import requests
+from django.test import SimpleTestCase
+from api.utils.http_client import CircuitBreaker, CircuitOpenError, FeedbackClient
+
+COMPLETION = {'choices': [{'message': {'role': 'assistant', 'content': 'Looks good.'}}]}
+
+class ScriptedProvider(BaseHTTPRequestHandler):
+    """Answers each POST with the next (status, headers, delay) from `script`."""
+    script = []
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        cls = type(self)
+        status, headers, delay = cls.script[min(cls.calls, len(cls.script) - 1)]
+        cls.calls += 1
+        if delay:
+            time.sleep(delay)
+        body = json.dumps(COMPLETION).encode()
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and went away
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+class FeedbackClientRetryTests(SimpleTestCase):
+
+    def serve(self, *script):
+        handler = type('Provider', (ScriptedProvider,), {'script': list(script), 'calls': 0})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        return handler, f'http://{host}:{port}'
+
+    def feedback_client(self, base_url, **kwargs):
+        kwargs.setdefault('backoff_base', 0.01)
+        kwargs.setdefault('backoff_max', 0.01)
+        return FeedbackClient(base_url, breaker=CircuitBreaker(min_calls=1), **kwargs)
+
+    def test_retries_service_unavailable_honouring_retry_after(self):
+        handler, url = self.serve((503, {'Retry-After': '0.3'}, 0), (200, {}, 0))
+        start = time.monotonic()
+        result = self.feedback_client(url).chat_completion({}, 'key')
+        self.assertEqual(result, COMPLETION)
+        self.assertEqual(handler.calls, 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_server_errors_are_not_retried(self):
+        handler, url = self.serve((500, {}, 0), (200, {}, 0))
+        client = self.feedback_client(url)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.chat_completion({}, 'key')
+        self.assertEqual(handler.calls, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_read_timeouts_are_not_retried(self):
+        handler, url = self.serve((200, {}, 0.5))
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.feedback_client(url, read_timeout=0.1).chat_completion({}, 'key')
+        self.assertEqual(handler.calls, 1)
+
+    def test_retry_after_beyond_deadline_fails_fast(self):
+        handler, url = self.serve((429, {'Retry-After': '30'}, 0), (200, {}, 0))
+        client = self.feedback_client(url, total_timeout=1.0)
+        start = time.monotonic()
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.chat_completion({}, 'key')
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(handler.calls, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_connection_errors_are_retried(self):
+        handler, url = self.serve((200, {}, 0))
+        client = self.feedback_client(url)
+        real_post = client.session.post
+        attempts = []
+
+        def refuse_first(*args, **kwargs):
+            attempts.append(kwargs['timeout'])
+            if len(attempts) == 1:
+                raise requests.exceptions.ConnectionError('Connection refused')
+            return real_post(*args, **kwargs)
+
+        with mock.patch.object(client.session, 'post', side_effect=refuse_first):
+            self.assertEqual(client.chat_completion({}, 'key'), COMPLETION)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(handler.calls, 1)
+
+    def test_async_retries_and_deadline(self):
+        handler, url = self.serve((503, {}, 0), (200, {}, 0))
+        self.assertEqual(asyncio.run(self.feedback_client(url).achat_completion({}, 'key')), COMPLETION)
+        self.assertEqual(handler.calls, 2)
+
+        handler, url = self.serve((200, {}, 1.0))
+        client = self.feedback_client(url, total_timeout=0.3)
+        start = time.monotonic()
+        with self.assertRaises(Exception):
+            asyncio.run(client.achat_completion({}, 'key'))
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(handler.calls, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_opens_on_failure_ratio(self):
+        breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4)
+        for outcome in (True, False, True):
+            breaker.record_success() if outcome else breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_half_open_allows_one_trial(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_released_trial_lets_the_next_call_through(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        breaker.release_trial()
+        self.assertTrue(breaker.allow_request())
+
+    def test_open_circuit_skips_the_provider(self):
+        client = FeedbackClient('http://127.0.0.1:9', breaker=CircuitBreaker(min_calls=1))
+        client.breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            client.chat_completion({}, 'key')
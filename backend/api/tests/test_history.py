@@ -0,0 +1,58 @@
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from api.models import ResumeAnalysis
+
+class AnalysisHistoryTests(APITestCase):
+
+    def setUp(self):
+        # User ids are reused between tests, so no cached history page may outlive one
+        caches[settings.USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(username='historian', password='pw-12345678')
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.analyses = []
+        for index in range(5):
+            analysis = self.analyse(self.user, f'resume-{index}.pdf')
+            ResumeAnalysis.objects.filter(id=analysis.id).update(created_at=now - timedelta(days=index))
+            self.analyses.append(analysis)
+        self.other = self.analyse(User.objects.create(username='someone-else'), 'private.pdf')
+
+    def analyse(self, user, name):
+        return ResumeAnalysis.objects.create(
+            user=user,
+            resume_file=f'resumes/blobs/{name}',
+            resume_name=name,
+            job_description="Python engineer " * 100,
+            ats_score=70.0,
+            job_match_score=60.0,
+            feedback="Long feedback " * 100,
+            status=ResumeAnalysis.STATUS_COMPLETED,
+        )
+
+    def test_history_pages_through_summaries_newest_first(self):
+        seen = []
+        url = '/api/history/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen.extend(data['results'])
+            url = data['next']
+
+        self.assertEqual([entry['id'] for entry in seen], [analysis.id for analysis in self.analyses])
+        self.assertEqual(set(seen[0]), {'id', 'status', 'ats_score', 'job_match_score', 'resume_name', 'created_at'})
+        self.assertEqual(seen[0]['resume_name'], 'resume-0.pdf')
+
+    def test_detail_returns_the_full_record_of_own_analyses_only(self):
+        analysis = self.analyses[2]
+        response = self.client.get(f'/api/analysis/{analysis.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['feedback'], analysis.feedback)
+        self.assertEqual(response.json()['job_description'], analysis.job_description)
+
+        self.assertEqual(self.client.get(f'/api/analysis/{self.other.id}/').status_code, 404)
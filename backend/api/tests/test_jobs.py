@@ -0,0 +1,111 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api import jobs
+from api.jobs import claim_next_job, enqueue_analysis, process_job
+from api.models import AnalysisJob, ResumeAnalysis
+
+@override_settings(ANALYSIS_JOB_MAX_ATTEMPTS=2, ANALYSIS_JOB_LEASE_SECONDS=60)
+class AnalysisJobQueueTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='queued')
+
+    def make_job(self):
+        analysis = ResumeAnalysis.objects.create(
+            user=self.user,
+            resume_file=SimpleUploadedFile('resume.pdf', b'%PDF-1.4 test'),
+            resume_name='resume.pdf',
+            job_description="Python engineer",
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="Analyzing...",
+        )
+        return enqueue_analysis(analysis)
+
+    def expire_lease(self, job):
+        AnalysisJob.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(seconds=120))
+
+    def test_claims_oldest_queued_job_once(self):
+        first = self.make_job()
+        self.make_job()
+
+        job = claim_next_job('worker-a')
+        self.assertEqual(job.id, first.id)
+        self.assertEqual(job.status, AnalysisJob.STATUS_RUNNING)
+        self.assertEqual(job.worker, 'worker-a')
+        self.assertEqual(job.attempts, 1)
+        self.assertNotEqual(claim_next_job('worker-b').id, first.id)
+        self.assertIsNone(claim_next_job('worker-c'))
+
+    def test_live_lease_is_not_reclaimed(self):
+        self.make_job()
+        claim_next_job('worker-a')
+        self.assertIsNone(claim_next_job('worker-b'))
+
+    def test_expired_lease_is_reclaimed(self):
+        job = self.make_job()
+        claim_next_job('worker-a')
+        self.expire_lease(job)
+
+        job = claim_next_job('worker-b')
+        self.assertEqual(job.worker, 'worker-b')
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_on_last_attempt_fails_job(self):
+        job = self.make_job()
+        for worker in ('worker-a', 'worker-b'):
+            claim_next_job(worker)
+            self.expire_lease(job)
+
+        self.assertIsNone(claim_next_job('worker-c'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIn("attempt 2 of 2", job.error)
+        analysis = ResumeAnalysis.objects.get(id=job.analysis_id)
+        self.assertEqual(analysis.status, ResumeAnalysis.STATUS_FAILED)
+        self.assertTrue(analysis.feedback.startswith("Analysis failed"))
+
+    def test_failed_run_is_retried_until_attempts_are_spent(self):
+        job = self.make_job()
+        with mock.patch.object(jobs, 'run_analysis', side_effect=RuntimeError("parser crashed")):
+            process_job(claim_next_job('worker-a'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, AnalysisJob.STATUS_QUEUED)
+            self.assertIsNone(job.locked_at)
+            # A retried analysis never shows as failed in between
+            analysis = ResumeAnalysis.objects.get(id=job.analysis_id)
+            self.assertEqual(analysis.status, ResumeAnalysis.STATUS_PENDING)
+            self.assertEqual(analysis.feedback, "Analyzing...")
+
+            process_job(claim_next_job('worker-a'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+            self.assertIn("parser crashed", job.error)
+        self.assertIsNone(claim_next_job('worker-a'))
+        analysis = ResumeAnalysis.objects.get(id=job.analysis_id)
+        self.assertEqual(analysis.status, ResumeAnalysis.STATUS_FAILED)
+        self.assertEqual(analysis.feedback, "Analysis failed: parser crashed")
+
+    def test_unreadable_resume_fails_without_retry(self):
+        job = self.make_job()
+        # The test upload is not a real PDF, so the actual parser rejects it
+        process_job(claim_next_job('worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ResumeParseError", job.error)
+        analysis = ResumeAnalysis.objects.get(id=job.analysis_id)
+        self.assertEqual(analysis.status, ResumeAnalysis.STATUS_FAILED)
+        self.assertTrue(analysis.feedback.startswith("Analysis failed: Error parsing resume"))
+
+    def test_successful_run_marks_job_done(self):
+        job = self.make_job()
+        with mock.patch.object(jobs, 'run_analysis'):
+            process_job(claim_next_job('worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_DONE)
+        self.assertEqual(job.error, '')
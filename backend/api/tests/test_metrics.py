@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from api.utils import ai_feedback, metrics
+from api.utils.pdf_engines import EngineStats
+
+class SharedMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.registry = [
+            metrics.Counter('test_fallbacks_total', 'Fallbacks.', ['reason']),
+            metrics.Gauge('test_in_flight', 'In flight.', ['mode']),
+            metrics.Histogram('test_stage_seconds', 'Stage time.', ['stage'], buckets=(0.1, 1.0)),
+        ]
+        for patcher in (
+            mock.patch.object(metrics, '_registry', self.registry),
+            mock.patch.object(metrics, '_export_dir', self.directory),
+            mock.patch.object(metrics, '_shared', (0.0, [])),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, pid, values, sources=None):
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as f:
+            json.dump({'pid': pid, 'metrics': values, 'sources': sources or {}}, f)
+
+    def test_live_processes_are_summed(self):
+        counter, gauge, histogram = self.registry
+        counter.inc(reason='no_api_key')
+        gauge.inc(mode='request')
+        histogram.observe(0.05, stage='parsing')
+        # The parent of the test runner stands in for an analysis worker
+        self.write(os.getppid(), {
+            'test_fallbacks_total': [[['no_api_key'], 2]],
+            'test_in_flight': [[['worker'], 3]],
+            'test_stage_seconds': [[['parsing'], [[0, 1, 1], 2.5]]],
+        })
+
+        output = metrics.render_metrics()
+        self.assertIn('test_fallbacks_total{reason="no_api_key"} 3.0', output)
+        self.assertIn('test_in_flight{mode="request"} 1.0', output)
+        self.assertIn('test_in_flight{mode="worker"} 3.0', output)
+        self.assertIn('test_stage_seconds_bucket{stage="parsing",le="0.1"} 1', output)
+        self.assertIn('test_stage_seconds_bucket{stage="parsing",le="1.0"} 2', output)
+        self.assertIn('test_stage_seconds_count{stage="parsing"} 3', output)
+
+    def test_snapshots_of_exited_processes_are_dropped(self):
+        dead_pid = 2 ** 22 + 1  # Above the default pid_max
+        self.write(dead_pid, {'test_in_flight': [[['worker'], 3]]})
+        output = metrics.render_metrics()
+        self.assertNotIn('worker', output)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f'{dead_pid}.json')))
+
+    def test_written_snapshot_round_trips(self):
+        counter = self.registry[0]
+        counter.inc(5, reason='circuit_open')
+        metrics.write_snapshot()
+        with open(os.path.join(self.directory, f'{os.getpid()}.json')) as f:
+            snapshot = json.load(f)
+        values = {}
+        counter.merge(values, snapshot['metrics']['test_fallbacks_total'])
+        self.assertEqual(values, {('circuit_open',): 5})
+
+    @override_settings(PDF_ENGINE_MIN_SAMPLES=20)
+    def test_engine_stats_include_other_processes(self):
+        stats = EngineStats()
+        stats.record_extraction('pypdf', 5, 0.5, 5000)
+        self.assertIsNone(stats.seconds_per_page('pypdf'))
+
+        self.write(os.getppid(), {}, {'pdf_engines': {
+            'pypdf': {'documents': 3, 'pages': 15, 'seconds': 1.0, 'chars': 15000, 'probes': 3, 'rejections': 0},
+            'pypdfium2': {'documents': 1, 'pages': 20, 'seconds': 0.2, 'chars': 20000, 'probes': 1, 'rejections': 0},
+        }})
+        metrics._shared = (0.0, [])  # Snapshots are otherwise re-read once per export interval
+        self.assertAlmostEqual(stats.seconds_per_page('pypdf'), 1.5 / 20)
+        self.assertAlmostEqual(stats.seconds_per_page('pypdfium2'), 0.01)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['pypdf']['documents'], 4)
+        self.assertEqual(stats.local_totals()['pypdf']['pages'], 5)
+
+    def test_feedback_cache_stats_include_other_processes(self):
+        with mock.patch.object(ai_feedback, '_cache_stats', {'hits': 1, 'misses': 0}):
+            self.write(os.getppid(), {}, {'feedback_cache': {'hits': 2, 'misses': 1}})
+            stats = ai_feedback.get_feedback_cache_stats()
+        self.assertEqual(stats, {'hits': 3, 'misses': 1, 'hit_rate': 0.75})
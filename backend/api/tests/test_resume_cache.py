@@ -0,0 +1,75 @@
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api import resume_cache
+from api.models import ParsedResume, ResumeAnalysis
+from api.resume_cache import get_cached_text, get_resume_text, get_uploaded_resume_text, store_parsed
+from benchmarks.corpus import generate_corpus
+
+class ResumeTextCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3,))
+        cls.pdf = resumes[0]['pdf']
+        cls.job_description = jobs[0]
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(username='reuploader')
+        patcher = mock.patch.object(resume_cache, 'extract_resume', wraps=resume_cache.extract_resume)
+        self.extract_resume = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def analyse(self, job_description):
+        return ResumeAnalysis.objects.create(
+            user=self.user,
+            resume_file=SimpleUploadedFile('resume.pdf', self.pdf),
+            resume_name='resume.pdf',
+            job_description=job_description,
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="Analyzing...",
+        )
+
+    def test_identical_pdf_is_parsed_once(self):
+        first = get_resume_text(self.analyse(self.job_description))
+        second = get_resume_text(self.analyse("A different job description"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.extract_resume.call_count, 1)
+        entry = ParsedResume.objects.get(content_hash=hashlib.sha256(self.pdf).hexdigest())
+        self.assertEqual(entry.page_count, 1)
+        self.assertEqual(entry.file_size, len(self.pdf))
+        self.assertEqual(entry.hit_count, 1)
+
+    def test_uploads_share_the_cache_with_stored_analyses(self):
+        get_resume_text(self.analyse(self.job_description))
+        upload = SimpleUploadedFile('resume.pdf', self.pdf)
+        self.assertEqual(get_uploaded_resume_text(upload), ParsedResume.objects.get().text)
+        self.assertEqual(self.extract_resume.call_count, 1)
+
+    @override_settings(RESUME_TEXT_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        for index, content_hash in enumerate(('old', 'used', 'idle')):
+            store_parsed(content_hash, "text", 1, 100)
+            ParsedResume.objects.filter(content_hash=content_hash).update(
+                last_used_at=timezone.now() - timedelta(hours=3 - index)
+            )
+        self.assertEqual(ParsedResume.objects.count(), 2)
+        # A hit moves the entry to the back of the eviction order
+        self.assertEqual(get_cached_text('used'), "text")
+
+        store_parsed('new', "text", 1, 100)
+        self.assertEqual(set(ParsedResume.objects.values_list('content_hash', flat=True)), {'used', 'new'})
+        self.assertIsNone(get_cached_text('idle'))
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from api.utils import resume_parser
+from api.utils.resume_parser import extract_resume
+from benchmarks.corpus import generate_corpus
+
+class BrokenPool:
+    def submit(self, *args):
+        raise RuntimeError("A process in the process pool was terminated abruptly")
+
+@override_settings(PDF_PARALLEL_PAGE_THRESHOLD=10, RESUME_MAX_PAGES=0, RESUME_MAX_CHARS=0)
+class ParallelExtractionTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        resumes, _ = generate_corpus(page_counts=(12,), per_size=1, job_lengths=(3,))
+        fd, cls.path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(resumes[0]['pdf'])
+        with override_settings(PDF_PARSE_WORKERS=1):
+            cls.sequential = extract_resume(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.path)
+        super().tearDownClass()
+
+    def extract_with_pool(self, pool):
+        with mock.patch.object(resume_parser, '_get_pool', return_value=pool), \
+                mock.patch.object(resume_parser, '_extract_page_range', wraps=resume_parser._extract_page_range) as ranges:
+            return extract_resume(self.path), [call.args[1:3] for call in ranges.call_args_list]
+
+    @override_settings(PDF_PARSE_WORKERS=3)
+    def test_page_ranges_are_joined_in_page_order(self):
+        # Threads stand in for the worker processes; the ranges and their order are the same
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            result, ranges = self.extract_with_pool(pool)
+        self.assertEqual(ranges, [(1, 4), (5, 8), (9, 12)])
+        self.assertEqual(result, self.sequential)
+        self.assertEqual(result[1], 12)
+
+    @override_settings(PDF_PARSE_WORKERS=3)
+    def test_pool_failure_falls_back_to_sequential_extraction(self):
+        with mock.patch.object(resume_parser, '_reset_pool') as reset_pool:
+            result, ranges = self.extract_with_pool(BrokenPool())
+        self.assertEqual(result, self.sequential)
+        self.assertEqual(ranges, [])
+        reset_pool.assert_called_once()
+
+    @override_settings(PDF_PARSE_WORKERS=3, PDF_PARALLEL_PAGE_THRESHOLD=20)
+    def test_short_documents_are_extracted_sequentially(self):
+        with mock.patch.object(resume_parser, '_get_pool') as get_pool:
+            self.assertEqual(extract_resume(self.path), self.sequential)
+        get_pool.assert_not_called()
@@ -0,0 +1,77 @@
+import heapq
+import math
+from collections import Counter
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from api import search_index
+from api.models import IndexedResume, IndexedTerm, ResumeAnalysis
+from api.search_index import _document_weights, index_resume, search_resumes
+from api.utils.tfidf_model import document_terms
+from benchmarks.corpus import generate_corpus
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, cls.jobs = generate_corpus(page_counts=(1, 2), per_size=30, job_lengths=(3, 8, 20))
+        user = User.objects.create(username='recruiter')
+        cls.texts = {}
+        for resume in resumes:
+            analysis = ResumeAnalysis.objects.create(
+                user=user,
+                resume_file='resumes/none.pdf',
+                resume_name=resume['name'],
+                job_description=cls.jobs[0],
+                ats_score=0.0,
+                job_match_score=0.0,
+                feedback="",
+                status=ResumeAnalysis.STATUS_COMPLETED,
+            )
+            index_resume(analysis, resume['text'])
+            cls.texts[analysis.id] = resume['text']
+
+    def brute_force(self, job_description, k):
+        doc_weights = {analysis_id: _document_weights(text) for analysis_id, text in self.texts.items()}
+        doc_freq = Counter(term for weights in doc_weights.values() for term in weights)
+        n_docs = len(doc_weights)
+        query = {}
+        for term, count in Counter(document_terms(job_description)).items():
+            if doc_freq[term] and doc_freq[term] < n_docs:
+                query[term] = (1 + math.log(count)) * math.log(n_docs / doc_freq[term])
+        norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        scores = {
+            analysis_id: sum(query[term] / norm * weights.get(term, 0.0) for term in query)
+            for analysis_id, weights in doc_weights.items()
+        }
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def assertSameTopK(self, found, expected):
+        self.assertEqual(len(found), len(expected))
+        # Compare scores rather than ids, so ties may come back in either order
+        for (_, found_score), (_, expected_score) in zip(found, expected):
+            self.assertAlmostEqual(found_score, expected_score)
+
+    def test_pruned_top_k_equals_brute_force(self):
+        for job_description in self.jobs:
+            for k in (1, 5, 20):
+                self.assertSameTopK(search_resumes(job_description, k), self.brute_force(job_description, k))
+
+    @mock.patch.object(search_index, 'CANDIDATE_CHUNK_SIZE', 2)
+    def test_chunked_candidate_lookups_give_the_same_result(self):
+        for job_description in self.jobs:
+            self.assertSameTopK(search_resumes(job_description, 10), self.brute_force(job_description, 10))
+
+    def test_deleting_an_analysis_removes_it_from_the_index(self):
+        analysis_id, text = next(iter(self.texts.items()))
+        terms = set(_document_weights(text))
+        before = dict(IndexedTerm.objects.filter(term__in=terms).values_list('term', 'doc_freq'))
+
+        ResumeAnalysis.objects.filter(id=analysis_id).delete()
+
+        self.assertFalse(IndexedResume.objects.filter(analysis_id=analysis_id).exists())
+        after = dict(IndexedTerm.objects.filter(term__in=terms).values_list('term', 'doc_freq'))
+        self.assertEqual(after, {term: count - 1 for term, count in before.items()})
+        del self.texts[analysis_id]
+        job_description = self.jobs[-1]
+        self.assertSameTopK(search_resumes(job_description, 10), self.brute_force(job_description, 10))
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from django.test import SimpleTestCase, override_settings
+from api.utils.nlp_analyzer import skill_coverage
+from api.utils.skill_matcher import SkillTaxonomy, get_skill_taxonomy
+
+class SkillTaxonomyTests(SimpleTestCase):
+
+    def setUp(self):
+        self.taxonomy = get_skill_taxonomy()
+
+    def test_skills_match_whole_words_only(self):
+        found = self.taxonomy.find_skills("Built digital dashboards in JavaScript")
+        self.assertEqual(found, ('JavaScript',))
+        self.assertNotIn('Java', found)
+        self.assertNotIn('Git', found)
+
+    def test_synonyms_and_phrases_give_canonical_names(self):
+        found = self.taxonomy.find_skills("Deployed ML models with k8s on Amazon Web\nServices and postgres")
+        self.assertEqual(found, ('Machine Learning', 'Kubernetes', 'AWS', 'PostgreSQL'))
+        # "Go" is only matched through its alias, as the word is too common
+        self.assertEqual(self.taxonomy.find_skills("Go ahead and write golang"), ('Go',))
+
+    def test_skill_coverage_counts_job_skills_found_in_the_resume(self):
+        job = "We need Python, Kubernetes and PostgreSQL."
+        self.assertEqual(skill_coverage("Python developer running postgres on k8s", job), 100.0)
+        self.assertAlmostEqual(skill_coverage("Python developer", job), 100 / 3)
+        self.assertIsNone(skill_coverage("Python developer", "A friendly team"))
+
+    def test_taxonomy_is_reloaded_when_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'skills.json')
+            with open(path, 'w') as f:
+                json.dump({'skills': [{'name': 'Rust'}], 'action_verbs': ['shipped']}, f)
+            with override_settings(SKILL_TAXONOMY_PATH=path):
+                taxonomy = get_skill_taxonomy()
+                self.assertEqual(taxonomy.find_skills("Rust and Python"), ('Rust',))
+                self.assertEqual(taxonomy.find_action_verbs("Shipped a release"), ('shipped',))
+
+                with open(path, 'w') as f:
+                    json.dump({'skills': [{'name': 'Elixir'}]}, f)
+                os.utime(path, (0, 0))
+                self.assertEqual(get_skill_taxonomy().find_skills("Rust and Elixir"), ('Elixir',))
+
+            # An unreadable file degrades to an empty taxonomy
+            with override_settings(SKILL_TAXONOMY_PATH=os.path.join(directory, 'missing.json')):
+                self.assertEqual(len(get_skill_taxonomy()), 0)
+
+    def test_longest_overlapping_skill_wins(self):
+        taxonomy = SkillTaxonomy([{'name': 'Learning'}, {'name': 'Machine Learning'}, {'name': 'Deep Learning'}])
+        self.assertEqual(taxonomy.find_skills("machine learning and deep learning"), ('Machine Learning', 'Deep Learning'))
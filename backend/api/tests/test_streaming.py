@@ -0,0 +1,58 @@
+import os
+from unittest import mock
+import httpx
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from api.async_views import _analysis_events
+from api.models import ResumeAnalysis
+from api.utils import ai_feedback
+from api.utils.admission import Slot
+from api.utils.ai_feedback import ReplacedFeedback, build_feedback_request, get_cached_feedback, stream_feedback
+from benchmarks.corpus import generate_corpus
+
+RESUME = "Python developer with Django and PostgreSQL experience. Led a team of five engineers."
+JOB = "We are hiring a Python engineer who knows Django, PostgreSQL and AWS."
+
+class FailingProvider:
+    """Streams two deltas, then drops the connection."""
+
+    async def stream_chat_completion(self, payload, api_key):
+        yield "Your resume "
+        yield "is strong in"
+        raise httpx.ReadError("Connection reset")
+
+@mock.patch.dict(os.environ, {'OPENROUTER_API_KEY': 'test-key'})
+@mock.patch.object(ai_feedback, 'get_feedback_client', FailingProvider)
+class MidStreamFailureTests(TestCase):
+
+    async def test_truncated_feedback_is_replaced_and_not_cached(self):
+        chunks = [chunk async for chunk in stream_feedback(RESUME, JOB, 80.0, 60.0)]
+        self.assertEqual(chunks[:2], ["Your resume ", "is strong in"])
+        self.assertIsInstance(chunks[-1], ReplacedFeedback)
+        self.assertIn("Quantify Achievements", chunks[-1])
+        self.assertIsNone(get_cached_feedback(build_feedback_request(RESUME, JOB, 80.0, 60.0)))
+
+    async def test_stream_saves_fallback_instead_of_truncated_text(self):
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3,))
+        user = await User.objects.acreate(username='streamer')
+        analysis = await ResumeAnalysis.objects.acreate(
+            user=user,
+            resume_file=SimpleUploadedFile('resume.pdf', resumes[0]['pdf']),
+            resume_name='resume.pdf',
+            job_description=jobs[0],
+            ats_score=0.0,
+            job_match_score=0.0,
+            feedback="Analyzing...",
+            status=ResumeAnalysis.STATUS_PROCESSING,
+        )
+
+        events = [event async for event in _analysis_events(analysis, Slot(None, user.id))]
+        names = [event.split('\n', 1)[0] for event in events]
+        self.assertIn('event: replace', names)
+        self.assertEqual(names[-1], 'event: done')
+
+        await analysis.arefresh_from_db()
+        self.assertEqual(analysis.status, ResumeAnalysis.STATUS_COMPLETED)
+        self.assertNotIn("is strong in", analysis.feedback)
+        self.assertIn("Quantify Achievements", analysis.feedback)
@@ -0,0 +1,26 @@
+from unittest import mock
+from django.test import SimpleTestCase
+from api.utils.tfidf_model import CorpusTfidfModel
+
+class CorpusTfidfModelTests(SimpleTestCase):
+
+    def test_repeated_job_description_is_counted_once(self):
+        model = CorpusTfidfModel()
+        self.assertTrue(model.add_job_description("Python engineer with Django"))
+        self.assertFalse(model.add_job_description("Python engineer with Django"))
+        self.assertEqual(model.n_docs, 1)
+        self.assertEqual(model.doc_freq['python'], 1)
+
+    @mock.patch.object(CorpusTfidfModel, 'MAX_JOB_HASHES', 2)
+    def test_job_hashes_are_bounded_and_survive_a_round_trip(self):
+        model = CorpusTfidfModel()
+        for text in ("first job", "second job", "third job"):
+            model.add_job_description(text)
+        model.add_job_description("second job")
+        self.assertEqual(len(model.job_hashes), 2)
+
+        restored = CorpusTfidfModel.from_dict(model.to_dict())
+        self.assertEqual(list(restored.job_hashes), list(model.job_hashes))
+        # The least recently seen description was forgotten and counts again
+        self.assertTrue(restored.add_job_description("first job"))
+        self.assertFalse(restored.add_job_description("second job"))
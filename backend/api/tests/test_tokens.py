@@ -0,0 +1,165 @@
+import time
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import caches
+from django.test import Client, override_settings
+from rest_framework.test import APIClient, APITestCase
+from api import tokens
+from api.models import TokenRevocation
+from api.tokens import ACCESS, REFRESH, InvalidToken, issue_tokens, read_token, revoke_tokens
+
+PASSWORD = 'pw-secret-123'
+
+class SignedTokenTests(APITestCase):
+
+    def setUp(self):
+        # User ids are reused between tests, so no cached user record may outlive one
+        patcher = mock.patch.object(tokens, '_records', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches[settings.USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user('tok', 'tok@example.com', PASSWORD)
+
+    def login(self):
+        response = APIClient().post('/api/login/', {'username': 'tok', 'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['tokens']
+
+    def get_profile(self, token):
+        return APIClient().get('/api/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def refresh(self, token, **extra):
+        return APIClient().post('/api/token/refresh/', {'refresh': token}, format='json', **extra)
+
+    def test_login_issues_working_tokens(self):
+        issued = self.login()
+        self.assertEqual(issued['token_type'], 'Bearer')
+        response = self.get_profile(issued['access'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'tok')
+
+    def test_kinds_are_signed_with_different_salts(self):
+        issued = issue_tokens(self.user)
+        self.assertEqual(read_token(issued['access'], ACCESS)['uid'], self.user.pk)
+        with self.assertRaises(InvalidToken):
+            read_token(issued['access'], REFRESH)
+        with self.assertRaises(InvalidToken):
+            read_token(issued['refresh'], ACCESS)
+
+        self.assertEqual(self.get_profile(issued['refresh']).status_code, 401)
+        self.assertEqual(self.refresh(issued['access']).status_code, 401)
+
+    def test_tampered_token_is_rejected(self):
+        access = issue_tokens(self.user)['access']
+        payload = signing.loads(access, salt='api.tokens.access')
+        forged = signing.dumps({**payload, 'uid': payload['uid'] + 1}, salt='api.tokens.access', key='not-the-secret')
+        response = self.get_profile(forged)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+    @override_settings(ACCESS_TOKEN_TTL=900, REFRESH_TOKEN_TTL=3600)
+    def test_expired_access_token_is_refreshed(self):
+        issued = self.login()
+        later = mock.Mock(time=mock.Mock(return_value=time.time() + 901))
+        with mock.patch.object(signing, 'time', later):
+            response = self.get_profile(issued['access'])
+            self.assertEqual(response.status_code, 401)
+            self.assertIn("expired", response.json()['detail'])
+
+            refreshed = self.refresh(issued['refresh'])
+            self.assertEqual(refreshed.status_code, 200)
+
+        self.assertEqual(self.get_profile(refreshed.json()['access']).status_code, 200)
+
+        much_later = mock.Mock(time=mock.Mock(return_value=time.time() + 3601))
+        with mock.patch.object(signing, 'time', much_later):
+            self.assertEqual(self.refresh(issued['refresh']).status_code, 401)
+
+    def test_revocation_covers_tokens_issued_until_then(self):
+        issued = self.login()
+        self.assertEqual(self.get_profile(issued['access']).status_code, 200)
+
+        revoke_tokens(self.user)
+        revoked_at = TokenRevocation.objects.get(user=self.user).revoked_at.timestamp()
+        self.assertLessEqual(read_token(issued['access'], ACCESS)['iat'], revoked_at)
+        self.assertEqual(self.get_profile(issued['access']).status_code, 401)
+        self.assertEqual(self.refresh(issued['refresh']).status_code, 401)
+
+        time.sleep(0.001)
+        fresh = self.login()
+        self.assertGreater(read_token(fresh['access'], ACCESS)['iat'], revoked_at)
+        self.assertEqual(self.get_profile(fresh['access']).status_code, 200)
+
+    def test_password_change_invalidates_tokens(self):
+        issued = self.login()
+        self.assertEqual(self.get_profile(issued['access']).status_code, 200)  # Now cached in this process
+
+        # The shared user cache is cleared when the save commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('another-pw-456')
+            self.user.save()
+
+        self.assertEqual(self.get_profile(issued['access']).status_code, 401)
+        self.assertEqual(self.refresh(issued['refresh']).status_code, 401)
+
+    def test_logout_with_token_revokes_all_tokens(self):
+        first = self.login()
+        second = self.login()
+        response = APIClient().post('/api/logout/', HTTP_AUTHORIZATION=f"Bearer {first['access']}")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(TokenRevocation.objects.filter(user=self.user).exists())
+        for issued in (first, second):
+            self.assertEqual(self.get_profile(issued['access']).status_code, 401)
+            self.assertEqual(self.refresh(issued['refresh']).status_code, 401)
+
+    def test_session_logout_does_not_revoke_tokens(self):
+        issued = self.login()
+        client = APIClient()
+        client.login(username='tok', password=PASSWORD)
+        self.assertEqual(client.post('/api/logout/').status_code, 200)
+
+        self.assertFalse(TokenRevocation.objects.filter(user=self.user).exists())
+        self.assertEqual(self.get_profile(issued['access']).status_code, 200)
+
+    def test_login_and_refresh_ignore_a_stale_bearer_header(self):
+        stale = {'HTTP_AUTHORIZATION': 'Bearer expired-or-garbage'}
+        response = APIClient().post('/api/login/', {'username': 'tok', 'password': PASSWORD}, format='json', **stale)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.json()['tokens']['refresh'], **stale).status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_bearer_is_not_read_as_an_api_token(self):
+        response = APIClient().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        # An API token is no credential for the metrics endpoint
+        access = issue_tokens(self.user)['access']
+        self.assertEqual(APIClient().get('/api/metrics/', HTTP_AUTHORIZATION=f'Bearer {access}').status_code, 403)
+
+    @override_settings(API_TOKENS_ENABLED=False)
+    def test_tokens_can_be_disabled(self):
+        access = issue_tokens(self.user)['access']
+        self.assertEqual(self.get_profile(access).status_code, 401)
+        response = APIClient().post('/api/login/', {'username': 'tok', 'password': PASSWORD}, format='json')
+        self.assertNotIn('tokens', response.json())
+
+    def test_async_upload_accepts_bearer_tokens(self):
+        access = issue_tokens(self.user)['access']
+        # CSRF checks apply to session users only, so a token client needs no CSRF cookie
+        client = Client(enforce_csrf_checks=True)
+        response = client.post('/api/upload/async/', {}, HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Resume file is required')
+
+        response = client.post('/api/upload/stream/', {}, HTTP_AUTHORIZATION='Bearer expired-or-garbage')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+    def test_async_upload_checks_csrf_for_session_users(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='tok', password=PASSWORD)
+        response = client.post('/api/upload/async/', {})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['error'])
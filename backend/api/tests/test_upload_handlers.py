@@ -0,0 +1,57 @@
+import hashlib
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from api.models import ResumeAnalysis, ResumeBlob
+from api.upload_handlers import format_size
+from benchmarks.corpus import generate_corpus
+
+@override_settings(ANALYSIS_ASYNC=True)
+class ResumeUploadHandlerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        resumes, jobs = generate_corpus(page_counts=(1,), per_size=1, job_lengths=(3,))
+        cls.pdf = resumes[0]['pdf']
+        cls.job_description = jobs[0]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='uploader', password='pw-12345678')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name='resume.pdf'):
+        return self.client.post('/api/upload/', {
+            'resume': SimpleUploadedFile(name, content, content_type='application/pdf'),
+            'job_description': self.job_description,
+        }, format='multipart')
+
+    def assertRejected(self, response, status_code, message):
+        self.assertEqual(response.status_code, status_code)
+        self.assertIn(message, response.json()['error'])
+        self.assertFalse(ResumeAnalysis.objects.exists())
+        self.assertFalse(ResumeBlob.objects.exists())
+
+    def test_accepted_upload_is_hashed_while_streaming(self):
+        response = self.upload(self.pdf)
+        self.assertEqual(response.status_code, 202)
+        analysis = ResumeAnalysis.objects.get(id=response.json()['id'])
+        self.assertEqual(analysis.content_hash, hashlib.sha256(self.pdf).hexdigest())
+
+    @override_settings(RESUME_MAX_UPLOAD_SIZE=1024)
+    def test_oversized_upload_is_stopped(self):
+        self.assertRejected(self.upload(self.pdf + b'\0' * 2048), 413, 'File too large (max 1KB)')
+
+    def test_size_limits_are_readable_below_one_megabyte(self):
+        self.assertEqual(format_size(10 * 1024 * 1024), '10MB')
+        self.assertEqual(format_size(int(2.5 * 1024 * 1024)), '2.5MB')
+        self.assertEqual(format_size(512 * 1024), '512KB')
+
+    def test_non_pdf_content_is_stopped(self):
+        self.assertRejected(self.upload(b'MZ\x90\x00' + b'\0' * 2048), 400, 'not a valid PDF')
+
+    def test_non_pdf_name_is_stopped(self):
+        self.assertRejected(self.upload(self.pdf, name='resume.docx'), 400, 'Only PDF files')
+
+    def test_empty_upload_is_stopped(self):
+        self.assertRejected(self.upload(b''), 400, 'empty')
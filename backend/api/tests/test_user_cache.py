@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+from api import middleware
+from api.models import ResumeAnalysis
+
+PASSWORD = 'pw-12345678'
+
+class CachedUserReadTests(APITestCase):
+
+    def setUp(self):
+        # User ids are reused between tests, so no cached user or history page may outlive one
+        caches[settings.USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user('cached', 'old@example.com', PASSWORD)
+        self.client.login(username='cached', password=PASSWORD)
+
+    def analyse(self):
+        return ResumeAnalysis.objects.create(
+            user=self.user,
+            resume_file='resumes/blobs/resume.pdf',
+            resume_name='resume.pdf',
+            job_description="Python engineer",
+            ats_score=50.0,
+            job_match_score=50.0,
+            feedback="",
+        )
+
+    def test_session_user_is_read_from_the_cache_until_the_profile_changes(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/profile/').json()['user']['email'], 'old@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/profile/', {'email': 'new@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/profile/').json()['user']['email'], 'new@example.com')
+
+    def test_history_is_cached_until_an_entry_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            analysis = self.analyse()
+        self.assertEqual(self.client.get('/api/history/').json()['results'][0]['ats_score'], 50.0)
+
+        # A progress update doesn't touch the history entry, so the cached page is kept
+        ResumeAnalysis.objects.filter(id=analysis.id).update(ats_score=80.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            analysis.stage = 'feedback'
+            analysis.save(update_fields=['stage'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/history/').json()['results'][0]['ats_score'], 50.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            analysis.refresh_from_db()
+            analysis.status = ResumeAnalysis.STATUS_COMPLETED
+            analysis.save(update_fields=['status', 'ats_score'])
+        self.assertEqual(self.client.get('/api/history/').json()['results'][0]['ats_score'], 80.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.analyse()
+        self.assertEqual(len(self.client.get('/api/history/').json()['results']), 2)
+
+    def test_session_expiry_slides_without_saving_on_every_request(self):
+        self.client.get('/api/profile/')
+        response = self.client.get('/api/profile/')
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+        later = time.time() + settings.SESSION_REFRESH_INTERVAL + 1
+        with mock.patch.object(middleware.time, 'time', return_value=later):
+            response = self.client.get('/api/profile/')
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
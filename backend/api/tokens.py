@@ -0,0 +1,150 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from .backends import CachedModelBackend
+from .models import TokenRevocation
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+class InvalidToken(Exception):
+    """Raised for a token that is malformed, expired, revoked or of the wrong kind."""
+
+class UserRecordCache:
+    """Small in-process LRU of (user, revoked_at) records for token authentication.
+
+    Entries expire after `ttl` seconds, which bounds how long another
+    process's revocation can go unnoticed here.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[2] <= time.monotonic():
+                return None
+            self.entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def set(self, user_id, user, revoked_at):
+        with self.lock:
+            self.entries[user_id] = (user, revoked_at, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+_records = None
+_records_lock = threading.Lock()
+
+def _user_records():
+    global _records
+    with _records_lock:
+        if _records is None:
+            _records = UserRecordCache(settings.TOKEN_USER_CACHE_MAX_ENTRIES, settings.TOKEN_USER_CACHE_TTL)
+        return _records
+
+def _salt(kind):
+    # Access and refresh tokens are signed with different salts, so neither passes for the other
+    return f'api.tokens.{kind}'
+
+def _lifetime(kind):
+    return settings.ACCESS_TOKEN_TTL if kind == ACCESS else settings.REFRESH_TOKEN_TTL
+
+def _make_token(user, kind, issued_at):
+    return signing.dumps(
+        {'uid': user.pk, 'iat': issued_at, 'auth': user.get_session_auth_hash()},
+        salt=_salt(kind),
+    )
+
+def issue_tokens(user):
+    """A new access and refresh token pair for a user, as returned by the login and signup views."""
+    issued_at = time.time()
+    return {
+        'token_type': 'Bearer',
+        'access': _make_token(user, ACCESS, issued_at),
+        'refresh': _make_token(user, REFRESH, issued_at),
+        'expires_in': settings.ACCESS_TOKEN_TTL,
+    }
+
+def read_token(token, kind):
+    """Return the payload of a token whose signature and age are valid."""
+    try:
+        return signing.loads(token, salt=_salt(kind), max_age=_lifetime(kind))
+    except signing.SignatureExpired:
+        raise InvalidToken("Token has expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+
+def _load_record(user_id):
+    # The user comes from the shared user cache; the revocation time from the database
+    user = CachedModelBackend().get_user(user_id)
+    revoked_at = TokenRevocation.objects.filter(user_id=user_id).values_list('revoked_at', flat=True).first()
+    return user, revoked_at.timestamp() if revoked_at else None
+
+def _check_record(payload, user, revoked_at):
+    if user is None:
+        raise InvalidToken("User not found or inactive")
+    # The auth hash changes with the password, which ends every token issued before
+    if not constant_time_compare(payload['auth'], user.get_session_auth_hash()):
+        raise InvalidToken("Token has been revoked")
+    if revoked_at is not None and payload['iat'] <= revoked_at:
+        raise InvalidToken("Token has been revoked")
+
+def authenticate_access_token(token):
+    """Return (user, payload) for a valid access token, usually without touching the database."""
+    payload = read_token(token, ACCESS)
+    records = _user_records()
+    record = records.get(payload['uid'])
+    if record is None:
+        record = _load_record(payload['uid'])
+        records.set(payload['uid'], *record)
+    _check_record(payload, *record)
+    # The cached instance is shared between requests, so each request gets its own copy
+    return copy.copy(record[0]), payload
+
+def refresh_access_token(token):
+    """Return a new access token for a valid refresh token.
+
+    The refresh token itself is not renewed; once it expires the user logs in again.
+    """
+    payload = read_token(token, REFRESH)
+    # Refreshing always rereads the user record, so revocations from other processes apply at once
+    record = _load_record(payload['uid'])
+    _user_records().set(payload['uid'], *record)
+    _check_record(payload, *record)
+    return {
+        'token_type': 'Bearer',
+        'access': _make_token(record[0], ACCESS, time.time()),
+        'expires_in': settings.ACCESS_TOKEN_TTL,
+    }
+
+def revoke_tokens(user):
+    """Reject every token issued to the user so far."""
+    TokenRevocation.objects.update_or_create(user=user, defaults={'revoked_at': timezone.now()})
+    _user_records().discard(user.pk)
+
+def forget_user(user_id):
+    """Drop this process's cached record of a user, e.g. after the user was saved."""
+    _user_records().discard(user_id)
+
+def bearer_token(request):
+    """The token of an `Authorization: Bearer <token>` header, or None."""
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    token = token.strip()
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    return token
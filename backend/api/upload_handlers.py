@@ -0,0 +1,90 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b'%PDF-'
+
+# Readers accept the PDF header anywhere in the first 1024 bytes
+PDF_HEADER_WINDOW = 1024
+
+def format_size(size):
+    """A byte count for messages, e.g. '10MB', '2.5MB' or '512KB'."""
+    if size >= 1024 * 1024:
+        value, unit = size / (1024 * 1024), 'MB'
+    else:
+        value, unit = size / 1024, 'KB'
+    return f'{value:g}{unit}' if value == int(value) else f'{value:.1f}{unit}'
+
+class ResumeUploadRejected:
+    """Why a resume upload was stopped, as recorded on the request."""
+
+    def __init__(self, message, status_code):
+        self.message = message
+        self.status_code = status_code
+
+class ResumeUploadHandler(FileUploadHandler):
+    """Validate the `resume` file field while it streams in.
+
+    Runs ahead of Django's memory and temporary-file handlers. Each chunk is
+    checked before it is passed on, so an oversized or non-PDF upload stops
+    before it reaches storage, and the view never creates a ResumeAnalysis
+    row for it. Accepted uploads get their SHA-256 computed on the fly and
+    recorded as `request.resume_upload_hash`.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.active = False
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.active = field_name == settings.RESUME_UPLOAD_FIELD
+        if not self.active:
+            return
+
+        self.size = 0
+        self.header = b''
+        self.digest = hashlib.sha256()
+
+        if not file_name or not file_name.lower().endswith('.pdf'):
+            self.reject('Only PDF files are supported', 400)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        self.size += len(raw_data)
+        if self.size > settings.RESUME_MAX_UPLOAD_SIZE:
+            self.reject(f'File too large (max {format_size(settings.RESUME_MAX_UPLOAD_SIZE)})', 413)
+
+        if self.header is not None:
+            self.header += raw_data[:PDF_HEADER_WINDOW - len(self.header)]
+            if PDF_MAGIC in self.header:
+                self.header = None
+            elif len(self.header) >= PDF_HEADER_WINDOW:
+                self.reject('File is not a valid PDF', 400)
+
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+
+        if self.size == 0:
+            self.reject('File is empty', 400)
+        if self.header is not None:
+            self.reject('File is not a valid PDF', 400)
+
+        self.request.resume_upload_hash = self.digest.hexdigest()
+        # Let the next handler build the UploadedFile object
+        return None
+
+    def reject(self, message, status_code):
+        logger.warning(f"Rejected resume upload '{self.file_name}': {message}")
+        self.request.resume_upload_rejected = ResumeUploadRejected(message, status_code)
+        self.active = False
+        raise StopUpload(connection_reset=False)
@@ -1,12 +1,22 @@
 from django.urls import path
+from .async_views import async_upload, stream_upload
 from .views import (
     ResumeUploadView, 
     AnalysisHistoryView, 
+    AnalysisExportView,
     LoginView, 
     SignupView, 
     LogoutView, 
+    TokenRefreshView,
     UserProfileView,
-    CSRFTokenView
+    CSRFTokenView,
+    AnalysisStatusView,
+    AnalysisDetailView,
+    BatchScoreView,
+    ResumeSearchView,
+    FeedbackCacheStatsView,
+    PdfEngineStatsView,
+    MetricsView
 )
 
 urlpatterns = [
@@ -14,7 +24,18 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('signup/', SignupView.as_view(), name='signup'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('upload/', ResumeUploadView.as_view(), name='resume-upload'),
+    path('upload/async/', async_upload, name='resume-upload-async'),
+    path('upload/stream/', stream_upload, name='resume-upload-stream'),
+    path('batch-score/', BatchScoreView.as_view(), name='batch-score'),
+    path('search/', ResumeSearchView.as_view(), name='resume-search'),
     path('history/', AnalysisHistoryView.as_view(), name='analysis-history'),
+    path('history/export/', AnalysisExportView.as_view(), name='analysis-history-export'),
+    path('analysis/<int:pk>/', AnalysisDetailView.as_view(), name='analysis-detail'),
+    path('analysis/<int:pk>/status/', AnalysisStatusView.as_view(), name='analysis-status'),
+    path('feedback-cache/stats/', FeedbackCacheStatsView.as_view(), name='feedback-cache-stats'),
+    path('pdf-engines/stats/', PdfEngineStatsView.as_view(), name='pdf-engine-stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Fields shown in a history entry; saves that only touch other fields keep cached pages
+HISTORY_FIELDS = frozenset(['status', 'ats_score', 'job_match_score', 'resume_file', 'resume_name', 'created_at'])
+
+def _cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+def _user_key(user_id):
+    return f'user:{user_id}'
+
+def _history_version_key(user_id):
+    return f'history-version:{user_id}'
+
+def get_cached_user(user_id, loader):
+    """Return the user with this id from the cache, calling loader(user_id) on a miss.
+
+    A missing user (loader returns None) is not cached.
+    """
+    cache = _cache()
+    user = cache.get(_user_key(user_id))
+    if user is None:
+        user = loader(user_id)
+        if user is not None:
+            cache.set(_user_key(user_id), user)
+    return user
+
+def invalidate_user(user_id):
+    _cache().delete(_user_key(user_id))
+
+def _history_version(user_id):
+    # Cached pages are keyed by a per-user version; replacing it invalidates every page at once
+    cache = _cache()
+    version = cache.get(_history_version_key(user_id))
+    if version is None:
+        cache.add(_history_version_key(user_id), uuid.uuid4().hex)
+        version = cache.get(_history_version_key(user_id))
+    return version
+
+def history_key(user_id, url):
+    """Cache key of a history page; fetch it once per request and reuse it when storing.
+
+    The key embeds the user's current version, so a page computed before an
+    invalidation can't be stored under the version that replaced it.
+    """
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
+    return f'history:{user_id}:{_history_version(user_id)}:{url_hash}'
+
+def get_cached_history(key):
+    """Return a cached history page (the paginated response data), or None."""
+    return _cache().get(key)
+
+def store_history(key, data):
+    _cache().set(key, data)
+
+def invalidate_history(user_id):
+    _cache().delete(_history_version_key(user_id))
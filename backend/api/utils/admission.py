@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from django.conf import settings
+from .metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Bounds for the Retry-After estimate sent with a rejection, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+class AdmissionRejected(Exception):
+    """Raised instead of admitting an analysis when the gate is saturated."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Analysis capacity exhausted ({reason}); retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    """A request queued for a slot; woken through an Event (threads) or a Future (event loop)."""
+
+    def __init__(self, user_id, loop=None):
+        self.user_id = user_id
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def grant(self):
+        self.granted = True
+        if self.loop:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        else:
+            self.event.set()
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+class Slot:
+    """An admitted analysis. Release it exactly once when the analysis ends; later calls do nothing."""
+
+    def __init__(self, gate, user_id):
+        self.gate = gate
+        self.user_id = user_id
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if self.gate is None:
+            return
+        self.gate._release(self)
+
+class AdmissionGate:
+    """Bounded-concurrency gate in front of the analysis pipeline of one process.
+
+    At most `max_active` analyses run at once. Further requests wait in a
+    FIFO queue of at most `max_queue` entries for up to `queue_timeout`
+    seconds. A user may hold at most `max_per_user` running or queued
+    analyses, so one client can't fill the queue. Requests beyond these
+    limits are rejected straight away with AdmissionRejected, whose
+    retry_after is estimated from recent analysis durations.
+    """
+
+    def __init__(self, max_active=4, max_per_user=2, max_queue=8, queue_timeout=10.0):
+        self.max_active = max_active
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.per_user = {}
+        self.waiters = deque()
+        # Moving average of how long an admitted analysis holds its slot
+        self.mean_hold = None
+        self.lock = threading.Lock()
+
+    def acquire(self, user_id):
+        """Return a Slot, blocking the calling thread while queued."""
+        start = time.monotonic()
+        waiter = self._admit_or_enqueue(user_id, None)
+        if waiter is None:
+            return self._admitted(user_id, start)
+        waiter.event.wait(self.queue_timeout)
+        return self._finish_wait(waiter, start)
+
+    async def aacquire(self, user_id):
+        """Return a Slot, suspending the calling coroutine while queued."""
+        start = time.monotonic()
+        waiter = self._admit_or_enqueue(user_id, asyncio.get_running_loop())
+        if waiter is None:
+            return self._admitted(user_id, start)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # The client went away while queued: give back the slot if it was granted meanwhile
+            self._abandon(waiter)
+            raise
+        return self._finish_wait(waiter, start)
+
+    @contextmanager
+    def admit(self, user_id):
+        slot = self.acquire(user_id)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    @asynccontextmanager
+    async def aadmit(self, user_id):
+        slot = await self.aacquire(user_id)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def _admit_or_enqueue(self, user_id, loop):
+        with self.lock:
+            if self.per_user.get(user_id, 0) >= self.max_per_user:
+                self._reject('user_limit')
+            self.per_user[user_id] = self.per_user.get(user_id, 0) + 1
+            # Queued requests go first, so a newcomer never overtakes them
+            if self.active < self.max_active and not self.waiters:
+                self.active += 1
+                ADMISSION_ACTIVE.set(self.active)
+                return None
+            if len(self.waiters) >= self.max_queue:
+                self._forget_user(user_id)
+                self._reject('queue_full')
+            waiter = _Waiter(user_id, loop)
+            self.waiters.append(waiter)
+            ADMISSION_QUEUE_DEPTH.set(len(self.waiters))
+            return waiter
+
+    def _finish_wait(self, waiter, start):
+        with self.lock:
+            if not waiter.granted:
+                self.waiters.remove(waiter)
+                ADMISSION_QUEUE_DEPTH.set(len(self.waiters))
+                self._forget_user(waiter.user_id)
+                ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start, outcome='timeout')
+                self._reject('timeout')
+        return self._admitted(waiter.user_id, start)
+
+    def _abandon(self, waiter):
+        with self.lock:
+            if not waiter.granted:
+                self.waiters.remove(waiter)
+                ADMISSION_QUEUE_DEPTH.set(len(self.waiters))
+                self._forget_user(waiter.user_id)
+                return
+        Slot(self, waiter.user_id).release()
+
+    def _admitted(self, user_id, start):
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start, outcome='admitted')
+        return Slot(self, user_id)
+
+    def _release(self, slot):
+        with self.lock:
+            if slot.released:
+                return
+            slot.released = True
+            held = time.monotonic() - slot.started
+            self.mean_hold = held if self.mean_hold is None else 0.8 * self.mean_hold + 0.2 * held
+            self._forget_user(slot.user_id)
+            if self.waiters:
+                # Hand the slot straight to the next request in line
+                self.waiters.popleft().grant()
+                ADMISSION_QUEUE_DEPTH.set(len(self.waiters))
+            else:
+                self.active -= 1
+                ADMISSION_ACTIVE.set(self.active)
+
+    def _forget_user(self, user_id):
+        count = self.per_user[user_id] - 1
+        if count:
+            self.per_user[user_id] = count
+        else:
+            del self.per_user[user_id]
+
+    def _reject(self, reason):
+        # Called with the lock held: the queue ahead drains at max_active slots per mean_hold
+        if self.mean_hold is None:
+            estimate = self.queue_timeout
+        else:
+            estimate = self.mean_hold * (len(self.waiters) + 1) / self.max_active
+        retry_after = min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(estimate)))
+        ADMISSION_REJECTIONS.inc(reason=reason)
+        logger.warning(f"Rejected analysis ({reason}); {self.active} running, {len(self.waiters)} queued")
+        raise AdmissionRejected(reason, retry_after)
+
+class _OpenGate:
+    """Stands in for the gate when admission control is disabled."""
+
+    def acquire(self, user_id):
+        return Slot(None, user_id)
+
+    async def aacquire(self, user_id):
+        return Slot(None, user_id)
+
+    @contextmanager
+    def admit(self, user_id):
+        yield Slot(None, user_id)
+
+    @asynccontextmanager
+    async def aadmit(self, user_id):
+        yield Slot(None, user_id)
+
+_gate = None
+_gate_lock = threading.Lock()
+
+def get_admission_gate():
+    """Return the process-wide admission gate, creating it from settings on first use."""
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            if settings.ADMISSION_MAX_CONCURRENT > 0:
+                _gate = AdmissionGate(
+                    max_active=settings.ADMISSION_MAX_CONCURRENT,
+                    max_per_user=settings.ADMISSION_MAX_PER_USER,
+                    max_queue=settings.ADMISSION_MAX_QUEUE,
+                    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+                )
+            else:
+                _gate = _OpenGate()
+        return _gate
@@ -1,24 +1,27 @@
 import requests
 import os
+import json
+import hashlib
 import logging
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from asgiref.sync import sync_to_async
+from .text_document import as_document
+from .http_client import CircuitOpenError, get_feedback_client
+from .metrics import FEEDBACK_CACHE_LOOKUPS, count_fallback, register_snapshot_source, shared_values
+from .skill_matcher import get_skill_taxonomy
 
 logger = logging.getLogger(__name__)
 
-def generate_feedback(resume_text, job_description, ats_score, job_match_score):
-    """Generate AI feedback using OpenRouter API with fallback."""
-    
-    # Check if API key is available
-    api_key = os.getenv('OPENROUTER_API_KEY')
-    
-    if not api_key:
-        logger.warning("OPENROUTER_API_KEY not found. Using fallback feedback.")
-        return generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score)
-    
-    url = "https://openrouter.ai/api/v1/chat/completions"
+def build_feedback_request(resume_text, job_description, ats_score, job_match_score):
+    """Build the chat-completions payload for the feedback prompt."""
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
     
     # Truncate texts to avoid token limits
-    resume_preview = resume_text[:800] if len(resume_text) > 800 else resume_text
-    job_preview = job_description[:800] if len(job_description) > 800 else job_description
+    resume_preview = resume_doc.preview(800)
+    job_preview = job_doc.preview(800)
     
     prompt = f"""
     Analyze the resume and job description below. Provide 3-5 actionable suggestions to improve ATS compatibility (current score: {ats_score:.1f}%) and job match (current score: {job_match_score:.1f}%).
@@ -33,57 +36,214 @@ def generate_feedback(resume_text, job_description, ats_score, job_match_score):
     4. Content structure
     """
     
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
+    return {
         "model": "openai/gpt-3.5-turbo",
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": 500,
         "temperature": 0.7
     }
+
+def feedback_cache_key(data):
+    """Cache key for a feedback request: a hash of the exact prompt and model parameters."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return f"feedback:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+_cache_stats = {'hits': 0, 'misses': 0}
+_cache_stats_lock = threading.Lock()
+
+def _count_cache(outcome):
+    with _cache_stats_lock:
+        _cache_stats[outcome] += 1
+    FEEDBACK_CACHE_LOOKUPS.inc(result='hit' if outcome == 'hits' else 'miss')
+
+def _local_cache_stats():
+    with _cache_stats_lock:
+        return dict(_cache_stats)
+
+register_snapshot_source('feedback_cache', _local_cache_stats)
+
+def get_feedback_cache_stats():
+    """Hit and miss counts of the feedback cache, summed over every live process sharing metrics snapshots.
+
+    Queued uploads are analysed by the worker processes, so the web process
+    serving this rarely looks anything up itself.
+    """
+    stats = _local_cache_stats()
+    for counts in shared_values('feedback_cache'):
+        for outcome in ('hits', 'misses'):
+            stats[outcome] += counts.get(outcome, 0)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+def get_cached_feedback(data):
+    """Return previously generated feedback for an identical request, or None."""
+    feedback = caches[settings.FEEDBACK_CACHE_ALIAS].get(feedback_cache_key(data))
+    _count_cache('hits' if feedback is not None else 'misses')
+    return feedback
+
+def cache_feedback(data, feedback):
+    caches[settings.FEEDBACK_CACHE_ALIAS].set(feedback_cache_key(data), feedback, settings.FEEDBACK_CACHE_TTL)
+
+def generate_feedback(resume_text, job_description, ats_score, job_match_score):
+    """Generate AI feedback using OpenRouter API with fallback."""
+    
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
+    
+    # Check if API key is available
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    
+    if not api_key:
+        logger.warning("OPENROUTER_API_KEY not found. Using fallback feedback.")
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+    
+    data = build_feedback_request(resume_doc, job_doc, ats_score, job_match_score)
+    
+    cached = get_cached_feedback(data)
+    if cached is not None:
+        logger.info("AI feedback served from cache")
+        return cached
     
     try:
         logger.info("Attempting to generate AI feedback...")
-        response = requests.post(url, json=data, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
+        # Raises CircuitOpenError straight away while the provider is failing
+        result = get_feedback_client().chat_completion(data, api_key)
         if 'choices' in result and len(result['choices']) > 0:
             feedback = result['choices'][0]['message']['content']
             logger.info("AI feedback generated successfully")
+            cache_feedback(data, feedback)
             return feedback
         else:
             logger.warning("Unexpected API response format")
-            return generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score)
+            count_fallback('llm_failure')
+            return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
             
+    except CircuitOpenError:
+        logger.warning("Feedback provider circuit is open. Using fallback feedback.")
+        count_fallback('llm_circuit_open')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
     except requests.exceptions.Timeout:
         logger.warning("API request timeout. Using fallback feedback.")
-        return generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score)
+        count_fallback('llm_failure')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
     except requests.exceptions.RequestException as e:
         logger.warning(f"API request failed: {e}. Using fallback feedback.")
-        return generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score)
+        count_fallback('llm_failure')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
     except Exception as e:
         logger.error(f"Unexpected error generating feedback: {e}")
-        return generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score)
+        count_fallback('llm_failure')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+
+async def agenerate_feedback(resume_text, job_description, ats_score, job_match_score):
+    """Async version of generate_feedback() using the shared async HTTP client."""
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
+    
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    if not api_key:
+        logger.warning("OPENROUTER_API_KEY not found. Using fallback feedback.")
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+    
+    data = build_feedback_request(resume_doc, job_doc, ats_score, job_match_score)
+    
+    cached = await sync_to_async(get_cached_feedback)(data)
+    if cached is not None:
+        logger.info("AI feedback served from cache")
+        return cached
+    
+    try:
+        logger.info("Attempting to generate AI feedback...")
+        result = await get_feedback_client().achat_completion(data, api_key)
+    except ImportError:
+        logger.warning("httpx not installed. Generating feedback in a worker thread.")
+        return await sync_to_async(generate_feedback)(resume_doc, job_doc, ats_score, job_match_score)
+    except CircuitOpenError:
+        logger.warning("Feedback provider circuit is open. Using fallback feedback.")
+        count_fallback('llm_circuit_open')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+    except Exception as e:
+        logger.warning(f"API request failed: {e}. Using fallback feedback.")
+        count_fallback('llm_failure')
+        return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+    
+    if 'choices' in result and len(result['choices']) > 0:
+        feedback = result['choices'][0]['message']['content']
+        logger.info("AI feedback generated successfully")
+        await sync_to_async(cache_feedback)(data, feedback)
+        return feedback
+    
+    logger.warning("Unexpected API response format")
+    count_fallback('llm_failure')
+    return generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+
+class ReplacedFeedback(str):
+    """The complete feedback that replaces every chunk stream_feedback() yielded before it."""
+
+async def stream_feedback(resume_text, job_description, ats_score, job_match_score):
+    """Yield AI feedback in chunks as the model produces them.
+    
+    Falls back to yielding the complete built-in feedback in one chunk when
+    there is no API key, the circuit is open, httpx is not installed, or the
+    provider fails before sending any text. If the provider fails after
+    sending some text, the built-in feedback is yielded as a
+    ReplacedFeedback: callers must discard the truncated chunks.
+    """
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
+    
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    if not api_key:
+        logger.warning("OPENROUTER_API_KEY not found. Using fallback feedback.")
+        yield generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
+        return
+    
+    data = build_feedback_request(resume_doc, job_doc, ats_score, job_match_score)
+    
+    cached = await sync_to_async(get_cached_feedback)(data)
+    if cached is not None:
+        logger.info("AI feedback served from cache")
+        yield cached
+        return
+    
+    parts = []
+    try:
+        logger.info("Streaming AI feedback...")
+        async for delta in get_feedback_client().stream_chat_completion(data, api_key):
+            parts.append(delta)
+            yield delta
+    except ImportError:
+        logger.warning("httpx not installed. Generating feedback without streaming.")
+        yield await sync_to_async(generate_feedback)(resume_doc, job_doc, ats_score, job_match_score)
+        return
+    except Exception as e:
+        logger.warning(f"Streaming feedback failed: {e}")
+        count_fallback('llm_failure')
+        if parts:
+            # Half-written feedback is neither saved nor cached
+            yield ReplacedFeedback(generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score))
+            return
+    
+    if parts:
+        logger.info("AI feedback streamed successfully")
+        await sync_to_async(cache_feedback)(data, ''.join(parts))
+    else:
+        yield generate_fallback_feedback(resume_doc, job_doc, ats_score, job_match_score)
 
 def generate_fallback_feedback(resume_text, job_description, ats_score, job_match_score):
     """Generate basic feedback without AI API."""
     
     # Extract key information for basic analysis
-    resume_lower = resume_text.lower()
-    job_lower = job_description.lower()
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
     
-    # Common technical skills
-    tech_skills = ['python', 'javascript', 'java', 'react', 'node', 'sql', 'aws', 'docker', 'git']
-    job_tech_skills = [skill for skill in tech_skills if skill in job_lower]
-    missing_tech_skills = [skill for skill in job_tech_skills if skill not in resume_lower]
+    # Skills the job asks for that the resume doesn't mention, in the job description's order
+    resume_skills = set(resume_doc.skills)
+    missing_tech_skills = [skill for skill in job_doc.skills if skill not in resume_skills]
     
-    # Common action words
-    action_words = ['developed', 'implemented', 'designed', 'created', 'managed', 'led', 'improved']
-    has_action_words = any(word in resume_lower for word in action_words)
+    # Action verbs from the taxonomy, matched as whole words
+    has_action_words = bool(get_skill_taxonomy().find_action_verbs(resume_doc.lower))
     
     feedback_parts = []
     
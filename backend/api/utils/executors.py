@@ -0,0 +1,46 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def init_process_worker(environ=None):
+    # Spawned workers need Django configured before scorers read settings.
+    # `environ` overrides environment variables that settings are read from.
+    # The pool already keeps every core busy with whole documents, so each
+    # worker extracts pages sequentially instead of starting its own pool.
+    os.environ.update({'PDF_PARSE_WORKERS': '1', **(environ or {})})
+    import django
+    django.setup()
+    from .metrics import start_metrics_export
+    start_metrics_export(settings.METRICS_DIR, settings.METRICS_EXPORT_INTERVAL)
+
+def get_analysis_executor():
+    """Return the bounded executor that runs CPU-bound analysis stages for async views."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = settings.ANALYSIS_EXECUTOR_WORKERS
+            if settings.ANALYSIS_EXECUTOR == 'process':
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_process_worker,
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+            logger.info(f"Started {settings.ANALYSIS_EXECUTOR} executor with {workers} workers")
+        return _executor
+
+async def run_in_executor(func, *args, **kwargs):
+    """Run a blocking function on the analysis executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_analysis_executor(), functools.partial(func, *args, **kwargs))
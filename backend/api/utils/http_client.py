@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Chat completions are billed and not idempotent, so only failures where the provider
+# cannot have produced a completion are retried: refused or timed-out connections,
+# rate limiting and "service unavailable"
+RETRY_STATUS_CODES = {429, 503}
+
+def _retry_after(response):
+    """Seconds from a numeric Retry-After header, or None."""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider that has been failing."""
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a rolling window of recent calls.
+
+    Closed: calls go through and outcomes are recorded. Once at least
+    `min_calls` of the last `window` calls are recorded and the failure
+    ratio reaches `failure_threshold`, the breaker opens and rejects calls
+    for `reset_timeout` seconds. It then lets a single trial call through
+    (half-open) and closes again only if that call succeeds.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=0.5, window=20, min_calls=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.outcomes = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                logger.info("Circuit breaker closed after successful trial call")
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            self.outcomes.append(True)
+
+    def record_failure(self):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            self.outcomes.append(False)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_threshold:
+                self._open()
+
+    def release_trial(self):
+        """Give up a half-open trial that ended without a verdict (e.g. the client went away)."""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.trial_in_flight = False
+
+    def _open(self):
+        logger.warning(f"Circuit breaker opened; skipping provider calls for {self.reset_timeout}s")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+class FeedbackClient:
+    """Shared HTTP client for the chat-completions provider.
+
+    Reuses keep-alive connections from a pooled session, uses separate
+    connect and read timeouts, and retries failures that can't have
+    produced a (billed) completion with jittered exponential backoff or the
+    provider's Retry-After. All attempts of a call share `total_timeout`
+    seconds; each call (after retries) counts towards a circuit breaker.
+    """
+
+    def __init__(self, base_url, connect_timeout=5.0, read_timeout=30.0, max_retries=2,
+                 backoff_base=0.5, backoff_max=4.0, pool_size=10, breaker=None, total_timeout=40.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt):
+        # Full jitter: spreads retries from concurrent requests apart
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(self, attempt, deadline, response=None):
+        """Seconds to wait before the next attempt, or None when no attempt is left before the deadline."""
+        if attempt >= self.max_retries:
+            return None
+        delay = self._backoff(attempt)
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _attempt_timeout(self, deadline):
+        """(connect, read) timeouts for one attempt, cut short to fit the remaining time."""
+        remaining = max(deadline - time.monotonic(), 0.001)
+        return min(self.timeout[0], remaining), min(self.timeout[1], remaining)
+
+    def chat_completion(self, payload, api_key):
+        """POST a chat-completions request and return the decoded JSON response."""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Feedback provider circuit is open")
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        deadline = time.monotonic() + self.total_timeout
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    url, json=payload, headers=headers, timeout=self._attempt_timeout(deadline)
+                )
+                if response.status_code in RETRY_STATUS_CODES:
+                    delay = self._retry_delay(attempt, deadline, response)
+                    if delay is not None:
+                        logger.warning(f"Feedback provider returned {response.status_code}; retrying in {delay:.1f}s")
+                        time.sleep(delay)
+                        continue
+                response.raise_for_status()
+                result = response.json()
+            # ConnectTimeout is a ConnectionError; a read timeout is not retried
+            except requests.exceptions.ConnectionError as e:
+                delay = self._retry_delay(attempt, deadline)
+                if delay is not None:
+                    logger.warning(f"Feedback provider request failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                self.breaker.record_failure()
+                raise
+            except (requests.exceptions.RequestException, ValueError):
+                self.breaker.record_failure()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    async def achat_completion(self, payload, api_key):
+        """Async version of chat_completion() on the shared httpx client."""
+        import httpx
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Feedback provider circuit is open")
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        client = get_async_http_client()
+        recorded = False
+
+        deadline = time.monotonic() + self.total_timeout
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    connect_timeout, read_timeout = self._attempt_timeout(deadline)
+                    # wait_for enforces the deadline on the whole attempt, not just each socket read
+                    response = await asyncio.wait_for(
+                        client.post(url, json=payload, headers=headers,
+                                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout)),
+                        max(deadline - time.monotonic(), 0.001),
+                    )
+                    if response.status_code in RETRY_STATUS_CODES:
+                        delay = self._retry_delay(attempt, deadline, response)
+                        if delay is not None:
+                            logger.warning(f"Feedback provider returned {response.status_code}; retrying in {delay:.1f}s")
+                            await asyncio.sleep(delay)
+                            continue
+                    response.raise_for_status()
+                    result = response.json()
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    delay = self._retry_delay(attempt, deadline)
+                    if delay is not None:
+                        logger.warning(f"Feedback provider request failed ({e}); retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise
+                except (httpx.HTTPError, ValueError, asyncio.TimeoutError):
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise
+
+                recorded = True
+                self.breaker.record_success()
+                return result
+        finally:
+            if not recorded:
+                self.breaker.release_trial()
+
+    async def stream_chat_completion(self, payload, api_key):
+        """Yield content deltas from a streaming chat-completions response.
+
+        Uses the shared async HTTP client (httpx). Failures before the first
+        delta are retried like chat_completion(), within total_timeout; once
+        text has been yielded an error is raised to the caller instead. The
+        deadline bounds waiting for the first delta, not a long completion
+        that keeps streaming.
+        """
+        import httpx
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Feedback provider circuit is open")
+
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        client = get_async_http_client()
+        recorded = False
+
+        deadline = time.monotonic() + self.total_timeout
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                received = False
+                connect_timeout, read_timeout = self._attempt_timeout(deadline)
+                try:
+                    async with client.stream(
+                        'POST', url, json={**payload, 'stream': True}, headers=headers,
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    ) as response:
+                        if response.status_code in RETRY_STATUS_CODES:
+                            delay = self._retry_delay(attempt, deadline, response)
+                            if delay is not None:
+                                logger.warning(f"Feedback provider returned {response.status_code}; retrying in {delay:.1f}s")
+                                await asyncio.sleep(delay)
+                                continue
+                        response.raise_for_status()
+
+                        async for line in response.aiter_lines():
+                            if not line.startswith('data:'):
+                                continue
+                            data = line[len('data:'):].strip()
+                            if data == '[DONE]':
+                                break
+                            delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                            if delta:
+                                received = True
+                                yield delta
+
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    delay = None if received else self._retry_delay(attempt, deadline)
+                    if delay is not None:
+                        logger.warning(f"Feedback provider stream failed ({e}); retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise
+                except (httpx.HTTPError, ValueError, KeyError, IndexError):
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise
+
+                recorded = True
+                self.breaker.record_success()
+                return
+        finally:
+            if not recorded:
+                self.breaker.release_trial()
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_http_client():
+    """Return a pooled httpx.AsyncClient for the running event loop."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.FEEDBACK_READ_TIMEOUT, connect=settings.FEEDBACK_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.FEEDBACK_POOL_SIZE,
+                max_keepalive_connections=settings.FEEDBACK_POOL_SIZE,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+def get_feedback_client():
+    """Return the process-wide feedback client, creating it from settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = FeedbackClient(
+                base_url=settings.FEEDBACK_API_BASE_URL,
+                connect_timeout=settings.FEEDBACK_CONNECT_TIMEOUT,
+                read_timeout=settings.FEEDBACK_READ_TIMEOUT,
+                total_timeout=settings.FEEDBACK_TOTAL_TIMEOUT,
+                max_retries=settings.FEEDBACK_MAX_RETRIES,
+                pool_size=settings.FEEDBACK_POOL_SIZE,
+                breaker=CircuitBreaker(
+                    failure_threshold=settings.FEEDBACK_BREAKER_FAILURE_THRESHOLD,
+                    window=settings.FEEDBACK_BREAKER_WINDOW,
+                    min_calls=settings.FEEDBACK_BREAKER_MIN_CALLS,
+                    reset_timeout=settings.FEEDBACK_BREAKER_RESET_TIMEOUT,
+                ),
+            )
+        return _client
@@ -0,0 +1,351 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets in seconds, from cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ''
+    escaped = [
+        (name, value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class Metric:
+    """A named metric family with a fixed set of label names."""
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def collect(self):
+        """A copy of this process's values, keyed by label values."""
+        with self.lock:
+            return dict(self.values)
+
+    def dump(self):
+        """JSON-serialisable values, for sharing with other processes."""
+        return [[list(key), value] for key, value in self.collect().items()]
+
+    def merge(self, values, dumped):
+        """Add values dumped by another process into `values`."""
+        for key, value in dumped:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def render(self, values=None):
+        values = self.collect() if values is None else values
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self.lock:
+            return {key: (list(counts), total) for key, (counts, total) in self.values.items()}
+
+    def merge(self, values, dumped):
+        for key, (counts, total) in dumped:
+            key = tuple(key)
+            if len(counts) != len(self.buckets) + 1:
+                continue  # Written by a process running different code
+            current, current_total = values.get(key, ([0] * len(counts), 0.0))
+            values[key] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+    def render(self, values=None):
+        values = self.collect() if values is None else values
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+_registry = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+_export_dir = None
+_export_interval = 5.0
+_export_lock = threading.Lock()
+_shared = (0.0, [])
+_snapshot_sources = {}
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f'{pid}.json')
+
+def write_snapshot():
+    """Write this process's metrics to the shared directory, replacing its previous snapshot."""
+    if _export_dir is None:
+        return
+    snapshot = {
+        'pid': os.getpid(),
+        'metrics': {metric.name: metric.dump() for metric in _registry},
+        'sources': {name: source() for name, source in _snapshot_sources.items()},
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=_export_dir, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(snapshot, tmp)
+        os.replace(tmp_path, _snapshot_path(_export_dir, os.getpid()))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _remove_snapshot():
+    try:
+        os.unlink(_snapshot_path(_export_dir, os.getpid()))
+    except (FileNotFoundError, TypeError):
+        pass
+
+def _export_loop():
+    while True:
+        time.sleep(_export_interval)
+        try:
+            write_snapshot()
+        except Exception as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+def start_metrics_export(directory, interval=5.0):
+    """Share this process's metrics through `directory`, rewriting its snapshot every `interval` seconds.
+
+    Every process on the host that records metrics (web workers, analysis
+    workers, executor pool processes) calls this, and render_metrics() adds
+    up the snapshots of the live ones. Does nothing without a directory or
+    when already started.
+    """
+    global _export_dir, _export_interval
+    if not directory:
+        return
+    with _export_lock:
+        if _export_dir is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        _export_dir = directory
+        _export_interval = interval
+    threading.Thread(target=_export_loop, name='metrics-export', daemon=True).start()
+    atexit.register(_remove_snapshot)
+
+def register_snapshot_source(name, source):
+    """Add `source()`, a JSON-serializable value, to this process's snapshots under `name`.
+
+    Other processes read it back with shared_values(name). This shares state
+    that isn't a Prometheus metric, such as PDF engine totals.
+    """
+    _snapshot_sources[name] = source
+
+def shared_values(name):
+    """The latest values the other live processes reported for snapshot source `name`."""
+    return [snapshot['sources'][name] for snapshot in shared_snapshots() if name in snapshot.get('sources', {})]
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def shared_snapshots():
+    """Snapshots written by the other live processes, re-read at most once per export interval.
+
+    Snapshots of processes that have exited are deleted; their gauges would
+    otherwise stay up forever.
+    """
+    global _shared
+    if _export_dir is None:
+        return []
+    read_at, snapshots = _shared
+    if time.monotonic() - read_at < _export_interval:
+        return snapshots
+
+    snapshots = []
+    for filename in os.listdir(_export_dir):
+        if not filename.endswith('.json') or filename.startswith('.'):
+            continue
+        path = os.path.join(_export_dir, filename)
+        try:
+            pid = int(filename[:-len('.json')])
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        if not _process_alive(pid):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    _shared = (time.monotonic(), snapshots)
+    return snapshots
+
+def render_metrics():
+    """Metrics in the Prometheus text exposition format.
+
+    Values are this process's plus those of every other live process
+    sharing its export directory (see start_metrics_export()).
+    """
+    snapshots = shared_snapshots()
+    lines = []
+    for metric in _registry:
+        values = metric.collect()
+        for snapshot in snapshots:
+            metric.merge(values, snapshot.get('metrics', {}).get(metric.name, []))
+        lines.extend(metric.render(values))
+    return '\n'.join(lines) + '\n'
+
+STAGE_SECONDS = register(Histogram(
+    'resume_analysis_stage_seconds',
+    'Time spent in each stage of a resume analysis.',
+    ['stage'],
+))
+
+FALLBACKS = register(Counter(
+    'resume_analysis_fallbacks_total',
+    'Times a degraded code path was used instead of the preferred one.',
+    ['reason'],
+))
+
+IN_FLIGHT = register(Gauge(
+    'resume_analyses_in_flight',
+    'Analyses currently being processed.',
+    ['mode'],
+))
+
+FEEDBACK_CACHE_LOOKUPS = register(Counter(
+    'feedback_cache_lookups_total',
+    'Feedback cache lookups, by hit or miss.',
+    ['result'],
+))
+
+REQUEST_SECONDS = register(Histogram(
+    'api_request_duration_seconds',
+    'Time to produce a response for API requests, by route.',
+    ['route', 'method', 'status'],
+))
+
+ADMISSION_ACTIVE = register(Gauge(
+    'resume_analysis_admission_active',
+    'Analyses holding an admission slot, summed over web processes.',
+))
+
+ADMISSION_QUEUE_DEPTH = register(Gauge(
+    'resume_analysis_admission_queue_depth',
+    'Analyses waiting for an admission slot, summed over web processes.',
+))
+
+ADMISSION_WAIT_SECONDS = register(Histogram(
+    'resume_analysis_admission_wait_seconds',
+    'Time spent waiting for an admission slot, by outcome.',
+    ['outcome'],
+))
+
+ADMISSION_REJECTIONS = register(Counter(
+    'resume_analysis_admission_rejections_total',
+    'Analyses turned away with 429, by reason.',
+    ['reason'],
+))
+
+def time_stage(stage):
+    """Context manager that records how long a pipeline stage took."""
+    return STAGE_SECONDS.time(stage=stage)
+
+def count_fallback(reason):
+    FALLBACKS.inc(reason=reason)
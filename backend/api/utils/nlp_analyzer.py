@@ -1,37 +1,51 @@
-import re
 import logging
-from collections import Counter
+from django.conf import settings
+from .metrics import count_fallback
+from .nlp_models import get_pipeline
+from .text_document import as_document
+from .tfidf_model import cosine, document_terms, get_corpus_model, get_job_vector
 
 logger = logging.getLogger(__name__)
 
+def skill_coverage(resume_text, job_description):
+    """Percentage of the job description's taxonomy skills that the resume mentions.
+
+    Returns None when the job description names no known skills.
+    """
+    job_skills = set(as_document(job_description).skills)
+    if not job_skills:
+        return None
+    resume_skills = set(as_document(resume_text).skills)
+    return len(job_skills & resume_skills) / len(job_skills) * 100
+
+def _with_skill_coverage(keyword_score, resume_doc, job_doc):
+    # Weighs in skill coverage so synonyms and multi-word skills count towards the ATS score
+    coverage = skill_coverage(resume_doc, job_doc)
+    if coverage is None:
+        return keyword_score
+    weight = settings.SKILL_ATS_WEIGHT
+    return min((1 - weight) * keyword_score + weight * coverage, 100.0)
+
 # Fallback analyzer if spacy is not available
 def calculate_ats_score_fallback(resume_text, job_description):
     """Calculate ATS score using basic keyword matching without spacy."""
     try:
-        # Convert to lowercase and extract words
-        resume_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', resume_text.lower()))
-        job_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', job_description.lower()))
-        
-        # Remove common stop words
-        stop_words = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 
-            'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 
-            'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 
-            'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use', 'will', 'with'
-        }
-        
-        resume_words = resume_words - stop_words
-        job_words = job_words - stop_words
-        
+        resume_doc = as_document(resume_text)
+        job_doc = as_document(job_description)
+
+        # Keywords are lowercase words of 3+ letters with common stop words removed
+        resume_words = resume_doc.keywords
+        job_words = job_doc.keywords
+
         if not job_words:
             return 0.0
-        
+
         # Find common keywords
         common_words = resume_words.intersection(job_words)
         ats_score = (len(common_words) / len(job_words)) * 100
-        
-        return min(ats_score, 100.0)
-        
+
+        return _with_skill_coverage(min(ats_score, 100.0), resume_doc, job_doc)
+
     except Exception as e:
         logger.error(f"Fallback ATS calculation error: {e}")
         return 0.0
@@ -40,78 +54,208 @@ def calculate_job_match_score_fallback(resume_text, job_description):
     """Calculate job match using basic text similarity without sklearn."""
     try:
         # Simple word frequency approach
-        resume_words = re.findall(r'\b[a-zA-Z]{3,}\b', resume_text.lower())
-        job_words = re.findall(r'\b[a-zA-Z]{3,}\b', job_description.lower())
-        
-        resume_counter = Counter(resume_words)
-        job_counter = Counter(job_words)
-        
+        resume_counter = as_document(resume_text).term_counts
+        job_counter = as_document(job_description).term_counts
+
         # Calculate overlap
-        common_words = set(resume_counter.keys()) & set(job_counter.keys())
-        
+        common_words = resume_counter.keys() & job_counter.keys()
+
         if not common_words:
             return 0.0
-        
+
         # Simple similarity score
         total_overlap = sum(min(resume_counter[word], job_counter[word]) for word in common_words)
         max_possible = sum(job_counter.values())
-        
+
         similarity = (total_overlap / max_possible) * 100 if max_possible > 0 else 0.0
         return min(similarity, 100.0)
-        
+
     except Exception as e:
         logger.error(f"Fallback job match calculation error: {e}")
         return 0.0
 
+def load_spacy_keywords(documents):
+    """Fill in spaCy keywords for documents that don't have them yet.
+
+    All pending documents go through the shared pipeline in a single
+    nlp.pipe batch. Raises ImportError/OSError when spaCy is unavailable.
+    """
+    pending = [doc for doc in documents if doc.spacy_keywords is None]
+    if not pending:
+        return
+
+    nlp = get_pipeline()
+    for doc, spacy_doc in zip(pending, nlp.pipe(doc.lower for doc in pending)):
+        doc.spacy_keywords = frozenset(
+            token.text for token in spacy_doc
+            if token.is_alpha and not token.is_stop and len(token.text) > 2
+        )
+
 def calculate_ats_score(resume_text, job_description):
     """Calculate ATS score based on keyword overlap."""
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
     try:
         # Try using spacy if available
-        import spacy
         try:
-            nlp = spacy.load('en_core_web_sm')
-            
-            resume_doc = nlp(resume_text.lower())
-            job_doc = nlp(job_description.lower())
-            
-            resume_keywords = set(token.text for token in resume_doc if token.is_alpha and not token.is_stop and len(token.text) > 2)
-            job_keywords = set(token.text for token in job_doc if token.is_alpha and not token.is_stop and len(token.text) > 2)
-            
+            load_spacy_keywords([resume_doc, job_doc])
+
+            resume_keywords = resume_doc.spacy_keywords
+            job_keywords = job_doc.spacy_keywords
+
             if not job_keywords:
                 return 0.0
-            
+
             common_keywords = resume_keywords.intersection(job_keywords)
             ats_score = len(common_keywords) / len(job_keywords) * 100
-            
-            return min(ats_score, 100.0)
-            
+
+            return _with_skill_coverage(min(ats_score, 100.0), resume_doc, job_doc)
+
         except OSError as spacy_error:
             logger.warning(f"Spacy model not found: {spacy_error}. Using fallback method.")
-            return calculate_ats_score_fallback(resume_text, job_description)
-            
+            count_fallback('spacy_missing')
+            return calculate_ats_score_fallback(resume_doc, job_doc)
+
     except ImportError:
         logger.warning("Spacy not installed. Using fallback method.")
-        return calculate_ats_score_fallback(resume_text, job_description)
+        count_fallback('spacy_missing')
+        return calculate_ats_score_fallback(resume_doc, job_doc)
     except Exception as e:
         logger.error(f"ATS calculation error: {e}")
-        return calculate_ats_score_fallback(resume_text, job_description)
+        return calculate_ats_score_fallback(resume_doc, job_doc)
 
 def calculate_job_match_score(resume_text, job_description):
     """Calculate semantic similarity using TF-IDF or fallback method."""
+    resume_doc = as_document(resume_text)
+    job_doc = as_document(job_description)
+
+    # Prefer the persisted corpus model: only the resume needs transforming,
+    # the job description vector usually comes from the LRU cache
+    try:
+        model = get_corpus_model()
+        if model is not None:
+            resume_vector = model.transform(resume_doc)
+            job_vector = get_job_vector(model, job_doc)
+            return cosine(resume_vector, job_vector) * 100
+    except Exception as e:
+        logger.error(f"Corpus TF-IDF scoring error: {e}. Using per-request vectorizer.")
+
     try:
         # Try using sklearn if available
         from sklearn.feature_extraction.text import TfidfVectorizer
         from sklearn.metrics.pairwise import cosine_similarity
-        
-        vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-        vectors = vectorizer.fit_transform([resume_text, job_description])
-        
+
+        # Reuse the document's tokens instead of letting sklearn tokenize again,
+        # with the same stop words as the corpus model
+        vectorizer = TfidfVectorizer(analyzer=document_terms, max_features=1000)
+        vectors = vectorizer.fit_transform([resume_doc, job_doc])
+
         similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
         return similarity * 100
-        
+
     except ImportError:
         logger.warning("Sklearn not installed. Using fallback method.")
-        return calculate_job_match_score_fallback(resume_text, job_description)
+        count_fallback('sklearn_missing')
+        return calculate_job_match_score_fallback(resume_doc, job_doc)
     except Exception as e:
         logger.error(f"Job match calculation error: {e}")
-        return calculate_job_match_score_fallback(resume_text, job_description)
\ No newline at end of file
+        return calculate_job_match_score_fallback(resume_doc, job_doc)
+
+def _keyword_sets(documents):
+    """Keyword sets for a batch, using spaCy when available (one nlp.pipe call)."""
+    try:
+        load_spacy_keywords(documents)
+        return [doc.spacy_keywords for doc in documents]
+    except (ImportError, OSError) as e:
+        logger.warning(f"Spacy unavailable for batch scoring: {e}. Using fallback keywords.")
+        count_fallback('spacy_missing')
+        return [doc.keywords for doc in documents]
+
+def _batch_keyword_overlap(resume_keywords, job_keyword_sets):
+    """ATS scores of one resume against many job keyword sets as one sparse product."""
+    try:
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        vocabulary = {}
+        rows, cols = [], []
+        for row, keywords in enumerate(job_keyword_sets):
+            for keyword in keywords:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(keyword, len(vocabulary)))
+
+        if not vocabulary:
+            return [0.0] * len(job_keyword_sets)
+
+        jobs = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(job_keyword_sets), len(vocabulary)))
+        resume = np.zeros(len(vocabulary))
+        resume[[vocabulary[k] for k in resume_keywords if k in vocabulary]] = 1.0
+
+        common = jobs @ resume
+        totals = np.asarray(jobs.sum(axis=1)).ravel()
+        scores = np.divide(common, totals, out=np.zeros_like(common), where=totals > 0) * 100
+        return np.minimum(scores, 100.0).tolist()
+
+    except ImportError:
+        return [
+            min(len(resume_keywords & keywords) / len(keywords) * 100, 100.0) if keywords else 0.0
+            for keywords in job_keyword_sets
+        ]
+
+def _batch_similarity(resume_doc, job_docs):
+    """Cosine similarity of one resume against many job descriptions, in percent."""
+    model = get_corpus_model()
+    if model is not None:
+        resume_vector = model.transform(resume_doc)
+        return [cosine(resume_vector, get_job_vector(model, job_doc)) * 100 for job_doc in job_docs]
+
+    try:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        # Rows are L2-normalized, so one sparse product gives every cosine similarity
+        vectorizer = TfidfVectorizer(analyzer=document_terms, max_features=1000)
+        vectors = vectorizer.fit_transform([resume_doc] + list(job_docs))
+        similarities = (vectors[1:] @ vectors[0].T).toarray().ravel()
+        return (similarities * 100).tolist()
+
+    except ImportError:
+        logger.warning("Sklearn not installed. Using fallback method.")
+        count_fallback('sklearn_missing')
+        return [calculate_job_match_score_fallback(resume_doc, job_doc) for job_doc in job_docs]
+
+def score_resume_against_jobs(resume_text, job_descriptions):
+    """Score one resume against many job descriptions and rank the results.
+
+    The resume is tokenized once, keywords for every document come from a
+    single pipeline batch, and both scores are computed as sparse matrix
+    products. Returns dicts sorted best first, each with the job's `index`
+    in the input list, `ats_score`, `job_match_score` and their mean `score`.
+    """
+    resume_doc = as_document(resume_text)
+    job_docs = [as_document(job_description) for job_description in job_descriptions]
+    if not job_docs:
+        return []
+
+    keyword_sets = _keyword_sets([resume_doc] + job_docs)
+    ats_scores = [
+        _with_skill_coverage(score, resume_doc, job_doc)
+        for score, job_doc in zip(_batch_keyword_overlap(keyword_sets[0], keyword_sets[1:]), job_docs)
+    ]
+
+    try:
+        match_scores = _batch_similarity(resume_doc, job_docs)
+    except Exception as e:
+        logger.error(f"Batch job match calculation error: {e}")
+        match_scores = [calculate_job_match_score_fallback(resume_doc, job_doc) for job_doc in job_docs]
+
+    results = [
+        {
+            'index': index,
+            'ats_score': ats_score,
+            'job_match_score': match_score,
+            'score': (ats_score + match_score) / 2,
+        }
+        for index, (ats_score, match_score) in enumerate(zip(ats_scores, match_scores))
+    ]
+    results.sort(key=lambda result: result['score'], reverse=True)
+    return results
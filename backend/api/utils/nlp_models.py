@@ -0,0 +1,65 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv('SPACY_MODEL', 'en_core_web_sm')
+
+# Keyword extraction only reads lexical attributes (text, is_alpha, is_stop),
+# which come from the tokenizer and vocab, so every trained component is excluded.
+UNUSED_COMPONENTS = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter']
+
+_pipelines = {}
+_load_errors = {}
+_lock = threading.Lock()
+
+def get_pipeline(name=DEFAULT_MODEL, exclude=None):
+    """Return a process-wide spaCy pipeline, loading it once per worker.
+
+    Raises ImportError if spacy is not installed and OSError if the model
+    cannot be loaded. Failed loads are remembered so they are not retried
+    on every request.
+    """
+    exclude = tuple(UNUSED_COMPONENTS if exclude is None else exclude)
+    key = (name, exclude)
+
+    nlp = _pipelines.get(key)
+    if nlp is not None:
+        return nlp
+
+    with _lock:
+        nlp = _pipelines.get(key)
+        if nlp is not None:
+            return nlp
+
+        if key in _load_errors:
+            raise _load_errors[key]
+
+        try:
+            import spacy
+            logger.info(f"Loading spaCy pipeline '{name}' (excluding: {', '.join(exclude) or 'none'})")
+            nlp = spacy.load(name, exclude=list(exclude))
+        except (ImportError, OSError) as e:
+            _load_errors[key] = e
+            raise
+
+        _pipelines[key] = nlp
+        return nlp
+
+def warm_up(name=DEFAULT_MODEL):
+    """Load the default pipeline and run it once so the first request is not cold."""
+    try:
+        nlp = get_pipeline(name)
+        list(nlp.pipe(["warm up the resume analyzer pipeline"]))
+        logger.info(f"spaCy pipeline '{name}' warmed up")
+        return True
+    except (ImportError, OSError) as e:
+        logger.warning(f"spaCy warm-up skipped: {e}")
+        return False
+
+def clear():
+    """Drop all cached pipelines and remembered load failures."""
+    with _lock:
+        _pipelines.clear()
+        _load_errors.clear()
@@ -0,0 +1,299 @@
+import logging
+import mmap
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from .metrics import Counter, Histogram, register, register_snapshot_source, shared_values
+
+logger = logging.getLogger(__name__)
+
+ENGINE_PAGE_SECONDS = register(Histogram(
+    'pdf_engine_page_seconds',
+    'Extraction time per PDF page, by engine.',
+    ['engine'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+
+ENGINE_SELECTIONS = register(Counter(
+    'pdf_engine_selections_total',
+    'Engines chosen for a document, and engines rejected by the probe for yielding too little text.',
+    ['engine', 'outcome'],
+))
+
+@contextmanager
+def mapped_file(file_path):
+    """Open a PDF as a read-only memory map.
+
+    Parsers read the map straight from the page cache rather than through
+    read() calls into private buffers, and the processes extracting page
+    ranges of one document in parallel share the same physical pages.
+    Empty files, which can't be mapped, are opened normally.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield f
+            return
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+class PdfEngine:
+    """Text extraction backend. Subclasses implement page_count() and _page_texts()."""
+    name = None
+    module = None
+
+    def available(self):
+        try:
+            __import__(self.module)
+            return True
+        except ImportError:
+            return False
+
+    def page_count(self, file_path):
+        raise NotImplementedError
+
+    def _page_texts(self, file_path, first_page, last_page):
+        raise NotImplementedError
+
+    def iter_pages(self, file_path, first_page=1, last_page=None):
+        """Yield the raw text of pages first_page..last_page (1-based, inclusive).
+
+        Yields one entry per page: the text, or None if the page had no text
+        or could not be read.
+        """
+        for page_num, page_text in enumerate(self._page_texts(file_path, first_page, last_page), first_page):
+            if isinstance(page_text, Exception):
+                logger.warning(f"Error extracting text from page {page_num} with {self.name}: {page_text}")
+                yield None
+            elif page_text:
+                logger.info(f"Extracted text from page {page_num}: {len(page_text)} characters")
+                yield page_text
+            else:
+                logger.warning(f"No text found on page {page_num}")
+                yield None
+
+class PdfplumberEngine(PdfEngine):
+    """Layout-aware and the most tolerant of odd PDFs, but the slowest."""
+    name = 'pdfplumber'
+    module = 'pdfplumber'
+
+    def page_count(self, file_path):
+        import pdfplumber
+        with mapped_file(file_path) as data, pdfplumber.open(data) as pdf:
+            return len(pdf.pages)
+
+    def _page_texts(self, file_path, first_page, last_page):
+        import pdfplumber
+        with mapped_file(file_path) as data, pdfplumber.open(data) as pdf:
+            for page in pdf.pages[first_page - 1:last_page]:
+                try:
+                    yield page.extract_text()
+                except Exception as page_error:
+                    yield page_error
+                finally:
+                    # Drop the page's parsed layout so memory stays proportional to one page
+                    page.close()
+
+class PypdfEngine(PdfEngine):
+    """pypdf, or its predecessor PyPDF2 when that is what's installed."""
+    name = 'pypdf'
+    module = 'pypdf'
+
+    def available(self):
+        return self._module() is not None
+
+    def _module(self):
+        for module in ('pypdf', 'PyPDF2'):
+            try:
+                return __import__(module)
+            except ImportError:
+                continue
+        return None
+
+    def page_count(self, file_path):
+        with mapped_file(file_path) as data:
+            return len(self._module().PdfReader(data).pages)
+
+    def _page_texts(self, file_path, first_page, last_page):
+        with mapped_file(file_path) as data:
+            reader = self._module().PdfReader(data)
+            last_page = len(reader.pages) if last_page is None else min(last_page, len(reader.pages))
+            for index in range(first_page - 1, last_page):
+                try:
+                    yield reader.pages[index].extract_text()
+                except Exception as page_error:
+                    yield page_error
+
+class PdfiumEngine(PdfEngine):
+    """pypdfium2 (Chromium's PDFium): native code and usually the fastest.
+
+    Given a path, PDFium does its own file access, so no memory map is used.
+    """
+    name = 'pypdfium2'
+    module = 'pypdfium2'
+
+    def page_count(self, file_path):
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def _page_texts(self, file_path, first_page, last_page):
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            last_page = len(pdf) if last_page is None else min(last_page, len(pdf))
+            for index in range(first_page - 1, last_page):
+                try:
+                    page = pdf[index]
+                    text_page = page.get_textpage()
+                    try:
+                        text = text_page.get_text_range()
+                    finally:
+                        text_page.close()
+                        page.close()
+                    yield text
+                except Exception as page_error:
+                    yield page_error
+        finally:
+            pdf.close()
+
+ENGINES = {engine.name: engine for engine in (PdfiumEngine(), PypdfEngine(), PdfplumberEngine())}
+
+class EngineStats:
+    """Per-engine extraction totals, used to rank engines by speed.
+
+    Each process counts its own extractions and shares them through the
+    metrics snapshots (see utils/metrics.py). Rankings and reports use the
+    totals of every live process, so the web processes learn from what the
+    analysis workers extract.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def _entry(self, name):
+        return self.totals.setdefault(name, {
+            'documents': 0, 'pages': 0, 'seconds': 0.0, 'chars': 0, 'probes': 0, 'rejections': 0,
+        })
+
+    def record_extraction(self, name, pages, seconds, chars):
+        with self.lock:
+            entry = self._entry(name)
+            entry['documents'] += 1
+            entry['pages'] += pages
+            entry['seconds'] += seconds
+            entry['chars'] += chars
+        if pages:
+            ENGINE_PAGE_SECONDS.observe(seconds / pages, engine=name)
+
+    def record_probe(self, name, accepted):
+        with self.lock:
+            entry = self._entry(name)
+            entry['probes'] += 1
+            if not accepted:
+                entry['rejections'] += 1
+        ENGINE_SELECTIONS.inc(engine=name, outcome='selected' if accepted else 'rejected')
+
+    def local_totals(self):
+        """This process's totals only."""
+        with self.lock:
+            return {name: dict(entry) for name, entry in self.totals.items()}
+
+    def combined_totals(self):
+        """Totals of this process plus every other live process sharing metrics snapshots."""
+        combined = self.local_totals()
+        for totals in shared_values('pdf_engines'):
+            for name, entry in totals.items():
+                target = combined.setdefault(name, dict.fromkeys(entry, 0))
+                for key, value in entry.items():
+                    target[key] = target.get(key, 0) + value
+        return combined
+
+    def seconds_per_page(self, name):
+        """Mean extraction time per page, or None before PDF_ENGINE_MIN_SAMPLES pages were seen."""
+        entry = self.combined_totals().get(name)
+        if not entry or entry['pages'] < settings.PDF_ENGINE_MIN_SAMPLES:
+            return None
+        return entry['seconds'] / entry['pages']
+
+    def snapshot(self):
+        stats = self.combined_totals()
+        for entry in stats.values():
+            entry['ms_per_page'] = entry['seconds'] / entry['pages'] * 1000 if entry['pages'] else None
+            entry['chars_per_page'] = entry['chars'] / entry['pages'] if entry['pages'] else None
+        return stats
+
+engine_stats = EngineStats()
+register_snapshot_source('pdf_engines', engine_stats.local_totals)
+
+def get_engine_stats():
+    """Extraction totals and rates per engine over all live processes, plus which engines are installed."""
+    return {
+        'available': [engine.name for engine in candidate_engines()],
+        'engines': engine_stats.snapshot(),
+    }
+
+def candidate_engines():
+    """Installed engines from PDF_ENGINE_ORDER, in the order select_engine() tries them.
+
+    The last configured engine stays last as the fallback. The others are
+    ranked by measured time per page; engines with too few samples to
+    measure go first (in configured order) so they get measured.
+    """
+    names = [name.strip() for name in settings.PDF_ENGINE_ORDER.split(',') if name.strip()]
+    engines = [ENGINES[name] for name in names if name in ENGINES and ENGINES[name].available()]
+    if len(engines) < 2:
+        return engines
+    measured = {engine.name: engine_stats.seconds_per_page(engine.name) for engine in engines[:-1]}
+    ranked = sorted(engines[:-1], key=lambda engine: measured[engine.name] or 0.0)
+    return ranked + engines[-1:]
+
+def _letter_count(text):
+    return sum(char.isalpha() for char in text) if text else 0
+
+def select_engine(file_path):
+    """Pick an engine for a document.
+
+    With PDF_ENGINE set to an engine name that engine is used. With 'auto',
+    each candidate from candidate_engines() extracts the first page (a cheap
+    probe), and the first whose probe yields at least
+    PDF_ENGINE_MIN_PROBE_LETTERS letters wins. Documents that no fast engine
+    reads well, such as scans or PDFs with broken font encodings, end up
+    with the last candidate.
+    """
+    if settings.PDF_ENGINE != 'auto':
+        engine = ENGINES.get(settings.PDF_ENGINE)
+        if engine is None or not engine.available():
+            raise Exception(f"PDF engine '{settings.PDF_ENGINE}' is not available")
+        return engine
+
+    candidates = candidate_engines()
+    if not candidates:
+        raise Exception("No PDF extraction engine is installed")
+
+    for engine in candidates[:-1]:
+        pages = engine._page_texts(file_path, 1, 1)
+        try:
+            probe = next(pages, None)
+        except Exception as probe_error:
+            logger.warning(f"{engine.name} could not open the PDF: {probe_error}")
+            probe = None
+        finally:
+            pages.close()
+        accepted = not isinstance(probe, Exception) and _letter_count(probe) >= settings.PDF_ENGINE_MIN_PROBE_LETTERS
+        engine_stats.record_probe(engine.name, accepted)
+        if accepted:
+            logger.info(f"Selected PDF engine {engine.name}")
+            return engine
+
+    engine = candidates[-1]
+    engine_stats.record_probe(engine.name, True)
+    logger.info(f"Selected PDF engine {engine.name}")
+    return engine
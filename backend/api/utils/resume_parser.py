@@ -1,11 +1,119 @@
-import pdfplumber
 import re
+import time
 import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from .metrics import count_fallback
+from .pdf_engines import ENGINES, candidate_engines, engine_stats, select_engine
 
 logger = logging.getLogger(__name__)
 
+# Runs of whitespace, control, null and non-ASCII characters all collapse to one space
+NORMALIZE_PATTERN = re.compile(r'[^\x21-\x7E]+')
+
+class ResumeParseError(Exception):
+    """The PDF has no usable text; parsing it again gives the same result."""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Return the shared extraction process pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the parent may be a threaded web or queue worker
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _extract_page_range(file_path, first_page, last_page, engine_name):
+    """Extract pages first_page..last_page (1-based, inclusive) in a worker process."""
+    return list(ENGINES[engine_name].iter_pages(file_path, first_page, last_page))
+
+def _extract_pages_parallel(file_path, page_count, engine):
+    """Spread contiguous page ranges over the process pool and join them in page order.
+
+    Returns None if the pool fails, so the caller can extract sequentially.
+    """
+    workers = min(settings.PDF_PARSE_WORKERS, page_count)
+    range_size = math.ceil(page_count / workers)
+    ranges = [
+        (first, min(first + range_size - 1, page_count))
+        for first in range(1, page_count + 1, range_size)
+    ]
+    logger.info(f"Extracting {page_count} pages in parallel across {len(ranges)} ranges")
+    
+    try:
+        pool = _get_pool()
+        futures = [pool.submit(_extract_page_range, file_path, first, last, engine.name) for first, last in ranges]
+        page_texts = []
+        for future in futures:
+            page_texts.extend(future.result())
+        return page_texts
+    except Exception as pool_error:
+        logger.warning(f"Parallel extraction failed: {pool_error}. Falling back to sequential extraction.")
+        _reset_pool()
+        return None
+
+def clean_text(text):
+    """Normalize extracted text in one pass: non-ASCII, null and whitespace runs become single spaces."""
+    return NORMALIZE_PATTERN.sub(' ', text).strip()
+
+def _clean_pages(page_texts, max_chars=None):
+    """Yield cleaned, non-empty page texts, stopping once max_chars characters have been yielded."""
+    remaining = max_chars
+    for page_text in page_texts:
+        if not page_text:
+            continue
+        cleaned = clean_text(page_text)
+        if not cleaned:
+            continue
+        if remaining is not None:
+            cleaned = cleaned[:remaining]
+            remaining -= len(cleaned)
+        yield cleaned
+        if remaining is not None and remaining <= 0:
+            logger.info(f"Stopped extraction at the {max_chars} character budget")
+            return
+
+def _extract_with(engine, file_path, pages_to_read, max_chars):
+    """Extract and clean a document with one engine, recording its timing and yield."""
+    start = time.perf_counter()
+    if pages_to_read >= settings.PDF_PARALLEL_PAGE_THRESHOLD and settings.PDF_PARSE_WORKERS >= 2:
+        page_texts = _extract_pages_parallel(file_path, pages_to_read, engine)
+        if page_texts is not None:
+            parts = list(_clean_pages(page_texts, max_chars))
+            engine_stats.record_extraction(engine.name, pages_to_read, time.perf_counter() - start, sum(map(len, parts)))
+            return parts
+
+    parts = list(_clean_pages(engine.iter_pages(file_path, 1, pages_to_read), max_chars))
+    engine_stats.record_extraction(engine.name, pages_to_read, time.perf_counter() - start, sum(map(len, parts)))
+    return parts
+
 def parse_resume(file_path):
-    """Parse PDF resume and extract text using pdfplumber with improved error handling."""
+    """Parse PDF resume and extract text with the selected PDF engine, with improved error handling."""
+    text, _ = extract_resume(file_path)
+    return text
+
+def extract_resume(file_path):
+    """Extract cleaned text from a PDF resume, returning (text, page_count).
+
+    Extraction stops at the RESUME_MAX_PAGES / RESUME_MAX_CHARS budget when
+    those are set.
+    """
     try:
         logger.info(f"Attempting to parse PDF: {file_path}")
         
@@ -21,64 +129,44 @@ def parse_resume(file_path):
         if file_size == 0:
             raise Exception("File is empty")
         
-        if file_size > 10 * 1024 * 1024:  # 10MB limit
-            raise Exception("File too large (max 10MB)")
+        max_pages = settings.RESUME_MAX_PAGES or None
+        max_chars = settings.RESUME_MAX_CHARS or None
         
-        text = ""
-        page_count = 0
+        engine = select_engine(file_path)
+        page_count = engine.page_count(file_path)
+        pages_to_read = min(page_count, max_pages) if max_pages else page_count
+        logger.info(f"PDF opened successfully with {engine.name}, pages: {page_count}")
         
-        with pdfplumber.open(file_path) as pdf:
-            logger.info(f"PDF opened successfully, pages: {len(pdf.pages)}")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                        page_count += 1
-                        logger.info(f"Extracted text from page {page_num}: {len(page_text)} characters")
-                    else:
-                        logger.warning(f"No text found on page {page_num}")
-                except Exception as page_error:
-                    logger.warning(f"Error extracting text from page {page_num}: {page_error}")
-                    continue
+        parts = _extract_with(engine, file_path, pages_to_read, max_chars)
         
-        if not text.strip():
-            # Try alternative extraction method
-            logger.info("Attempting alternative text extraction...")
-            try:
-                import PyPDF2
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page_num, page in enumerate(pdf_reader.pages):
-                        try:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text += page_text + "\n"
-                        except:
-                            continue
-            except ImportError:
-                logger.warning("PyPDF2 not available for alternative extraction")
-            except Exception as alt_error:
-                logger.warning(f"Alternative extraction failed: {alt_error}")
+        if not parts:
+            # Try the other installed engines
+            for fallback in candidate_engines():
+                if fallback is engine:
+                    continue
+                logger.info(f"Attempting alternative text extraction with {fallback.name}...")
+                count_fallback(f'pdf_engine_{fallback.name}')
+                try:
+                    parts = _extract_with(fallback, file_path, pages_to_read, max_chars)
+                except Exception as alt_error:
+                    logger.warning(f"Alternative extraction failed: {alt_error}")
+                if parts:
+                    break
         
-        # Clean and validate text
-        if text.strip():
-            # Clean text
-            text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-            text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # Remove non-ASCII characters
-            text = text.replace('\x00', ' ')  # Remove null characters
+        # Validate text
+        if parts:
+            text = ' '.join(parts)
             
             logger.info(f"Final extracted text: {len(text)} characters")
             
             if len(text) < 50:
                 raise Exception("Extracted text too short (less than 50 characters). PDF might be image-based or corrupted.")
             
-            return text
+            return text, page_count
         else:
             raise Exception("No readable text found in PDF. The file might be image-based, corrupted, or password-protected.")
             
     except Exception as e:
         error_msg = f"Error parsing resume: {str(e)}"
         logger.error(error_msg)
-        raise Exception(error_msg)
\ No newline at end of file
+        raise ResumeParseError(error_msg)
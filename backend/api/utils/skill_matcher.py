@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+def normalize(text):
+    """Lowercase and collapse whitespace, so phrases match across line breaks."""
+    return ' '.join(text.lower().split())
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of any pattern in one pass over the text.
+
+    Matching cost depends on the length of the text and the number of
+    matches, not on how many patterns were compiled in.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = child
+            self.out[node].append((len(pattern), value))
+
+        # Breadth-first, so every failure target is finished before it's used
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, value) for every pattern occurrence, overlaps included."""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                yield index + 1 - length, index + 1, value
+
+def _on_word_boundaries(text, start, end):
+    # Like regex \b: only checked where the match itself starts or ends with a word character
+    if start > 0 and text[start].isalnum() and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end - 1].isalnum() and text[end].isalnum():
+        return False
+    return True
+
+class PhraseMatcher:
+    """Whole-word phrase matcher returning each phrase's value once, in order of first appearance.
+
+    Overlapping matches are resolved leftmost-longest, so "javascript" is not
+    also reported as "java" and "machine learning" not also as "learning".
+    """
+
+    def __init__(self, phrases):
+        self.automaton = AhoCorasick((normalize(phrase), value) for phrase, value in phrases)
+
+    def find(self, text):
+        text = normalize(text)
+        matches = [
+            match for match in self.automaton.iter_matches(text)
+            if _on_word_boundaries(text, match[0], match[1])
+        ]
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+
+        found = {}
+        covered_until = 0
+        for start, end, value in matches:
+            if start < covered_until:
+                continue
+            found.setdefault(value, None)
+            covered_until = end
+        return tuple(found)
+
+class SkillTaxonomy:
+    """Skills (with synonyms and multi-word phrases) and action verbs, compiled for matching."""
+
+    def __init__(self, skills=(), action_verbs=()):
+        self.categories = {}
+        phrases = []
+        for entry in skills:
+            name = entry['name']
+            self.categories[name] = entry.get('category', '')
+            if entry.get('match_name', True):
+                phrases.append((name, name))
+            phrases.extend((alias, name) for alias in entry.get('aliases', []))
+
+        self.skill_matcher = PhraseMatcher(phrases)
+        self.verb_matcher = PhraseMatcher((verb, verb) for verb in action_verbs)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get('skills', []), data.get('action_verbs', []))
+
+    def find_skills(self, text):
+        """Canonical names of the skills mentioned in a text, in order of first mention."""
+        return self.skill_matcher.find(text)
+
+    def find_action_verbs(self, text):
+        return self.verb_matcher.find(text)
+
+    def __len__(self):
+        return len(self.categories)
+
+_taxonomy = None
+_taxonomy_key = None
+_taxonomy_lock = threading.Lock()
+
+def get_skill_taxonomy():
+    """Return the taxonomy from SKILL_TAXONOMY_PATH, recompiling only when the file changes.
+
+    An unreadable file gives an empty taxonomy, so scoring degrades to
+    keyword overlap instead of failing.
+    """
+    global _taxonomy, _taxonomy_key
+    path = settings.SKILL_TAXONOMY_PATH
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        key = (path, None)
+
+    with _taxonomy_lock:
+        if _taxonomy is None or key != _taxonomy_key:
+            try:
+                _taxonomy = SkillTaxonomy.load(path)
+                logger.info(f"Loaded {len(_taxonomy)} skills from {path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load skill taxonomy from {path}: {e}")
+                _taxonomy = SkillTaxonomy()
+            _taxonomy_key = key
+        return _taxonomy
@@ -0,0 +1,62 @@
+import re
+from collections import Counter
+
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# Same token pattern sklearn's TfidfVectorizer uses by default
+VECTOR_TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
+    'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his',
+    'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy',
+    'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use', 'will', 'with'
+})
+
+class AnalysisDocument:
+    """Resume or job description text, normalized and tokenized once per request.
+
+    Every scoring and feedback stage reads from the same instance instead of
+    lowercasing and re-tokenizing the raw string itself.
+    """
+
+    def __init__(self, text):
+        self.text = text or ''
+        self.lower = self.text.lower()
+        self.tokens = WORD_PATTERN.findall(self.lower)
+        self.term_counts = Counter(self.tokens)
+        self.keywords = frozenset(self.term_counts) - STOP_WORDS
+        self._vector_tokens = None
+        self._skills = None
+        self.spacy_keywords = None
+
+    @property
+    def vector_tokens(self):
+        """Tokens matching the TF-IDF token pattern, computed on first use."""
+        if self._vector_tokens is None:
+            self._vector_tokens = VECTOR_TOKEN_PATTERN.findall(self.lower)
+        return self._vector_tokens
+
+    @property
+    def skills(self):
+        """Taxonomy skills mentioned in the text, in order of first mention, computed on first use."""
+        if self._skills is None:
+            from .skill_matcher import get_skill_taxonomy
+            self._skills = get_skill_taxonomy().find_skills(self.lower)
+        return self._skills
+
+    def preview(self, limit):
+        """Return at most `limit` characters of the original text."""
+        return self.text[:limit]
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return f"<AnalysisDocument {len(self.text)} chars, {len(self.tokens)} tokens>"
+
+def as_document(value):
+    """Wrap raw text in an AnalysisDocument, passing existing documents through."""
+    if isinstance(value, AnalysisDocument):
+        return value
+    return AnalysisDocument(value)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from django.conf import settings
+from .text_document import STOP_WORDS, as_document
+
+logger = logging.getLogger(__name__)
+
+def document_terms(doc):
+    """Terms a document contributes to the corpus model.
+
+    The per-request vectorizers in nlp_analyzer use this as their analyzer
+    too, so every job match score filters the same stop words.
+    """
+    return [token for token in as_document(doc).vector_tokens if token not in STOP_WORDS]
+
+def content_hash(text):
+    """SHA-256 hex digest of a piece of text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def cosine(vec_a, vec_b):
+    """Sparse dot product of two L2-normalized term-weight dicts."""
+    if len(vec_a) > len(vec_b):
+        vec_a, vec_b = vec_b, vec_a
+    return sum(weight * vec_b.get(term, 0.0) for term, weight in vec_a.items())
+
+class CorpusTfidfModel:
+    """TF-IDF weights backed by document frequencies over the stored corpus.
+
+    Unlike a vectorizer fitted on a single resume/job pair, the IDF here comes
+    from every stored resume and job description, and the model can be grown
+    incrementally with add_document() instead of being refitted from scratch.
+    """
+
+    # Hashes of the most recently added job descriptions, kept so a description
+    # shared by many analyses is counted once without the file growing forever
+    MAX_JOB_HASHES = 10000
+
+    def __init__(self, doc_freq=None, n_docs=0, last_analysis_id=0, job_hashes=None):
+        self.doc_freq = Counter(doc_freq or {})
+        self.n_docs = n_docs
+        self.last_analysis_id = last_analysis_id
+        self.job_hashes = OrderedDict.fromkeys(list(job_hashes or ())[-self.MAX_JOB_HASHES:])
+
+    def add_document(self, doc):
+        """Count the distinct terms of one document."""
+        self.doc_freq.update(set(document_terms(doc)))
+        self.n_docs += 1
+
+    def add_job_description(self, text):
+        """Count a job description unless it was added recently. Returns True if it was counted."""
+        key = content_hash(text)
+        if key in self.job_hashes:
+            self.job_hashes.move_to_end(key)
+            return False
+        self.add_document(text)
+        self.job_hashes[key] = None
+        while len(self.job_hashes) > self.MAX_JOB_HASHES:
+            self.job_hashes.popitem(last=False)
+        return True
+
+    def idf(self, term):
+        # Smoothed IDF, matching sklearn's TfidfVectorizer(smooth_idf=True)
+        return math.log((1 + self.n_docs) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def transform(self, doc):
+        """Return the L2-normalized TF-IDF vector of a document as {term: weight}."""
+        counts = Counter(document_terms(doc))
+        vector = {term: count * self.idf(term) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def to_dict(self):
+        return {
+            'n_docs': self.n_docs,
+            'last_analysis_id': self.last_analysis_id,
+            'doc_freq': dict(self.doc_freq),
+            'job_hashes': list(self.job_hashes),  # Oldest first
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            doc_freq=data.get('doc_freq'),
+            n_docs=data.get('n_docs', 0),
+            last_analysis_id=data.get('last_analysis_id', 0),
+            job_hashes=data.get('job_hashes'),
+        )
+
+    def save(self, path):
+        """Write the model atomically so running workers never read a partial file."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+_lock = threading.Lock()
+_model = None
+_model_mtime = None
+_job_vectors = OrderedDict()
+
+def get_corpus_model():
+    """Return the persisted corpus model, or None if it is missing or too small.
+
+    The file is re-read when its modification time changes, so a refit done
+    by the management command is picked up without restarting workers.
+    """
+    global _model, _model_mtime
+
+    path = settings.TFIDF_MODEL_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _lock:
+        if _model is None or mtime != _model_mtime:
+            try:
+                _model = CorpusTfidfModel.load(path)
+                _model_mtime = mtime
+                _job_vectors.clear()
+                logger.info(f"Loaded TF-IDF corpus model: {_model.n_docs} documents, {len(_model.doc_freq)} terms")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load TF-IDF corpus model: {e}")
+                _model = None
+                return None
+
+        if _model.n_docs < settings.TFIDF_MIN_DOCUMENTS:
+            return None
+        return _model
+
+def get_job_vector(model, job_doc):
+    """Return the cached TF-IDF vector of a job description, keyed by content hash."""
+    job_doc = as_document(job_doc)
+    key = content_hash(job_doc.text)
+
+    with _lock:
+        vector = _job_vectors.get(key)
+        if vector is not None:
+            _job_vectors.move_to_end(key)
+            return vector
+
+    vector = model.transform(job_doc)
+
+    with _lock:
+        _job_vectors[key] = vector
+        _job_vectors.move_to_end(key)
+        while len(_job_vectors) > settings.TFIDF_JOB_VECTOR_CACHE_SIZE:
+            _job_vectors.popitem(last=False)
+    return vector
@@ -1,18 +1,36 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.authentication import SessionAuthentication
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.middleware.csrf import get_token
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from .models import ResumeAnalysis
-from .serializers import ResumeAnalysisSerializer, UserSerializer
-from .utils.resume_parser import parse_resume
-from .utils.nlp_analyzer import calculate_ats_score, calculate_job_match_score
-from .utils.ai_feedback import generate_feedback
+from .serializers import ResumeAnalysisSerializer, ResumeAnalysisSummarySerializer, UserSerializer
+from .pagination import AnalysisHistoryPagination
+from .exports import EXPORT_FORMATS, aiterate, export_chunks, parse_date_filters, parse_fields
+from .permissions import HasMetricsToken
+from .authentication import SignedTokenAuthentication
+from .tokens import InvalidToken, issue_tokens, refresh_access_token, revoke_tokens
+from .jobs import check_queue_admission, enqueue_analysis
+from .pipeline import run_analysis, stage_progress
+from .resume_cache import hash_file, get_uploaded_resume_text
+from .user_cache import get_cached_history, history_key, store_history
+from .utils.nlp_analyzer import score_resume_against_jobs
+from .search_index import search_resumes
+from .utils.admission import AdmissionRejected, get_admission_gate
+from .utils.ai_feedback import get_feedback_cache_stats
+from .utils.metrics import render_metrics, time_stage
+from .utils.pdf_engines import get_engine_stats
 import json
 import traceback
 import logging
@@ -28,9 +46,24 @@ class CSRFTokenView(APIView):
         token = get_token(request)
         return Response({'csrfToken': token})
 
+def _account_response(user, status_code):
+    data = {
+        'success': True,
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email
+        }
+    }
+    if settings.API_TOKENS_ENABLED:
+        data['tokens'] = issue_tokens(user)
+    return Response(data, status=status_code)
+
 class LoginView(APIView):
     """Handle user login."""
     permission_classes = [AllowAny]
+    # A client holding an expired access token must still be able to log in
+    authentication_classes = [SessionAuthentication]
     
     def post(self, request):
         username = request.data.get('username')
@@ -40,14 +73,7 @@ class LoginView(APIView):
             user = authenticate(request, username=username, password=password)
             if user:
                 login(request, user)
-                return Response({
-                    'success': True,
-                    'user': {
-                        'id': user.id,
-                        'username': user.username,
-                        'email': user.email
-                    }
-                }, status=status.HTTP_200_OK)
+                return _account_response(user, status.HTTP_200_OK)
             else:
                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         return Response({'error': 'Username and password required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -55,6 +81,7 @@ class LoginView(APIView):
 class SignupView(APIView):
     """Handle user registration."""
     permission_classes = [AllowAny]
+    authentication_classes = [SessionAuthentication]
     
     def post(self, request):
         username = request.data.get('username')
@@ -73,21 +100,35 @@ class SignupView(APIView):
         try:
             user = User.objects.create_user(username=username, email=email, password=password)
             login(request, user)
-            return Response({
-                'success': True,
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email
-                }
-            }, status=status.HTTP_201_CREATED)
+            return _account_response(user, status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': 'Error creating user'}, status=status.HTTP_400_BAD_REQUEST)
 
+class TokenRefreshView(APIView):
+    """Exchange a refresh token for a new access token."""
+    permission_classes = [AllowAny]
+    # The refresh token is the credential; an expired access token in the header is ignored
+    authentication_classes = []
+    
+    def post(self, request):
+        if not settings.API_TOKENS_ENABLED:
+            return Response({'error': 'API tokens are disabled'}, status=status.HTTP_404_NOT_FOUND)
+        
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({'error': 'Refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            return Response(refresh_access_token(refresh))
+        except InvalidToken as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
 class LogoutView(APIView):
-    """Handle user logout."""
+    """Handle user logout. Logging out with a token revokes every token of the user."""
     
     def post(self, request):
+        if isinstance(request.successful_authenticator, SignedTokenAuthentication):
+            revoke_tokens(request.user)
         logout(request)
         return Response({'success': True}, status=status.HTTP_200_OK)
 
@@ -129,16 +170,28 @@ class UserProfileView(APIView):
         
         return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+def _busy_response(rejected):
+    return Response({
+        'error': 'The analyzer is busy, please try again shortly.',
+        'retry_after': rejected.retry_after,
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(rejected.retry_after)})
+
 class ResumeUploadView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         try:
             resume_file = request.FILES.get('resume')
+            
+            # Set by ResumeUploadHandler when it stopped the upload mid-stream
+            rejected = getattr(request, 'resume_upload_rejected', None)
+            if rejected:
+                return Response({'error': rejected.message}, status=rejected.status_code)
+            
             if not resume_file:
                 return Response({'error': 'Resume file is required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            if not resume_file.name.endswith('.pdf'):
+            if not resume_file.name.lower().endswith('.pdf'):
                 return Response({'error': 'Only PDF files are supported'}, status=status.HTTP_400_BAD_REQUEST)
             
             job_description = request.data.get('job_description')
@@ -149,79 +202,56 @@ class ResumeUploadView(APIView):
             analysis = ResumeAnalysis(
                 user=request.user,
                 resume_file=resume_file,
+                resume_name=resume_file.name,
                 job_description=job_description,
                 ats_score=0.0,
                 job_match_score=0.0,
-                feedback="Analyzing..."
+                feedback="Analyzing...",
+                status=ResumeAnalysis.STATUS_PENDING,
+                content_hash=getattr(request, 'resume_upload_hash', None) or hash_file(resume_file)
             )
-            analysis.save()
             
-            try:
-                # Step 1: Parse resume
-                logger.info(f"Parsing resume: {analysis.resume_file.path}")
-                resume_text = parse_resume(analysis.resume_file.path)
-                logger.info(f"Resume text extracted: {len(resume_text)} characters")
-                
-                if not resume_text or len(resume_text.strip()) < 50:
-                    raise Exception("Resume text extraction failed or text too short")
-                
-                # Step 2: Calculate ATS score
-                logger.info("Calculating ATS score")
-                ats_score = calculate_ats_score(resume_text, job_description)
-                logger.info(f"ATS score calculated: {ats_score}")
-                
-                # Step 3: Calculate job match score
-                logger.info("Calculating job match score")
-                job_match_score = calculate_job_match_score(resume_text, job_description)
-                logger.info(f"Job match score calculated: {job_match_score}")
-                
-                # Step 4: Generate feedback (with fallback)
-                logger.info("Generating AI feedback")
+            if settings.ANALYSIS_ASYNC:
+                # Refuse uploads the workers can't get to soon, before storing anything
                 try:
-                    feedback = generate_feedback(resume_text, job_description, ats_score, job_match_score)
-                except Exception as feedback_error:
-                    logger.warning(f"AI feedback generation failed: {feedback_error}")
-                    # Fallback feedback
-                    feedback = f"""
-Based on your resume analysis:
-
-• ATS Score: {ats_score:.1f}% - {"Good" if ats_score > 70 else "Needs improvement"}
-• Job Match Score: {job_match_score:.1f}% - {"Good match" if job_match_score > 70 else "Could be improved"}
-
-General Suggestions:
-• Include more relevant keywords from the job description
-• Ensure your resume follows a clean, ATS-friendly format
-• Highlight specific achievements and quantifiable results
-• Tailor your experience section to match job requirements
-• Consider adding relevant skills mentioned in the job posting
-
-Note: AI-powered detailed feedback is temporarily unavailable.
-                    """.strip()
+                    check_queue_admission(request.user.id)
+                except AdmissionRejected as rejected:
+                    return _busy_response(rejected)
                 
-                # Update analysis
-                analysis.ats_score = ats_score
-                analysis.job_match_score = job_match_score
-                analysis.feedback = feedback
-                analysis.save()
-                
-                logger.info("Analysis completed successfully")
+                # Hand the pipeline to the queue workers and return straight away
+                with time_stage('upload_save'), transaction.atomic():
+                    analysis.save()
+                    enqueue_analysis(analysis)
+                logger.info(f"Analysis {analysis.id} queued")
                 serializer = ResumeAnalysisSerializer(analysis)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-                
-            except Exception as processing_error:
-                logger.error(f"Processing error: {processing_error}")
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                
-                # Update analysis with error info
-                analysis.ats_score = 0.0
-                analysis.job_match_score = 0.0
-                analysis.feedback = f"Analysis failed: {str(processing_error)}"
-                analysis.save()
+                return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+            
+            # Wait for an analysis slot before storing anything, so rejected uploads leave no rows behind
+            try:
+                slot = get_admission_gate().acquire(request.user.id)
+            except AdmissionRejected as rejected:
+                return _busy_response(rejected)
+            
+            try:
+                with time_stage('upload_save'):
+                    analysis.save()
                 
-                return Response({
-                    'error': f'Analysis processing failed: {str(processing_error)}',
-                    'details': 'Please check if the PDF is readable and try again.'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                try:
+                    run_analysis(analysis)
+                    serializer = ResumeAnalysisSerializer(analysis)
+                    return Response(serializer.data, status=status.HTTP_201_CREATED)
+                    
+                except Exception as processing_error:
+                    logger.error(f"Processing error: {processing_error}")
+                    logger.error(f"Traceback: {traceback.format_exc()}")
+                    
+                    return Response({
+                        'error': f'Analysis processing failed: {str(processing_error)}',
+                        'details': 'Please check if the PDF is readable and try again.'
+                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            
+            finally:
+                slot.release()
                 
         except Exception as e:
             logger.error(f"Upload error: {e}")
@@ -232,9 +262,206 @@ Note: AI-powered detailed feedback is temporarily unavailable.
             }, status=status.HTTP_400_BAD_REQUEST)
 
 class AnalysisHistoryView(APIView):
+    """List a user's analyses as paginated summaries."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        # Pages are cached per user until one of the user's analyses changes (api/signals.py)
+        cache_key = history_key(request.user.id, request.build_absolute_uri())
+        cached = get_cached_history(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        analyses = ResumeAnalysis.objects.filter(user=request.user).only(
+            'id', 'status', 'ats_score', 'job_match_score', 'resume_file', 'resume_name', 'created_at'
+        )
+        paginator = AnalysisHistoryPagination()
+        page = paginator.paginate_queryset(analyses, request, view=self)
+        serializer = ResumeAnalysisSummarySerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        store_history(cache_key, response.data)
+        return response
+
+class AnalysisExportView(APIView):
+    """Stream a user's analyses as NDJSON or CSV.
+    
+    Query parameters: `output` (ndjson or csv), `fields` (comma-separated
+    columns from EXPORT_FIELDS) and `from` / `to` (ISO dates or datetimes).
+    Rows are read with a server-side cursor and written in chunks, so memory
+    use doesn't grow with the number of analyses.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        analyses = ResumeAnalysis.objects.filter(user=request.user).order_by('-created_at')
-        serializer = ResumeAnalysisSerializer(analyses, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+            date_filters = parse_date_filters(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        chunk_size = settings.HISTORY_EXPORT_CHUNK_SIZE
+        rows = (
+            ResumeAnalysis.objects.filter(user=request.user, **date_filters)
+            .order_by('-created_at', '-id')
+            .values_list(*fields)
+            .iterator(chunk_size=chunk_size)
+        )
+        chunks = export_chunks(rows, fields, output, chunk_size)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiterate(chunks)
+        
+        content_type, extension = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="analysis-history.{extension}"'
+        return response
+
+class AnalysisStatusView(APIView):
+    """Report the status and per-stage progress of an analysis."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        analysis = get_object_or_404(
+            ResumeAnalysis.objects.only('id', 'user_id', 'status', 'stage'),
+            pk=pk, user=request.user
+        )
+        return Response({
+            'id': analysis.id,
+            'status': analysis.status,
+            'stage': analysis.stage,
+            **stage_progress(analysis)
+        })
+
+class AnalysisDetailView(APIView):
+    """Return the full record of a single analysis."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        analysis = get_object_or_404(ResumeAnalysis, pk=pk, user=request.user)
+        serializer = ResumeAnalysisSerializer(analysis)
+        return Response(serializer.data)
+
+class BatchScoreView(APIView):
+    """Score one resume against many job descriptions in a single request."""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        resume_file = request.FILES.get('resume')
+        
+        rejected = getattr(request, 'resume_upload_rejected', None)
+        if rejected:
+            return Response({'error': rejected.message}, status=rejected.status_code)
+        
+        if not resume_file:
+            return Response({'error': 'Resume file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Accept either repeated form fields or a JSON-encoded list
+        job_descriptions = request.data.getlist('job_descriptions') if hasattr(request.data, 'getlist') else request.data.get('job_descriptions')
+        if isinstance(job_descriptions, list) and len(job_descriptions) == 1:
+            try:
+                decoded = json.loads(job_descriptions[0])
+                if isinstance(decoded, list):
+                    job_descriptions = decoded
+            except ValueError:
+                pass
+        
+        if not isinstance(job_descriptions, list):
+            return Response({'error': 'job_descriptions must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job_descriptions = [jd for jd in job_descriptions if isinstance(jd, str) and jd.strip()]
+        if not job_descriptions:
+            return Response({'error': 'At least one job description is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(job_descriptions) > settings.BATCH_MAX_JOB_DESCRIPTIONS:
+            return Response({
+                'error': f'At most {settings.BATCH_MAX_JOB_DESCRIPTIONS} job descriptions per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Parsing and scoring take an analysis slot like an inline upload does
+        try:
+            slot = get_admission_gate().acquire(request.user.id)
+        except AdmissionRejected as rejected:
+            return _busy_response(rejected)
+        
+        try:
+            try:
+                resume_text = get_uploaded_resume_text(resume_file, getattr(request, 'resume_upload_hash', None))
+            except Exception as e:
+                logger.error(f"Batch scoring parse error: {e}")
+                return Response({
+                    'error': f'Analysis processing failed: {str(e)}',
+                    'details': 'Please check if the PDF is readable and try again.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            results = score_resume_against_jobs(resume_text, job_descriptions)
+        finally:
+            slot.release()
+        
+        for rank, result in enumerate(results, 1):
+            result['rank'] = rank
+            result['job_description'] = job_descriptions[result['index']][:200]
+        
+        return Response({'count': len(results), 'results': results})
+
+class ResumeSearchView(APIView):
+    """Find the stored resumes that best match a job description."""
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        job_description = request.data.get('job_description')
+        if not job_description:
+            return Response({'error': 'Job description is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            k = int(request.data.get('k', 10))
+        except (TypeError, ValueError):
+            return Response({'error': 'k must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        k = max(1, min(k, settings.SEARCH_MAX_RESULTS))
+        
+        matches = search_resumes(job_description, k=k)
+        analyses = ResumeAnalysis.objects.select_related('user').only(
+            'id', 'created_at', 'resume_file', 'resume_name', 'user__id', 'user__username', 'user__email'
+        ).in_bulk([analysis_id for analysis_id, _ in matches])
+        
+        results = []
+        for rank, (analysis_id, score) in enumerate(matches, 1):
+            analysis = analyses.get(analysis_id)
+            if analysis is None:
+                continue
+            results.append({
+                'rank': rank,
+                'analysis_id': analysis_id,
+                'score': score * 100,
+                'user': UserSerializer(analysis.user).data,
+                'resume_file': analysis.resume_file.name,
+                'resume_name': analysis.resume_name,
+                'created_at': analysis.created_at,
+            })
+        
+        return Response({'count': len(results), 'results': results})
+
+class FeedbackCacheStatsView(APIView):
+    """Report hit and miss counts of the LLM feedback cache, summed over the live processes."""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(get_feedback_cache_stats())
+
+class PdfEngineStatsView(APIView):
+    """Report per-engine PDF extraction timings and text yield, summed over the live processes."""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(get_engine_stats())
+
+class MetricsView(APIView):
+    """Expose the metrics of every live process on this host in the Prometheus text format."""
+    permission_classes = [HasMetricsToken | IsAdminUser]
+    # The bearer header here carries METRICS_TOKEN, not an API token
+    authentication_classes = [SessionAuthentication]
+    
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
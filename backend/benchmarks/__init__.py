@@ -0,0 +1 @@
+"""Benchmarks for the resume analysis pipeline. Run with `python -m benchmarks.run`."""
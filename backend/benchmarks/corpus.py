@@ -0,0 +1,132 @@
+"""Deterministic synthetic resumes (as PDFs) and job descriptions.
+
+The PDFs are written by hand rather than with a PDF library, so the corpus
+only depends on the seed: the same seed always produces byte-identical files.
+"""
+import random
+
+SKILLS = [
+    'python', 'django', 'javascript', 'react', 'sql', 'postgresql', 'docker', 'kubernetes',
+    'aws', 'azure', 'git', 'linux', 'java', 'node', 'typescript', 'redis', 'graphql', 'rest',
+    'machine learning', 'data analysis', 'pandas', 'numpy', 'tensorflow', 'agile', 'scrum',
+    'ci/cd', 'terraform', 'kafka', 'spark', 'html', 'css', 'testing', 'microservices',
+]
+
+VERBS = [
+    'Developed', 'Led', 'Designed', 'Built', 'Implemented', 'Optimized', 'Migrated',
+    'Automated', 'Maintained', 'Delivered', 'Improved', 'Managed', 'Launched',
+]
+
+DUTIES = ['build', 'own', 'design', 'scale', 'maintain', 'improve', 'operate']
+
+OBJECTS = [
+    'a customer-facing web application', 'the payments service', 'internal reporting dashboards',
+    'a data pipeline processing daily events', 'the search backend', 'an onboarding workflow',
+    'deployment tooling for the platform team', 'a recommendation engine', 'REST APIs for partners',
+]
+
+OUTCOMES = [
+    'reducing latency by {n}%', 'serving {n}k daily users', 'cutting costs by {n}%',
+    'improving conversion by {n}%', 'with {n}% test coverage', 'across {n} teams',
+]
+
+SECTIONS = ['Summary', 'Experience', 'Projects', 'Education', 'Skills', 'Certifications']
+
+LINES_PER_PAGE = 45
+
+def _sentence(rng):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+    skills = ', '.join(rng.sample(SKILLS, 3))
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {skills}, {outcome}."
+
+def resume_lines(rng, pages):
+    """Text lines for a resume of the given number of pages."""
+    lines = [
+        f"Candidate {rng.randint(1000, 9999)}",
+        f"candidate{rng.randint(1, 999)}@example.com | (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+    ]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append('')
+        lines.append(rng.choice(SECTIONS))
+        for _ in range(rng.randint(4, 10)):
+            lines.append(_sentence(rng))
+    return lines[:pages * LINES_PER_PAGE]
+
+def job_description(rng, sentences):
+    """A job description of roughly `sentences` sentences."""
+    wanted = rng.sample(SKILLS, min(len(SKILLS), 4 + sentences // 2))
+    parts = [f"We are hiring an engineer with experience in {', '.join(wanted)}."]
+    for _ in range(sentences - 1):
+        parts.append(
+            f"You will {rng.choice(DUTIES)} {rng.choice(OBJECTS)} "
+            f"and work with {rng.choice(wanted)} and {rng.choice(wanted)}."
+        )
+    return ' '.join(parts)
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_pdf(lines, lines_per_page=LINES_PER_PAGE):
+    """Return the bytes of a minimal text PDF with one Helvetica line per entry."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    n_pages = len(pages)
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for index, page_lines in enumerate(pages):
+        page_id = 4 + index * 2
+        content_id = page_id + 1
+        kids.append(f"{page_id} 0 R")
+
+        commands = ["BT", "/F1 10 Tf", "14 TL", "50 760 Td"]
+        for line in page_lines:
+            commands.append(f"({_escape(line)}) Tj T*")
+        commands.append("ET")
+        stream = '\n'.join(commands).encode('latin-1', 'replace')
+
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {n_pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for obj_id in range(1, size):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset)
+    return bytes(out)
+
+def generate_corpus(seed=0, page_counts=(1, 2, 5, 10, 20, 30), per_size=3,
+                    job_lengths=(3, 10, 30)):
+    """Build the benchmark corpus.
+
+    Returns (resumes, job_descriptions): resumes is a list of dicts with
+    `name`, `pages`, `pdf` (bytes) and `text` (the lines that were written),
+    job_descriptions is a list of strings, one per entry of `job_lengths`.
+    """
+    rng = random.Random(seed)
+    resumes = []
+    for pages in page_counts:
+        for copy in range(per_size):
+            lines = resume_lines(rng, pages)
+            resumes.append({
+                'name': f"resume_{pages:02d}p_{copy}.pdf",
+                'pages': pages,
+                'pdf': build_pdf(lines),
+                'text': '\n'.join(lines),
+            })
+    job_descriptions = [job_description(rng, sentences) for sentences in job_lengths]
+    return resumes, job_descriptions
@@ -0,0 +1,77 @@
+"""Latency summaries, peak memory and baseline comparison for benchmark reports."""
+import json
+import platform
+import resource
+import sys
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(timings, items=None):
+    """Summarize wall-clock timings (seconds) of one benchmark.
+
+    `items` is how many units of work the timings cover (defaults to one per
+    timing) and is used for throughput.
+    """
+    total = sum(timings)
+    items = len(timings) if items is None else items
+    return {
+        'runs': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(total / len(timings) * 1000, 3) if timings else 0.0,
+        'throughput_per_s': round(items / total, 3) if total else 0.0,
+    }
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its finished child processes, in MB."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {'self': round(own, 1), 'children': round(children, 1)}
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(report, baseline, threshold=0.10):
+    """Compare p50/p95 latencies against a baseline report.
+
+    Returns a list of rows (benchmark, metric, baseline, current, change)
+    and whether any metric got slower by more than `threshold`.
+    """
+    rows = []
+    regressed = False
+    for name, result in report['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            before, after = previous[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            if change > threshold:
+                regressed = True
+            rows.append((name, metric, before, after, change))
+    return rows, regressed
+
+def format_comparison(rows, threshold=0.10):
+    lines = [f"{'benchmark':<40} {'metric':<7} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for name, metric, before, after, change in rows:
+        flag = '  <-- slower' if change > threshold else ''
+        lines.append(f"{name:<40} {metric:<7} {before:>10.2f} {after:>10.2f} {change:>+7.1%}{flag}")
+    return '\n'.join(lines)
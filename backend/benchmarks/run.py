@@ -0,0 +1,198 @@
+"""Run the benchmark suite and write a JSON report.
+
+    cd backend
+    python -m benchmarks.run --output var/benchmarks/latest.json
+    python -m benchmarks.run --baseline var/benchmarks/baseline.json --fail-on-regression
+
+Stage microbenchmarks time parse_resume, calculate_ats_score,
+calculate_job_match_score, generate_fallback_feedback and generate_feedback
+(against a local stub LLM). The end-to-end benchmark posts each synthetic
+resume to ResumeUploadView with analysis running inline, against a scratch
+SQLite database. Caches are cleared before every timed call unless --warm
+is given, so numbers reflect the cold path.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from .corpus import generate_corpus
+from .report import compare, environment, format_comparison, load_report, peak_rss_mb, summarize
+from .stub_llm import start_stub_llm
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the resume analysis pipeline.')
+    parser.add_argument('--output', default='var/benchmarks/latest.json', help='Where to write the JSON report')
+    parser.add_argument('--baseline', help='Report to compare p50/p95 latencies against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown that counts as a regression (default 0.10)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on a regression')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the corpus per benchmark')
+    parser.add_argument('--only', choices=['stages', 'e2e'], help='Run only one group of benchmarks')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Stub LLM response delay in milliseconds')
+    parser.add_argument('--warm', action='store_true', help='Keep parse and feedback caches between calls')
+    return parser.parse_args(argv)
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def _clear_caches(warm):
+    from django.conf import settings
+    from django.core.cache import caches
+    from api.models import ParsedResume
+
+    if warm:
+        return
+    caches[settings.FEEDBACK_CACHE_ALIAS].clear()
+    ParsedResume.objects.all().delete()
+
+def bench_stages(resumes, job_descriptions, work_dir, repeat, warm):
+    from api.utils.ai_feedback import generate_fallback_feedback, generate_feedback
+    from api.utils.nlp_analyzer import calculate_ats_score, calculate_job_match_score
+    from api.utils.resume_parser import parse_resume
+
+    results = {}
+
+    by_pages = {}
+    for resume in resumes:
+        path = work_dir / resume['name']
+        path.write_bytes(resume['pdf'])
+        by_pages.setdefault(resume['pages'], []).append(path)
+
+    for pages, paths in sorted(by_pages.items()):
+        timings = []
+        for _ in range(repeat):
+            for path in paths:
+                elapsed, _ = _timed(parse_resume, str(path))
+                timings.append(elapsed)
+        results[f'parse_resume/{pages:02d}_pages'] = summarize(timings)
+
+    pairs = [(resume['text'], job) for resume in resumes for job in job_descriptions]
+    for name, func in (
+        ('calculate_ats_score', calculate_ats_score),
+        ('calculate_job_match_score', calculate_job_match_score),
+    ):
+        timings = []
+        for _ in range(repeat):
+            for resume_text, job in pairs:
+                elapsed, _ = _timed(func, resume_text, job)
+                timings.append(elapsed)
+        results[name] = summarize(timings)
+
+    timings = []
+    for _ in range(repeat):
+        for resume_text, job in pairs:
+            elapsed, _ = _timed(generate_fallback_feedback, resume_text, job, 72.0, 64.0)
+            timings.append(elapsed)
+    results['generate_fallback_feedback'] = summarize(timings)
+
+    timings = []
+    for _ in range(repeat):
+        for resume_text, job in pairs:
+            _clear_caches(warm)
+            elapsed, _ = _timed(generate_feedback, resume_text, job, 72.0, 64.0)
+            timings.append(elapsed)
+    results['generate_feedback/stub_llm'] = summarize(timings)
+
+    return results
+
+def bench_upload(resumes, job_descriptions, repeat, warm):
+    from django.contrib.auth.models import User
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from api.views import ResumeUploadView
+
+    user, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+    factory = APIRequestFactory()
+    view = ResumeUploadView.as_view()
+
+    timings = []
+    errors = 0
+    for _ in range(repeat):
+        for index, resume in enumerate(resumes):
+            _clear_caches(warm)
+            request = factory.post('/api/upload/', {
+                'resume': SimpleUploadedFile(resume['name'], resume['pdf'], content_type='application/pdf'),
+                'job_description': job_descriptions[index % len(job_descriptions)],
+            }, format='multipart')
+            force_authenticate(request, user=user)
+
+            elapsed, response = _timed(view, request)
+            if response.status_code != 201:
+                errors += 1
+            timings.append(elapsed)
+
+    result = summarize(timings)
+    result['errors'] = errors
+    return {'upload/e2e': result}
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The stub must be listening before settings read OPENROUTER_BASE_URL
+    server, base_url = start_stub_llm(latency=args.llm_latency / 1000)
+    os.environ['OPENROUTER_BASE_URL'] = base_url
+    os.environ['OPENROUTER_API_KEY'] = 'benchmark'
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from api.utils.nlp_models import warm_up
+
+    call_command('migrate', verbosity=0)
+    warm_up()
+
+    work_dir = Path(settings.BENCH_WORK_DIR) / 'corpus'
+    work_dir.mkdir(parents=True, exist_ok=True)
+    resumes, job_descriptions = generate_corpus(seed=args.seed)
+
+    benchmarks = {}
+    try:
+        if args.only in (None, 'stages'):
+            benchmarks.update(bench_stages(resumes, job_descriptions, work_dir, args.repeat, args.warm))
+        if args.only in (None, 'e2e'):
+            benchmarks.update(bench_upload(resumes, job_descriptions, args.repeat, args.warm))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'warm': args.warm,
+            'llm_latency_ms': args.llm_latency,
+            'resumes': len(resumes),
+            'job_descriptions': len(job_descriptions),
+            'environment': environment(),
+        },
+        'benchmarks': benchmarks,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for name, result in benchmarks.items():
+        print(f"{name:<40} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"{result['throughput_per_s']:>8.2f}/s")
+    print(f"Peak RSS: {report['peak_rss_mb']['self']} MB (children {report['peak_rss_mb']['children']} MB)")
+    print(f"Report written to {output}")
+
+    if args.baseline:
+        rows, regressed = compare(report, load_report(args.baseline), args.threshold)
+        print()
+        print(format_comparison(rows, args.threshold))
+        if regressed and args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
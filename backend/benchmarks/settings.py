@@ -0,0 +1,37 @@
+"""Settings for benchmark runs: SQLite and media in a scratch directory, analysis inline."""
+import os
+import tempfile
+from resume_analyzer.settings import *  # noqa: F401,F403
+
+BENCH_WORK_DIR = os.getenv('BENCH_WORK_DIR') or tempfile.mkdtemp(prefix='resume-bench-')
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BENCH_WORK_DIR, 'bench.sqlite3'),
+    }
+}
+
+MEDIA_ROOT = os.path.join(BENCH_WORK_DIR, 'media')
+TFIDF_MODEL_PATH = os.path.join(BENCH_WORK_DIR, 'tfidf_model.json')
+METRICS_DIR = os.path.join(BENCH_WORK_DIR, 'metrics')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    FEEDBACK_CACHE_ALIAS: {  # noqa: F405
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-feedback',
+    },
+    USER_CACHE_ALIAS: {  # noqa: F405
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-users',
+    },
+}
+
+# Uploads are measured end to end, so run the pipeline inside the request
+ANALYSIS_ASYNC = False
+# The runner warms spaCy itself, before anything is timed
+NLP_WARMUP = False
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,43 @@
+"""Local stand-in for the chat-completions provider, so benchmarks never call the real API."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_FEEDBACK = (
+    "1. Overall assessment: solid technical background.\n"
+    "2. Strengths: relevant experience and measurable results.\n"
+    "3. Areas for improvement: mirror more of the job description's keywords.\n"
+    "4. Specific recommendations: quantify impact in every role.\n"
+    "5. Keywords to add: see the job description."
+)
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+
+        body = json.dumps({
+            'choices': [{'message': {'role': 'assistant', 'content': STUB_FEEDBACK}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_llm(latency=0.0):
+    """Serve the stub on a free local port in a daemon thread; returns (server, base_url)."""
+    handler = type('StubLLMHandler', (StubLLMHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
@@ -24,12 +24,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.SlidingSessionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +88,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -93,11 +96,40 @@ REST_FRAMEWORK = {
     ],
 }
 
-# Session configuration
+# Session configuration. Sessions live in a signed cookie by default, so reading or
+# extending one never touches the database; set SESSION_ENGINE to
+# 'django.contrib.sessions.backends.cache' to keep them in SESSION_CACHE_ALIAS instead.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.signed_cookies')
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
-SESSION_SAVE_EVERY_REQUEST = True
+# Sliding expiry: SlidingSessionMiddleware re-saves an active session (pushing its expiry
+# out to SESSION_COOKIE_AGE) at most once per SESSION_REFRESH_INTERVAL seconds
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '3600'))
+
+# ModelBackend that loads the session's user from USER_CACHE_ALIAS instead of the database
+AUTHENTICATION_BACKENDS = ['api.backends.CachedModelBackend']
+
+# API tokens: login and signup also return a signed access token (sent as
+# `Authorization: Bearer <token>`) and a refresh token for `/api/token/refresh/`.
+# Token users are cached in each process for TOKEN_USER_CACHE_TTL seconds, which is
+# how long a revocation made by another process can take to apply there.
+API_TOKENS_ENABLED = os.getenv('API_TOKENS_ENABLED', 'True') == 'True'
+ACCESS_TOKEN_TTL = int(os.getenv('ACCESS_TOKEN_TTL', '900'))  # 15 minutes
+REFRESH_TOKEN_TTL = int(os.getenv('REFRESH_TOKEN_TTL', str(7 * 24 * 3600)))
+TOKEN_USER_CACHE_TTL = int(os.getenv('TOKEN_USER_CACHE_TTL', '30'))
+TOKEN_USER_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_USER_CACHE_MAX_ENTRIES', '1024'))
+
+# Resume uploads are validated while streaming by ResumeUploadHandler. Accepted
+# resumes stay in memory until the analysis is saved, so rejected uploads never touch disk.
+RESUME_UPLOAD_FIELD = 'resume'
+RESUME_MAX_UPLOAD_SIZE = int(os.getenv('RESUME_MAX_UPLOAD_SIZE', str(10 * 1024 * 1024)))
+FILE_UPLOAD_MAX_MEMORY_SIZE = RESUME_MAX_UPLOAD_SIZE
+FILE_UPLOAD_HANDLERS = [
+    'api.upload_handlers.ResumeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 
 # Media settings for local file storage
 MEDIA_URL = '/media/'
@@ -108,5 +140,145 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Caches. LLM feedback gets its own cache, keyed by a hash of the exact prompt and
+# model parameters; the local-memory backend evicts least recently used entries.
+FEEDBACK_CACHE_ALIAS = 'feedback'
+FEEDBACK_CACHE_TTL = int(os.getenv('FEEDBACK_CACHE_TTL', str(7 * 24 * 3600)))
+FEEDBACK_CACHE_MAX_ENTRIES = int(os.getenv('FEEDBACK_CACHE_MAX_ENTRIES', '5000'))
+
+# Per-user cache of the authenticated user row and history pages, invalidated by signals
+# when a user or one of their analyses is saved (see api/signals.py). Analyses are saved by
+# the worker processes too, so the default file backend is shared by every process on the
+# host; use 'locmem' only when uploads are analysed inline (ANALYSIS_ASYNC = False).
+USER_CACHE_ALIAS = 'users'
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    FEEDBACK_CACHE_ALIAS: {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if os.getenv('FEEDBACK_CACHE_BACKEND', 'locmem') == 'file'
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('FEEDBACK_CACHE_LOCATION', os.path.join(BASE_DIR, 'var', 'feedback_cache')),
+        'TIMEOUT': FEEDBACK_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': FEEDBACK_CACHE_MAX_ENTRIES,
+        },
+    },
+    USER_CACHE_ALIAS: {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache'
+            if os.getenv('USER_CACHE_BACKEND', 'file') == 'locmem'
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv('USER_CACHE_LOCATION', os.path.join(BASE_DIR, 'var', 'user_cache')),
+        'TIMEOUT': USER_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': USER_CACHE_MAX_ENTRIES,
+        },
+    },
+}
+SESSION_CACHE_ALIAS = os.getenv('SESSION_CACHE_ALIAS', USER_CACHE_ALIAS)
+
+# Feedback provider HTTP client. Point OPENROUTER_BASE_URL at a local stub server in tests.
+FEEDBACK_API_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+FEEDBACK_CONNECT_TIMEOUT = float(os.getenv('FEEDBACK_CONNECT_TIMEOUT', '5'))
+FEEDBACK_READ_TIMEOUT = float(os.getenv('FEEDBACK_READ_TIMEOUT', '30'))
+FEEDBACK_MAX_RETRIES = int(os.getenv('FEEDBACK_MAX_RETRIES', '2'))
+# Every attempt of one provider call, retries and backoff included, must finish within this
+FEEDBACK_TOTAL_TIMEOUT = float(os.getenv('FEEDBACK_TOTAL_TIMEOUT', '40'))
+FEEDBACK_POOL_SIZE = int(os.getenv('FEEDBACK_POOL_SIZE', '10'))
+# The circuit opens when at least half of the last 20 calls (minimum 5) failed,
+# and allows a trial call after FEEDBACK_BREAKER_RESET_TIMEOUT seconds
+FEEDBACK_BREAKER_FAILURE_THRESHOLD = float(os.getenv('FEEDBACK_BREAKER_FAILURE_THRESHOLD', '0.5'))
+FEEDBACK_BREAKER_WINDOW = int(os.getenv('FEEDBACK_BREAKER_WINDOW', '20'))
+FEEDBACK_BREAKER_MIN_CALLS = int(os.getenv('FEEDBACK_BREAKER_MIN_CALLS', '5'))
+FEEDBACK_BREAKER_RESET_TIMEOUT = float(os.getenv('FEEDBACK_BREAKER_RESET_TIMEOUT', '30'))
+
+# Metrics at /api/metrics/ are visible to staff users, or to scrapers sending
+# `Authorization: Bearer <METRICS_TOKEN>` when a token is set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Web processes, analysis workers and executor pool processes each write their metrics to
+# METRICS_DIR every METRICS_EXPORT_INTERVAL seconds; /api/metrics/ reports the sum over the
+# live processes on the host. Set METRICS_DIR to an empty string to report only the web process.
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'var', 'metrics'))
+METRICS_EXPORT_INTERVAL = float(os.getenv('METRICS_EXPORT_INTERVAL', '5'))
+
+# NLP settings
+# Load and warm the spaCy pipeline when the app starts rather than on the first upload
+NLP_WARMUP = os.getenv('NLP_WARMUP', 'True') == 'True'
+
+# Analysis queue: uploads are processed by `python manage.py run_analysis_workers`
+# unless ANALYSIS_ASYNC is False, in which case the upload request runs the pipeline itself
+ANALYSIS_ASYNC = os.getenv('ANALYSIS_ASYNC', 'True') == 'True'
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', '3'))
+ANALYSIS_JOB_LEASE_SECONDS = int(os.getenv('ANALYSIS_JOB_LEASE_SECONDS', '300'))
+# Queued uploads get a 429 once ANALYSIS_QUEUE_MAX_PENDING jobs are queued or running, or the
+# user already has ANALYSIS_QUEUE_MAX_PER_USER. These are counted in the database, so they hold
+# across all web processes. 0 turns a limit off.
+ANALYSIS_QUEUE_MAX_PENDING = int(os.getenv('ANALYSIS_QUEUE_MAX_PENDING', '200'))
+ANALYSIS_QUEUE_MAX_PER_USER = int(os.getenv('ANALYSIS_QUEUE_MAX_PER_USER', '5'))
+
+# Executor for CPU-bound stages of the async upload view (`upload/async/`):
+# 'thread' shares the warmed spaCy pipeline, 'process' sidesteps the GIL for parsing
+ANALYSIS_EXECUTOR = os.getenv('ANALYSIS_EXECUTOR', 'thread')
+ANALYSIS_EXECUTOR_WORKERS = int(os.getenv('ANALYSIS_EXECUTOR_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Admission control for analyses run inside a request (`upload/` with ANALYSIS_ASYNC off,
+# `upload/async/`, `upload/stream/`), per server process: at most ADMISSION_MAX_CONCURRENT
+# analyses run at once and ADMISSION_MAX_QUEUE more wait up to ADMISSION_QUEUE_TIMEOUT seconds.
+# A user may have ADMISSION_MAX_PER_USER running or waiting. Anything else gets a 429 with
+# Retry-After. Set ADMISSION_MAX_CONCURRENT to 0 to turn the gate off.
+# The gate lives in each process, so with N server processes (e.g. gunicorn/uvicorn --workers N)
+# the host admits up to N times these numbers; size them per process.
+ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', str(ANALYSIS_EXECUTOR_WORKERS)))
+ADMISSION_MAX_PER_USER = int(os.getenv('ADMISSION_MAX_PER_USER', '2'))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', str(ADMISSION_MAX_CONCURRENT * 2)))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '10'))
+
+# PDF extraction: documents with at least PDF_PARALLEL_PAGE_THRESHOLD pages are split
+# into page ranges and extracted across a pool of PDF_PARSE_WORKERS processes
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv('PDF_PARALLEL_PAGE_THRESHOLD', '10'))
+# PDF text extraction engine: 'auto' probes the first page with each installed engine
+# from PDF_ENGINE_ORDER and keeps the first that yields PDF_ENGINE_MIN_PROBE_LETTERS letters.
+# Once an engine has PDF_ENGINE_MIN_SAMPLES pages of timings, engines are tried fastest first.
+PDF_ENGINE = os.getenv('PDF_ENGINE', 'auto')
+PDF_ENGINE_ORDER = os.getenv('PDF_ENGINE_ORDER', 'pypdfium2,pypdf,pdfplumber')
+PDF_ENGINE_MIN_PROBE_LETTERS = int(os.getenv('PDF_ENGINE_MIN_PROBE_LETTERS', '100'))
+PDF_ENGINE_MIN_SAMPLES = int(os.getenv('PDF_ENGINE_MIN_SAMPLES', '20'))
+# Extraction budget: stop reading a resume after this many pages / characters (0 = no limit)
+RESUME_MAX_PAGES = int(os.getenv('RESUME_MAX_PAGES', '0'))
+RESUME_MAX_CHARS = int(os.getenv('RESUME_MAX_CHARS', '0'))
+
+# Extracted resume text cached by PDF content hash (least recently used entries are evicted)
+RESUME_TEXT_CACHE_MAX_ENTRIES = int(os.getenv('RESUME_TEXT_CACHE_MAX_ENTRIES', '10000'))
+
+# Rows fetched per server-side cursor round trip (and written per chunk) by /api/history/export/
+HISTORY_EXPORT_CHUNK_SIZE = int(os.getenv('HISTORY_EXPORT_CHUNK_SIZE', '2000'))
+
+# Maximum number of job descriptions accepted by the batch scoring endpoint
+BATCH_MAX_JOB_DESCRIPTIONS = int(os.getenv('BATCH_MAX_JOB_DESCRIPTIONS', '50'))
+
+# Inverted index of stored resumes, updated on each analysis (rebuild with `python manage.py rebuild_search_index`)
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'True') == 'True'
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '100'))
+
+# Skill taxonomy (skills, synonyms and action verbs) matched by the ATS score and fallback feedback.
+# SKILL_ATS_WEIGHT is the share of the ATS score that comes from job skills found in the resume.
+SKILL_TAXONOMY_PATH = os.getenv('SKILL_TAXONOMY_PATH', os.path.join(BASE_DIR, 'api', 'data', 'skills.json'))
+SKILL_ATS_WEIGHT = float(os.getenv('SKILL_ATS_WEIGHT', '0.5'))
+
+# Persisted corpus TF-IDF model (refit with `python manage.py refit_tfidf`)
+TFIDF_MODEL_PATH = os.getenv('TFIDF_MODEL_PATH', os.path.join(BASE_DIR, 'var', 'tfidf_model.json'))
+TFIDF_MIN_DOCUMENTS = int(os.getenv('TFIDF_MIN_DOCUMENTS', '20'))
+TFIDF_JOB_VECTOR_CACHE_SIZE = int(os.getenv('TFIDF_JOB_VECTOR_CACHE_SIZE', '1024'))
+
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
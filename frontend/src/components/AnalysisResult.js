@@ -255,60 +255,62 @@ function AnalysisResult({ analysis }) {
       </div>
 
       {/* AI Feedback Section */}
-      <motion.div variants={itemVariants}>
-        <motion.div
-          className="card border-0"
-          style={{
-            background: 'rgba(255, 255, 255, 0.95)',
-            backdropFilter: 'blur(20px)',
-            borderRadius: '20px',
-            boxShadow: '0 10px 30px rgba(0, 0, 0, 0.1)'
-          }}
-          whileHover={{
-            y: -5,
-            boxShadow: '0 20px 40px rgba(0, 0, 0, 0.15)'
-          }}
-        >
-          <div className="card-body p-5">
-            <div className="d-flex align-items-center mb-4">
+      {analysis.feedback && (
+        <motion.div variants={itemVariants}>
+          <motion.div
+            className="card border-0"
+            style={{
+              background: 'rgba(255, 255, 255, 0.95)',
+              backdropFilter: 'blur(20px)',
+              borderRadius: '20px',
+              boxShadow: '0 10px 30px rgba(0, 0, 0, 0.1)'
+            }}
+            whileHover={{
+              y: -5,
+              boxShadow: '0 20px 40px rgba(0, 0, 0, 0.15)'
+            }}
+          >
+            <div className="card-body p-5">
+              <div className="d-flex align-items-center mb-4">
+                <motion.div
+                  className="rounded-3 p-3 me-3"
+                  style={{ background: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)' }}
+                  whileHover={{ rotate: 360 }}
+                  transition={{ duration: 0.6 }}
+                >
+                  <Brain className="text-white" size={28} />
+                </motion.div>
+                <div>
+                  <h4 className="fw-bold mb-1">AI-Powered Feedback</h4>
+                  <p className="text-muted mb-0">Personalized suggestions to improve your resume</p>
+                </div>
+              </div>
+              
               <motion.div
-                className="rounded-3 p-3 me-3"
-                style={{ background: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)' }}
-                whileHover={{ rotate: 360 }}
-                transition={{ duration: 0.6 }}
+                className="p-4 rounded-4"
+                style={{
+                  background: 'linear-gradient(135deg, rgba(102, 126, 234, 0.05), rgba(118, 75, 162, 0.05))',
+                  border: '1px solid rgba(102, 126, 234, 0.1)'
+                }}
+                initial={{ opacity: 0 }}
+                animate={{ opacity: 1 }}
+                transition={{ delay: 1, duration: 0.8 }}
               >
-                <Brain className="text-white" size={28} />
+                <div 
+                  className="text-dark"
+                  style={{ 
+                    whiteSpace: 'pre-line', 
+                    fontSize: '15px',
+                    lineHeight: '1.6'
+                  }}
+                >
+                  {analysis.feedback}
+                </div>
               </motion.div>
-              <div>
-                <h4 className="fw-bold mb-1">AI-Powered Feedback</h4>
-                <p className="text-muted mb-0">Personalized suggestions to improve your resume</p>
-              </div>
             </div>
-            
-            <motion.div
-              className="p-4 rounded-4"
-              style={{
-                background: 'linear-gradient(135deg, rgba(102, 126, 234, 0.05), rgba(118, 75, 162, 0.05))',
-                border: '1px solid rgba(102, 126, 234, 0.1)'
-              }}
-              initial={{ opacity: 0 }}
-              animate={{ opacity: 1 }}
-              transition={{ delay: 1, duration: 0.8 }}
-            >
-              <div 
-                className="text-dark"
-                style={{ 
-                  whiteSpace: 'pre-line', 
-                  fontSize: '15px',
-                  lineHeight: '1.6'
-                }}
-              >
-                {analysis.feedback}
-              </div>
-            </motion.div>
-          </div>
+          </motion.div>
         </motion.div>
-      </motion.div>
+      )}
 
       {/* Job Description Toggle */}
       {analysis.job_description && (
@@ -7,7 +7,9 @@ import { BarChart3, TrendingUp, Clock, FileText, Brain, Sparkles, Calendar } fro
 
 function Dashboard() {
   const [analyses, setAnalyses] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
@@ -16,7 +18,8 @@ function Dashboard() {
         const response = await axios.get('/api/history/', {
           withCredentials: true,
         });
-        setAnalyses(response.data);
+        setAnalyses(response.data.results);
+        setNextPage(response.data.next);
       } catch (err) {
         console.error('Error fetching analysis history:', err);
         setError('Failed to load analysis history');
@@ -27,6 +30,33 @@ function Dashboard() {
     fetchAnalyses();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(nextPage, { withCredentials: true });
+      setAnalyses((previous) => [...previous, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      console.error('Error fetching analysis history:', err);
+      setError('Failed to load analysis history');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadDetails = async (analysisId) => {
+    // History entries are summaries; fetch feedback and job description on demand
+    try {
+      const response = await axios.get(`/api/analysis/${analysisId}/`, { withCredentials: true });
+      setAnalyses((previous) =>
+        previous.map((analysis) => (analysis.id === analysisId ? response.data : analysis))
+      );
+    } catch (err) {
+      console.error('Error fetching analysis details:', err);
+      setError('Failed to load analysis details');
+    }
+  };
+
   const containerVariants = {
     hidden: { opacity: 0 },
     visible: {
@@ -436,10 +466,31 @@ function Dashboard() {
                             </div>
                           </div>
                           <AnalysisResult analysis={analysis} />
+                          {!analysis.feedback && (
+                            <div className="text-center mt-3">
+                              <button
+                                className="btn btn-outline-primary rounded-4"
+                                onClick={() => loadDetails(analysis.id)}
+                              >
+                                View full report
+                              </button>
+                            </div>
+                          )}
                         </div>
                       </motion.div>
                     </motion.div>
                   ))}
+                  {nextPage && (
+                    <div className="col-12 text-center">
+                      <button
+                        className="btn btn-outline-primary rounded-4 px-4"
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                      >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </AnimatePresence>
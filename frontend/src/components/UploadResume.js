@@ -5,6 +5,9 @@ import { Form, Alert } from 'react-bootstrap';
 import AnalysisResult from './AnalysisResult';
 import { Upload, FileText, Zap, Target, Brain, CheckCircle } from 'lucide-react';
 
+// Give up polling once a queued analysis has taken this long, retries included
+const ANALYSIS_TIMEOUT_MS = 10 * 60 * 1000;
+
 function UploadResume() {
   const [resume, setResume] = useState(null);
   const [jobDescription, setJobDescription] = useState('');
@@ -12,6 +15,32 @@ function UploadResume() {
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const [dragActive, setDragActive] = useState(false);
+  const [stageLabel, setStageLabel] = useState('');
+
+  const waitForAnalysis = async (analysisId) => {
+    // Uploads are processed in the background; poll until the pipeline finishes
+    const deadline = Date.now() + ANALYSIS_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 1500));
+      const statusResponse = await axios.get(`/api/analysis/${analysisId}/status/`, {
+        withCredentials: true,
+      });
+      const { status, stages } = statusResponse.data;
+      const running = stages.find((stage) => stage.state === 'running');
+      setStageLabel(running ? running.label : '');
+
+      if (status === 'completed' || status === 'failed') {
+        const detailResponse = await axios.get(`/api/analysis/${analysisId}/`, {
+          withCredentials: true,
+        });
+        if (status === 'failed') {
+          throw new Error(detailResponse.data.feedback);
+        }
+        return detailResponse.data;
+      }
+    }
+    throw new Error('Analysis is taking longer than expected. Check your analysis history later.');
+  };
 
   const handleDrag = (e) => {
     e.preventDefault();
@@ -91,11 +120,16 @@ const response = await axios.post('/api/upload/', formData, {
   },
   withCredentials: true,
 });
-      setAnalysis(response.data);
+      if (response.status === 202) {
+        setAnalysis(await waitForAnalysis(response.data.id));
+      } else {
+        setAnalysis(response.data);
+      }
     } catch (err) {
       console.error('Upload error:', err);
-      setError(err.response?.data?.error || 'Error analyzing resume. Please try again.');
+      setError(err.response?.data?.error || err.message || 'Error analyzing resume. Please try again.');
     } finally {
+      setStageLabel('');
       setLoading(false);
     }
   };
@@ -383,7 +417,7 @@ const response = await axios.post('/api/upload/', formData, {
                           <Brain size={24} />
                         </motion.div>
                         <div>
-                          <div>Analyzing Your Resume...</div>
+                          <div>{stageLabel || 'Analyzing Your Resume'}...</div>
                           <small className="opacity-75">This may take a few moments</small>
                         </div>
                       </motion.div>